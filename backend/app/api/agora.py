@@ -2,21 +2,26 @@
 Agora API endpoints for video/audio calling functionality
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from pydantic import BaseModel
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Request
+from pydantic import BaseModel, Field
+from typing import List, Optional
+import asyncio
+import json
 import time
-from agora_token_builder import RtcTokenBuilder
-from agora_token_builder.RtcTokenBuilder import Role_Attendee, Role_Publisher
-import os
 from ..core.dependencies import get_current_user
+from ..models.call import CallSession
 from ..models.user import User
+from ..services.agora_service import AgoraToken, agora_service, uid_for_user
+from ..services.call_registry import call_registry
+from ..services.chat_service import chat_service
+from ..services.presence_service import presence_service
+from ..services.realtime_service import realtime_service
 
 router = APIRouter()
 
-# Agora credentials - these should be set as environment variables
-AGORA_APP_ID = os.getenv("AGORA_APP_ID", "88f1741521a941778d07e17a48890191")
-AGORA_APP_CERTIFICATE = os.getenv("AGORA_APP_CERTIFICATE", "d0d7bfc5fd92445baa94588a770ef431")
+# Agora credentials - set via the AGORA_APP_ID / AGORA_APP_CERTIFICATE environment variables
+AGORA_APP_ID = agora_service.app_id
+AGORA_APP_CERTIFICATE = agora_service.app_certificate
 
 class TokenRequest(BaseModel):
     channel_name: str
@@ -32,13 +37,25 @@ class TokenResponse(BaseModel):
     expiry_time: int
     expires_at: int
 
+def _token_response(issued: AgoraToken, current_timestamp: int) -> TokenResponse:
+    return TokenResponse(
+        token=issued.token,
+        app_id=AGORA_APP_ID,
+        channel_name=issued.channel_name,
+        uid=issued.uid,
+        expiry_time=issued.expires_at - current_timestamp,
+        expires_at=issued.expires_at
+    )
+
 @router.post("/generate-token", response_model=TokenResponse)
 async def generate_agora_token(
     request: TokenRequest,
     current_user: User = Depends(get_current_user)
 ):
     """
-    Generate a fresh Agora RTC token for video/audio calls
+    Generate an Agora RTC token for video/audio calls
+    A token already issued for the same channel, uid and role is returned
+    while enough of the requested lifetime remains (AGORA_TOKEN_REFRESH_RATIO)
     
     Args:
         request: Token generation request containing channel name, uid, role, and expiry
@@ -57,31 +74,16 @@ async def generate_agora_token(
         )
     
     try:
-        # Calculate expiry timestamp
         current_timestamp = int(time.time())
-        privilege_expired_ts = current_timestamp + request.expiry_time
-        
-        # Determine role
-        role = Role_Publisher if request.role.lower() == "publisher" else Role_Attendee
-        
-        # Generate token
-        token = RtcTokenBuilder.buildTokenWithUid(
-            AGORA_APP_ID,
-            AGORA_APP_CERTIFICATE, 
+        issued = agora_service.issue_token(
             request.channel_name,
             request.uid,
-            role,
-            privilege_expired_ts
+            request.role,
+            request.expiry_time,
+            now=current_timestamp
         )
         
-        return TokenResponse(
-            token=token,
-            app_id=AGORA_APP_ID,
-            channel_name=request.channel_name,
-            uid=request.uid,
-            expiry_time=request.expiry_time,
-            expires_at=privilege_expired_ts
-        )
+        return _token_response(issued, current_timestamp)
         
     except Exception as e:
         raise HTTPException(
@@ -96,7 +98,8 @@ async def refresh_agora_token(
 ):
     """
     Refresh an existing Agora token with a new expiry time
-    This is the same as generating a new token but with explicit refresh semantics
+    Retried refreshes share the cached token; a new one is signed only once
+    the cached token is past the refresh threshold
     """
     return await generate_agora_token(request, current_user)
 
@@ -104,6 +107,8 @@ class ChannelInfo(BaseModel):
     channel_name: str
     participant_count: int
     is_active: bool
+    publishers: int = 0
+    audience: int = 0
 
 @router.get("/channel/{channel_name}/info")
 async def get_channel_info(
@@ -112,28 +117,40 @@ async def get_channel_info(
 ) -> ChannelInfo:
     """
     Get information about an Agora channel
-    Note: This is a placeholder - actual implementation would require Agora's RESTful API
+    Occupancy is kept in memory from call joins/leaves and Agora channel
+    events (see /webhook), so this never calls out to Agora
     """
-    # This would require implementing Agora's RESTful API calls
-    # For now, return basic info
-    return ChannelInfo(
-        channel_name=channel_name,
-        participant_count=0,  # Would need to query Agora's API
-        is_active=False  # Would need to query Agora's API
-    )
+    return ChannelInfo(**call_registry.occupancy(channel_name))
+
+@router.post("/webhook")
+async def agora_webhook(request: Request):
+    """
+    Receive Agora channel event notifications (member join/leave, channel destroy)
+    Requests must be signed with AGORA_WEBHOOK_SECRET; the endpoint is disabled without it
+    """
+    if not agora_service.webhook_secret:
+        raise HTTPException(status_code=503, detail="Agora webhook secret not configured")
+    
+    body = await request.body()
+    if not agora_service.verify_webhook(
+        body,
+        request.headers.get("Agora-Signature-V2"),
+        request.headers.get("Agora-Signature")
+    ):
+        raise HTTPException(status_code=401, detail="Invalid Agora webhook signature")
+    
+    try:
+        event = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    
+    applied = await call_registry.handle_webhook_event(event)
+    return {"status": "ok", "applied": applied}
 
 class StartCallRequest(BaseModel):
     chat_room_id: str
     call_type: str = "video"
 
-class CallSession(BaseModel):
-    session_id: str
-    channel_name: str
-    participants: list[str]
-    call_type: str  # "video" or "voice"
-    created_at: str
-    status: str  # "active", "ended", "failed"
-
 @router.post("/start-call")
 async def start_call_session(
     request: StartCallRequest,
@@ -141,26 +158,19 @@ async def start_call_session(
 ) -> CallSession:
     """
     Start a new call session for a chat room
-    This creates a call session record and returns the channel information
+    The session is registered (and persisted) and a call message is posted to
+    the room; if the room already has an active call, the user joins it instead
     """
-    import uuid
-    from datetime import datetime
-    
-    # Generate unique session ID and channel name
-    session_id = str(uuid.uuid4())
-    channel_name = f"call_{request.chat_room_id}_{session_id[:8]}"
-    
-    # In a real implementation, you'd save this to your database
-    call_session = CallSession(
-        session_id=session_id,
-        channel_name=channel_name,
-        participants=[current_user.id], # Add current user as first participant
-        call_type=request.call_type,
-        created_at=datetime.utcnow().isoformat(),
-        status="active"
-    )
+    if not await chat_service.is_participant(request.chat_room_id, current_user.id):
+        raise HTTPException(status_code=403, detail="Not a participant of this chat room")
     
-    return call_session
+    return await call_registry.start_call(request.chat_room_id, current_user, request.call_type)
+
+def _active_session(session_id: str) -> CallSession:
+    session = call_registry.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Call session not found or already ended")
+    return session
 
 @router.post("/join-call/{session_id}")
 async def join_call_session(
@@ -169,16 +179,18 @@ async def join_call_session(
 ):
     """
     Join an existing call session
-    Returns the channel name and generates a token for the user
+    Returns the session's channel name and a token for the user
     """
-    # In a real implementation, you'd look up the call session from database
-    # For now, reconstruct the channel name (this is a simplified approach)
-    channel_name = f"call_session_{session_id}"
+    session = _active_session(session_id)
+    if not await chat_service.is_participant(session.chat_room_id, current_user.id):
+        raise HTTPException(status_code=403, detail="Not a participant of this call's chat room")
+    
+    await call_registry.join(session_id, current_user.id)
     
     # Generate token for the user to join
     token_request = TokenRequest(
-        channel_name=channel_name,
-        uid=int(current_user.id[:8], 16) if current_user.id else 0,  # Convert user ID to int
+        channel_name=session.channel_name,
+        uid=uid_for_user(current_user.id),
         role="publisher"
     )
     
@@ -186,15 +198,106 @@ async def join_call_session(
     
     return {
         "session_id": session_id,
-        "channel_name": channel_name,
+        "channel_name": session.channel_name,
         "token_info": token_response
     }
 
+class BatchTokenRequest(BaseModel):
+    chat_room_id: Optional[str] = None  # Starts a call if the room has none
+    session_id: Optional[str] = None
+    call_type: str = "video"
+    role: Optional[str] = "publisher"
+    expiry_time: int = Field(default=86400, gt=0)  # Token lifetime in seconds
+
+class BatchTokenResponse(BaseModel):
+    session: CallSession
+    token_info: TokenResponse  # The requesting user's own token
+    delivered_to: List[str]  # Participants whose token was pushed over the realtime channel
+    pending: List[str]  # Offline participants; their token is cached for join-call
+
+@router.post("/batch-tokens", response_model=BatchTokenResponse)
+async def issue_batch_tokens(
+    request: BatchTokenRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Issue tokens for every participant of a call in one request
+    Tokens are signed concurrently and pushed to online participants as
+    `call_token` realtime events; offline participants get the same (cached)
+    token when they join. Only the caller's own token is returned.
+    """
+    if bool(request.chat_room_id) == bool(request.session_id):
+        raise HTTPException(status_code=400, detail="Provide exactly one of chat_room_id or session_id")
+    if not AGORA_APP_CERTIFICATE:
+        raise HTTPException(status_code=500, detail="Agora App Certificate not configured")
+    
+    if request.session_id:
+        session = _active_session(request.session_id)
+        chat_room_id = session.chat_room_id
+    else:
+        chat_room_id = request.chat_room_id
+    if not await chat_service.is_participant(chat_room_id, current_user.id):
+        raise HTTPException(status_code=403, detail="Not a participant of this chat room")
+    if not request.session_id:
+        session = call_registry.get_for_room(chat_room_id) or await call_registry.start_call(
+            chat_room_id, current_user, request.call_type
+        )
+    
+    user_ids = [user_id for user_id, _ in await chat_service.get_participants(chat_room_id)]
+    current_timestamp = int(time.time())
+    issued = await agora_service.issue_tokens(
+        session.channel_name,
+        [uid_for_user(user_id) for user_id in user_ids],
+        request.role,
+        request.expiry_time
+    )
+    tokens = {user_id: _token_response(token, current_timestamp) for user_id, token in zip(user_ids, issued)}
+    
+    session_payload = session.to_payload()
+    online = [u for u in user_ids if u != current_user.id and presence_service.is_online(u)]
+    sent = await asyncio.gather(*(
+        realtime_service.send_to_user(user_id, {
+            "type": "call_token",
+            "session": session_payload,
+            "token_info": tokens[user_id].dict(),
+        })
+        for user_id in online
+    ))
+    delivered = [user_id for user_id, count in zip(online, sent) if count]
+    
+    return BatchTokenResponse(
+        session=session,
+        token_info=tokens[current_user.id],
+        delivered_to=delivered,
+        pending=[u for u in user_ids if u != current_user.id and u not in delivered]
+    )
+
+@router.post("/leave-call/{session_id}")
+async def leave_call_session(
+    session_id: str,
+    current_user: User = Depends(get_current_user)
+) -> CallSession:
+    """Leave a call session; calls left empty end after the idle timeout"""
+    _active_session(session_id)
+    return await call_registry.leave(session_id, current_user.id)
+
+@router.post("/end-call/{session_id}")
+async def end_call_session(
+    session_id: str,
+    current_user: User = Depends(get_current_user)
+) -> CallSession:
+    """End a call session for everyone (only the user who started it)"""
+    session = _active_session(session_id)
+    if session.created_by != current_user.id:
+        raise HTTPException(status_code=403, detail="Only the caller can end this call")
+    return await call_registry.end(session_id)
+
 @router.get("/health")
 async def agora_health_check():
     """Health check for Agora service"""
     return {
         "status": "healthy",
         "agora_configured": bool(AGORA_APP_CERTIFICATE),
-        "app_id": AGORA_APP_ID[:8] + "..." if AGORA_APP_ID else None
+        "app_id": AGORA_APP_ID[:8] + "..." if AGORA_APP_ID else None,
+        "token_cache": agora_service.stats()
     }
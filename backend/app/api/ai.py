@@ -2,21 +2,181 @@
 AI assistant API endpoints
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, field_validator
+from starlette.requests import ClientDisconnect
+from typing import AsyncIterator, Dict, Optional
+import asyncio
+import codecs
+import json
+
+from app.core.config import settings
+from app.core.dependencies import get_current_user
+from app.models.user import User
+from app.services.action_items import ActionItemMerger
+from app.services.ai_providers import ProviderError
+from app.services.ai_service import ai_service
+from app.services.briefing_service import briefing_service
 
 router = APIRouter()
 
 
+class AIChatRequest(BaseModel):
+    message: str
+    context: Optional[Dict] = None
+    model: str = "gpt-3.5-turbo"
+
+    @field_validator("model")
+    @classmethod
+    def model_allowed(cls, model: str) -> str:
+        if model not in settings.AI_MODELS:
+            raise ValueError(f"Unsupported model (expected one of {', '.join(settings.AI_MODELS)})")
+        return model
+
+
+def _sse(data: Dict, event: Optional[str] = None) -> str:
+    """Format one Server-Sent Event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def _provider_error_event(error: ProviderError) -> str:
+    """SSE `error` event for a provider failure after the response has started"""
+    return _sse(
+        {"detail": str(error), "status_code": error.status_code, "retry_after": error.retry_after},
+        event="error",
+    )
+
+
+class RequestBodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose content consumes the request body as it is sent.
+    Starlette listens for client disconnects on the same receive channel the
+    body arrives on, so listening starts only once the body has been read.
+    """
+
+    def __init__(self, content, body_read: asyncio.Event, **kwargs):
+        super().__init__(content, **kwargs)
+        self.body_read = body_read
+
+    async def listen_for_disconnect(self, receive):
+        await self.body_read.wait()
+        await super().listen_for_disconnect(receive)
+
+
+def _provider_http_error(error: ProviderError) -> HTTPException:
+    """Map a provider failure onto a 429 or 503 response"""
+    if error.status_code == 429:
+        headers = {"Retry-After": str(max(1, round(error.retry_after)))} if error.retry_after else None
+        return HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(error), headers=headers)
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(error))
+
+
 @router.post("/chat")
-async def chat_with_ai():
-    """Chat with AI assistant"""
-    # TODO: Implement AI chat functionality
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="AI chat not implemented yet"
+async def chat_with_ai(
+    request: AIChatRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Chat with AI assistant, streamed as Server-Sent Events.
+    Each token is sent as a `data` event, followed by a final `done` event,
+    or an `error` event if the provider fails or rate-limits the call.
+    Tokens are pulled from the provider only as fast as they are sent, and a
+    client disconnect cancels the stream (and the provider call) mid-response.
+    """
+    context = {"user": current_user.profile.display_name, **(request.context or {})}
+
+    async def event_stream():
+        stream = ai_service.stream_response(request.message, context, request.model)
+        try:
+            async for token in stream:
+                yield _sse({"token": token})
+            yield _sse({}, event="done")
+        except ProviderError as e:
+            yield _provider_error_event(e)
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/action-items")
+async def extract_action_items(
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Extract action items from a transcript sent as a text body.
+    Items are streamed as Server-Sent Events as each part of the transcript is
+    processed, followed by a `done` event carrying the merged list. The body is
+    chunked as it arrives and capped at ACTION_ITEM_MAX_BODY_BYTES.
+    """
+    limit = settings.ACTION_ITEM_MAX_BODY_BYTES
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > limit:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Transcript exceeds {limit} bytes"
+        )
+
+    body_read = asyncio.Event()
+
+    async def text_stream() -> AsyncIterator[str]:
+        # Chunks are extracted while the rest of the body is still arriving
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        received = 0
+        try:
+            async for data in request.stream():
+                received += len(data)
+                if received > limit:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Transcript exceeds {limit} bytes"
+                    )
+                yield decoder.decode(data)
+            yield decoder.decode(b"", final=True)
+        finally:
+            body_read.set()
+
+    async def event_stream():
+        merger = ActionItemMerger()
+        stream = ai_service.extract_action_items_stream(text_stream(), merger=merger)
+        try:
+            async for items in stream:
+                yield _sse({"items": items})
+            yield _sse({"items": merger.items}, event="done")
+        except ProviderError as e:
+            yield _provider_error_event(e)
+        except HTTPException as e:
+            # Chunked bodies without a Content-Length only hit the limit mid-response
+            yield _sse({"detail": e.detail, "status_code": e.status_code}, event="error")
+        except ClientDisconnect:
+            pass
+        finally:
+            await stream.aclose()
+
+    return RequestBodyStreamingResponse(
+        event_stream(),
+        body_read,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
+@router.get("/briefing")
+async def get_daily_briefing(current_user: User = Depends(get_current_user)):
+    """Get today's briefing (precomputed before the user's local morning)"""
+    try:
+        return await briefing_service.get_briefing(current_user)
+    except ProviderError as e:
+        raise _provider_http_error(e)
+
+
 @router.get("/suggestions")
 async def get_ai_suggestions():
     """Get AI suggestions for the user"""
@@ -2,46 +2,241 @@
 Chat API endpoints
 """
 
-from fastapi import APIRouter, HTTPException, status
+import json
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from pydantic import BaseModel
+from typing import List, Optional
+
+from app.core.dependencies import get_current_user
+from app.models.chat import ChatInboxEntry, ChatMessage, ChatRoomType, MessageType
+from app.models.user import User
+from app.services.auth_service import auth_service
+from app.services.chat_service import chat_service
+from app.services.context_builder import ContextSnippet
+from app.services.firebase_service import firebase_service
+from app.services.message_processor import message_processor
+from app.services.presence_service import presence_service
+from app.services.realtime_service import realtime_service
+from app.services.vector_index import partition_for, vector_index
 
 router = APIRouter()
 
 
-@router.get("/threads")
-async def get_chat_threads():
-    """Get user's chat threads"""
-    # TODO: Implement chat thread retrieval
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Chat functionality not implemented yet"
+class CreateThreadRequest(BaseModel):
+    name: Optional[str] = None
+    room_type: ChatRoomType = ChatRoomType.GROUP
+    participant_ids: List[str] = []
+    team_id: Optional[str] = None
+    project_id: Optional[str] = None
+
+
+class SendMessageRequest(BaseModel):
+    content: str
+    message_type: MessageType = MessageType.TEXT
+    reply_to_id: Optional[str] = None
+
+
+class ThreadListResponse(BaseModel):
+    threads: List[ChatInboxEntry]
+    next_cursor: Optional[str] = None
+
+
+async def require_participant(thread_id: str, user: User):
+    """Raise 403 unless the user participates in the thread"""
+    if not await chat_service.is_participant(thread_id, user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a participant of this chat thread"
+        )
+
+
+async def index_message(thread_id: str, message: ChatMessage):
+    """Index a message for AI retrieval in its room's team partition (the room's own if it has no team)"""
+    team_id = await chat_service.get_room_team(thread_id)
+    await vector_index.upsert(
+        partition_for(team_id=team_id, room_id=thread_id), ContextSnippet.from_chat_message(message)
     )
 
 
+@router.get("/threads", response_model=ThreadListResponse)
+async def get_chat_threads(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Get user's chat threads, most recent activity first (single inbox range read)"""
+    threads, next_cursor = await chat_service.get_inbox(current_user.id, limit=limit, cursor=cursor)
+    return ThreadListResponse(threads=threads, next_cursor=next_cursor)
+
+
 @router.post("/threads")
-async def create_chat_thread():
+async def create_chat_thread(
+    request: CreateThreadRequest,
+    current_user: User = Depends(get_current_user)
+):
     """Create a new chat thread"""
-    # TODO: Implement chat thread creation
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Chat thread creation not implemented yet"
+    participants = []
+    for user_id in request.participant_ids:
+        user = await auth_service.get_user_by_id(user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"User {user_id} not found"
+            )
+        participants.append(user)
+    
+    # A project room belongs to the project's team
+    team_id = request.team_id
+    if request.project_id and not team_id:
+        project = await firebase_service.get_document("projects", request.project_id)
+        team_id = project.get("team_id") if project else None
+    if team_id and team_id not in current_user.team_memberships:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a member of this team"
+        )
+    
+    return await chat_service.create_room(
+        creator=current_user,
+        participants=participants,
+        name=request.name,
+        room_type=request.room_type,
+        team_id=team_id,
+        project_id=request.project_id,
     )
 
 
 @router.get("/threads/{thread_id}/messages")
-async def get_messages(thread_id: str):
-    """Get messages from a chat thread"""
-    # TODO: Implement message retrieval
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Message retrieval not implemented yet"
-    )
+async def get_messages(
+    thread_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Get messages from a chat thread, newest first"""
+    await require_participant(thread_id, current_user)
+    return await chat_service.get_messages(thread_id, limit=limit, before=before)
 
 
 @router.post("/threads/{thread_id}/messages")
-async def send_message(thread_id: str):
+async def send_message(
+    thread_id: str,
+    request: SendMessageRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
     """Send a message to a chat thread"""
-    # TODO: Implement message sending
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Message sending not implemented yet"
-    )
+    participants = await chat_service.get_participants(thread_id)
+    if not any(user_id == current_user.id for user_id, _ in participants):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a participant of this chat thread"
+        )
+    
+    # Single scan for AI triggers, mentions, links and slash-commands
+    processed = message_processor.process(request.content, thread_id, participants)
+    try:
+        message = await chat_service.send_message(
+            room_id=thread_id,
+            sender=current_user,
+            content=request.content,
+            message_type=request.message_type,
+            mentions=processed.mentions,
+            reply_to_id=request.reply_to_id,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    
+    payload = message.dict()
+    payload["created_at"] = message.created_at.isoformat()
+    payload["links"] = processed.links
+    payload["command"] = processed.command.dict() if processed.command else None
+    payload["ai_mentioned"] = processed.is_ai_mention
+    await realtime_service.broadcast(thread_id, {"type": "message", "message": payload})
+    
+    # Index for AI retrieval after the response is sent
+    background_tasks.add_task(index_message, thread_id, message)
+    return payload
+
+
+@router.get("/threads/{thread_id}/messages/{message_id}/replies")
+async def get_message_thread(
+    thread_id: str,
+    message_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Get a root message and a page of its replies; pass next_cursor back to continue"""
+    await require_participant(thread_id, current_user)
+    thread = await chat_service.get_thread(thread_id, message_id, limit=limit, cursor=cursor)
+    if thread is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Message not found"
+        )
+    return thread
+
+
+@router.post("/threads/{thread_id}/read")
+async def mark_thread_read(
+    thread_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Reset the current user's unread count for a thread"""
+    await chat_service.mark_read(thread_id, current_user.id)
+    return {"thread_id": thread_id, "unread_count": 0}
+
+
+@router.get("/threads/{thread_id}/presence")
+async def get_presence(
+    thread_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get online and typing users for a chat thread (memory read)"""
+    await require_participant(thread_id, current_user)
+    return presence_service.get_room_presence(thread_id)
+
+
+@router.websocket("/ws/{thread_id}")
+async def chat_websocket(websocket: WebSocket, thread_id: str, token: str = Query(...)):
+    """
+    Realtime channel for a chat thread.
+    Clients send {"type": "heartbeat"} every WEBSOCKET_HEARTBEAT_INTERVAL seconds
+    and {"type": "typing", "is_typing": bool}; presence is pushed back coalesced.
+    """
+    user = await auth_service.get_current_user(token)
+    if not user or not await chat_service.is_participant(thread_id, user.id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    realtime_service.connect(thread_id, user.id, websocket)
+    presence_service.connect(thread_id, user.id)
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            # Skip frames that aren't a JSON object rather than dropping the connection
+            try:
+                event = json.loads(message.get("text") or message.get("bytes") or "")
+            except ValueError:
+                continue
+            if not isinstance(event, dict):
+                continue
+            event_type = event.get("type")
+            if event_type == "heartbeat":
+                presence_service.heartbeat(thread_id, user.id)
+            elif event_type == "typing":
+                presence_service.set_typing(thread_id, user.id, bool(event.get("is_typing", True)))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        realtime_service.disconnect(thread_id, user.id, websocket)
+        presence_service.disconnect(thread_id, user.id)
@@ -2,11 +2,62 @@
 Document management API endpoints
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+
+from app.core.dependencies import get_current_user
+from app.models.document import Document
+from app.models.user import User
+from app.services.context_builder import ContextSnippet
+from app.services.firebase_service import firebase_service
+from app.services.summary_worker import summary_worker
+from app.services.vector_index import partition_for, vector_index
 
 router = APIRouter()
 
 
+class SummarizeRequest(BaseModel):
+    priority: int = Field(default=0, ge=0, le=10)
+
+
+class UpdateDocumentRequest(BaseModel):
+    title: Optional[str] = None
+    content: Optional[str] = None
+    change_summary: Optional[str] = None
+
+
+async def get_editable_document(document_id: str, user: User) -> Document:
+    """Load a document, raising 404 if missing and 403 unless the user may edit it"""
+    data = await firebase_service.get_document("documents", document_id)
+    if not data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found"
+        )
+
+    document = Document.from_firestore(document_id, data)
+    if user.id != document.owner_id and user.id not in document.editor_ids:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to edit this document"
+        )
+    return document
+
+
+async def refresh_derived(document: Document, summarize: bool = True, priority: int = 0):
+    """Re-index a saved document and (debounced) queue its AI summary refresh"""
+    if summarize:
+        await summary_worker.schedule(
+            document.id, document.content, document.current_version, priority
+        )
+    await vector_index.upsert(
+        partition_for(team_id=document.team_id, user_id=document.owner_id),
+        ContextSnippet.from_document(document)
+    )
+
+
 @router.get("/")
 async def get_documents():
     """Get user's documents"""
@@ -38,10 +89,45 @@ async def get_document(document_id: str):
 
 
 @router.put("/{document_id}")
-async def update_document(document_id: str):
-    """Update document by ID"""
-    # TODO: Implement document update
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Document update not implemented yet"
-    )
+async def update_document(
+    document_id: str,
+    request: UpdateDocumentRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Save a document. A content change creates a new version and schedules a
+    debounced summary refresh, so a burst of saves yields one summarization.
+    """
+    document = await get_editable_document(document_id, current_user)
+
+    content_changed = request.content is not None and request.content != document.content
+    if request.title is not None:
+        document.title = request.title
+    if content_changed:
+        document.content = request.content
+        document.update_content_stats()
+        document.create_version(current_user.id, request.change_summary)
+    document.updated_at = datetime.utcnow()
+
+    data = document.to_firestore()
+    data.pop("id", None)
+    if not await firebase_service.update_document("documents", document_id, data):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to save document"
+        )
+
+    await refresh_derived(document, summarize=content_changed)
+    return document
+
+
+@router.post("/{document_id}/summarize", status_code=status.HTTP_202_ACCEPTED)
+async def summarize_document(
+    document_id: str,
+    request: SummarizeRequest = SummarizeRequest(),
+    current_user: User = Depends(get_current_user)
+):
+    """Queue a background refresh of the document's AI summary"""
+    document = await get_editable_document(document_id, current_user)
+    await refresh_derived(document, priority=request.priority)
+    return await summary_worker.get_job(document_id)
@@ -2,11 +2,79 @@
 Task management API endpoints
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from pydantic import BaseModel, field_validator
+from typing import Dict, Optional
+from datetime import datetime
+import uuid
+
+from app.core.dependencies import get_current_user
+from app.models.task import Task, TaskPriority, TaskStatus
+from app.models.user import User
+from app.services.context_builder import ContextSnippet
+from app.services.firebase_service import firebase_service
+from app.services.vector_index import partition_for, vector_index
 
 router = APIRouter()
 
 
+class CreateTaskRequest(BaseModel):
+    title: str
+    project_id: str
+    description: Optional[str] = None
+    status: TaskStatus = TaskStatus.BACKLOG
+    priority: TaskPriority = TaskPriority.MEDIUM
+    estimated_hours: Optional[float] = None
+    due_date: Optional[datetime] = None
+
+
+class UpdateTaskRequest(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[TaskStatus] = None
+    priority: Optional[TaskPriority] = None
+    estimated_hours: Optional[float] = None
+    actual_hours: Optional[float] = None
+    due_date: Optional[datetime] = None
+
+    @field_validator("title", "status", "priority")
+    @classmethod
+    def not_null(cls, value):
+        # Omit a field to leave it unchanged; these task fields can't be cleared
+        if value is None:
+            raise ValueError("May be omitted but not null")
+        return value
+
+
+async def get_member_project(project_id: str, user: User) -> Dict:
+    """Load a project, raising 404 if missing and 403 unless the user belongs to it or its team"""
+    project = await firebase_service.get_document("projects", project_id)
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+
+    members = {member.get("user_id") for member in project.get("members", [])}
+    if (
+        project.get("team_id") not in user.team_memberships
+        and user.id not in members
+        and user.id != project.get("created_by")
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a member of this project"
+        )
+    return project
+
+
+async def index_task(task: Task, team_id: Optional[str]):
+    """Index a task for AI retrieval in its team's partition"""
+    await vector_index.upsert(
+        partition_for(team_id=team_id, user_id=task.created_by), ContextSnippet.from_task(task)
+    )
+
+
 @router.get("/")
 async def get_tasks():
     """Get user's tasks"""
@@ -17,14 +85,27 @@ async def get_tasks():
     )
 
 
-@router.post("/")
-async def create_task():
-    """Create a new task"""
-    # TODO: Implement task creation
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Task creation not implemented yet"
-    )
+@router.post("/", status_code=status.HTTP_201_CREATED)
+async def create_task(
+    request: CreateTaskRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """Create a new task in a project"""
+    project = await get_member_project(request.project_id, current_user)
+
+    task = Task(id=str(uuid.uuid4()), created_by=current_user.id, **request.dict())
+    data = task.to_firestore()
+    data.pop("id", None)
+    if not await firebase_service.create_document("tasks", task.id, data):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create task"
+        )
+
+    # Index for AI retrieval after the response is sent
+    background_tasks.add_task(index_task, task, project.get("team_id"))
+    return task
 
 
 @router.get("/{task_id}")
@@ -38,10 +119,40 @@ async def get_task(task_id: str):
 
 
 @router.put("/{task_id}")
-async def update_task(task_id: str):
-    """Update task by ID"""
-    # TODO: Implement task update
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Task update not implemented yet"
-    )
+async def update_task(
+    task_id: str,
+    request: UpdateTaskRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """Update a task's details"""
+    data = await firebase_service.get_document("tasks", task_id)
+    if not data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+
+    task = Task.from_firestore(task_id, data)
+    project = await get_member_project(task.project_id, current_user)
+
+    changes = request.dict(exclude_unset=True)
+    status_change = changes.get("status", task.status)
+    if status_change == TaskStatus.DONE and task.status != TaskStatus.DONE:
+        task.complete_task(current_user.id)
+    elif status_change != TaskStatus.DONE:
+        task.completed_date = None  # Reopened
+    now = datetime.utcnow()
+    # Rebuild rather than setattr so the merged task is validated (Task has no validate_assignment)
+    task = Task(**{**task.dict(), **changes, "updated_at": now, "last_activity": now})
+
+    data = task.to_firestore()
+    data.pop("id", None)
+    if not await firebase_service.update_document("tasks", task_id, data):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to save task"
+        )
+
+    background_tasks.add_task(index_task, task, project.get("team_id"))
+    return task
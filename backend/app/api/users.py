@@ -2,26 +2,74 @@
 User management API endpoints
 """
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel, field_validator
+from typing import Optional
+
+from app.core.dependencies import get_current_user
+from app.models.user import FocusMode, User
+from app.services.auth_service import auth_service
+from app.services.propagation_service import propagation_service
 
 router = APIRouter()
 
 
+class UpdateProfileRequest(BaseModel):
+    display_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+    bio: Optional[str] = None
+    location: Optional[str] = None
+    timezone: Optional[str] = None
+    focus_mode: Optional[FocusMode] = None
+
+    @field_validator("display_name", "timezone", "focus_mode")
+    @classmethod
+    def not_null(cls, value):
+        # Omit a field to leave it unchanged; these profile fields can't be cleared
+        if value is None:
+            raise ValueError("May be omitted but not null")
+        return value
+
+
 @router.get("/me")
-async def get_current_user():
+async def get_current_user_profile(current_user: User = Depends(get_current_user)):
     """Get current user profile"""
-    # TODO: Implement user profile retrieval
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="User profile not implemented yet"
-    )
+    return current_user
 
 
 @router.put("/me")
-async def update_current_user():
+async def update_current_user(
+    request: UpdateProfileRequest,
+    current_user: User = Depends(get_current_user)
+):
     """Update current user profile"""
-    # TODO: Implement user profile update
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="User profile update not implemented yet"
-    )
+    updates = request.dict(exclude_unset=True)
+    user = await auth_service.update_user_profile(current_user.id, updates)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    # Name/avatar are denormalized onto chat rows; rewrite them in the background
+    previous = current_user.profile
+    if (user.profile.display_name, user.profile.avatar_url) != (previous.display_name, previous.avatar_url):
+        await propagation_service.enqueue(
+            sender_id=user.id,
+            sender_name=user.profile.display_name,
+            sender_avatar=user.profile.avatar_url,
+        )
+    
+    return user
+
+
+@router.get("/me/propagation")
+async def get_profile_propagation(current_user: User = Depends(get_current_user)):
+    """Get progress of the latest sender-field propagation for the current user"""
+    job = await propagation_service.get_latest_job(current_user.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No propagation job found"
+        )
+    return {**job.dict(), "progress": job.progress}
@@ -0,0 +1,134 @@
+"""
+Concurrency primitives for lifeOS backend
+Single-flight request coalescing, token-bucket rate limiting and provider limiters
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.metrics import metrics
+
+SINGLE_FLIGHT_SHARED = metrics.counter(
+    "single_flight_shared_total", "Calls that joined an identical in-flight call instead of starting one"
+)
+LIMITER_QUEUE_DEPTH = metrics.gauge("provider_queue_depth", "Calls waiting for a provider slot")
+LIMITER_IN_FLIGHT = metrics.gauge("provider_in_flight", "Provider calls currently running")
+LIMITER_WAIT_SECONDS = metrics.histogram(
+    "provider_wait_seconds", "Time spent waiting for concurrency and rate limits"
+)
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one in-flight task"""
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn for key, or wait for the call already running for key"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            SINGLE_FLIGHT_SHARED.inc(name=self.name)
+
+        # Shield so one caller's cancellation does not cancel the shared call
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller went away
+            task.exception()
+
+
+class TokenBucket:
+    """Token-bucket rate limiter; waiters are served in FIFO order"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens without waiting"""
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until tokens are available, then take them"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock, self._loop = asyncio.Lock(), loop
+
+        async with self._lock:
+            while not self.try_acquire(tokens):
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class ProviderLimiter:
+    """Caps concurrent calls and request rate for one upstream provider"""
+
+    def __init__(self, name: str, max_concurrency: int, rate: float, burst: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self.waiting = 0
+        self.active = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+
+    def _ensure_loop(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore, self._loop = asyncio.Semaphore(self.max_concurrency), loop
+        return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one concurrency slot and one rate-limit token for the body"""
+        semaphore = self._ensure_loop()
+        started = time.perf_counter()
+        self.waiting += 1
+        LIMITER_QUEUE_DEPTH.set(self.waiting, provider=self.name)
+        try:
+            await semaphore.acquire()
+            try:
+                await self.bucket.acquire()
+            except BaseException:
+                semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+            LIMITER_QUEUE_DEPTH.set(self.waiting, provider=self.name)
+
+        LIMITER_WAIT_SECONDS.observe(time.perf_counter() - started, provider=self.name)
+        self.active += 1
+        LIMITER_IN_FLIGHT.set(self.active, provider=self.name)
+        try:
+            yield
+        finally:
+            self.active -= 1
+            LIMITER_IN_FLIGHT.set(self.active, provider=self.name)
+            semaphore.release()
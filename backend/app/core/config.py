@@ -19,6 +19,12 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     
+    # Logging
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")  # json or text
+    LOG_QUEUE_SIZE: int = 10_000  # Records buffered for the writer thread; overflow is dropped, never blocks
+    LOG_DEBUG_SAMPLE_RATE: float = 0.01  # Fraction of DEBUG records kept (mock calls, per-request traces)
+    
     # Security
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
@@ -44,15 +50,110 @@ class Settings(BaseSettings):
     # AI Integration
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
     ANTHROPIC_API_KEY: Optional[str] = os.getenv("ANTHROPIC_API_KEY")
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+    ANTHROPIC_BASE_URL: str = os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com")
+    
+    # Agora RTC
+    AGORA_APP_ID: str = os.getenv("AGORA_APP_ID", "88f1741521a941778d07e17a48890191")
+    AGORA_APP_CERTIFICATE: str = os.getenv("AGORA_APP_CERTIFICATE", "d0d7bfc5fd92445baa94588a770ef431")
+    AGORA_TOKEN_CACHE_SIZE: int = 10000
+    AGORA_TOKEN_REFRESH_RATIO: float = 0.5  # Re-sign once less than this fraction of the requested lifetime is left
+    AGORA_SIGNING_WORKERS: int = 4  # Threads signing tokens for batch requests
+    AGORA_WEBHOOK_SECRET: Optional[str] = os.getenv("AGORA_WEBHOOK_SECRET")  # Channel event webhook is off when unset
+    
+    # Call sessions
+    CALL_SESSION_IDLE_TIMEOUT: int = 120  # Seconds an empty call stays open before it is ended
+    CALL_SESSION_MAX_DURATION: int = 4 * 3600
+    CALL_REAPER_INTERVAL: float = 30.0
+    
+    # Provider HTTP clients (one pooled keep-alive client per provider)
+    HTTP_HTTP2: bool = True  # Used when the h2 package is installed
+    HTTP_PROVIDER_MAX_CONNECTIONS: int = 20
+    HTTP_PROVIDER_MAX_KEEPALIVE: int = 10
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 60.0
+    HTTP_MAX_RETRIES: int = 3
+    HTTP_RETRY_BUDGET_RATIO: float = 0.2  # Retries allowed per recent request
+    
+    # AI response cache
+    AI_CACHE_MAX_ENTRIES: int = 1024  # In-memory LRU size
+    AI_CACHE_DB_PATH: Optional[str] = os.getenv("AI_CACHE_DB_PATH")  # Optional on-disk tier
+    
+    # AI provider limits
+    AI_PROVIDER_MAX_CONCURRENCY: int = 8
+    AI_PROVIDER_RATE_LIMIT: float = 5.0  # Requests per second
+    AI_PROVIDER_BURST: int = 10
+    AI_MODELS: List[str] = [  # Models clients may request (also the metric label values)
+        "gpt-3.5-turbo", "gpt-4", "gpt-4-turbo", "gpt-4o", "gpt-4o-mini",
+        "claude-3-haiku", "claude-3-sonnet", "claude-3-opus",
+    ]
+    
+    # AI provider backend: "mock" (instant canned responses) or "fake" (simulated latency and failures)
+    AI_PROVIDER: str = os.getenv("AI_PROVIDER", "mock")
+    AI_FAKE_LATENCY: str = os.getenv("AI_FAKE_LATENCY", "uniform:2,20")  # Time to first token
+    AI_FAKE_TOKENS_PER_SECOND: float = 40.0
+    AI_FAKE_RESPONSE_TOKENS: int = 200
+    AI_FAKE_ERROR_RATE: float = 0.0  # Calls failing before the first token
+    AI_FAKE_STREAM_ERROR_RATE: float = 0.0  # Streams failing part-way through
+    AI_FAKE_RATE_LIMIT_RATE: float = 0.0  # Calls answered with a 429
+    AI_FAKE_RETRY_AFTER: float = 1.0
+    AI_FAKE_MAX_CONCURRENCY: Optional[int] = None  # Overlapping calls beyond this get a 429
+    AI_FAKE_SEED: Optional[int] = None
+    
+    # Action-item extraction over long transcripts
+    ACTION_ITEM_CHUNK_TOKENS: int = 2000
+    ACTION_ITEM_OVERLAP_TOKENS: int = 200
+    ACTION_ITEM_MAX_CONCURRENCY: int = 4  # Chunks extracted in parallel per transcript
+    ACTION_ITEM_MAX_BODY_BYTES: int = 8 * 1024 * 1024  # Largest transcript POST /ai/action-items accepts
+    
+    # Background document summarization
+    SUMMARY_DEBOUNCE_SECONDS: float = 10.0  # Quiet period after the last save
+    SUMMARY_MAX_DELAY_SECONDS: float = 120.0  # Upper bound for continuously edited documents
+    SUMMARY_WORKERS: int = 2
+    SUMMARY_MAX_ATTEMPTS: int = 3
+    
+    # Team analytics
+    ANALYTICS_SNAPSHOT_TTL: int = 300  # Seconds a team's metrics snapshot is reused
+    
+    # Precomputed daily briefings
+    BRIEFING_LOCAL_HOUR: int = 9  # Users' local morning
+    BRIEFING_LEAD_MINUTES: int = 30  # Precompute this long before BRIEFING_LOCAL_HOUR
+    BRIEFING_CATCHUP_HOURS: int = 3  # Past this, briefings are only generated on request
+    BRIEFING_BATCH_SIZE: int = 25  # Users per batched provider call
+    
+    # Workspace embedding index
+    VECTOR_INDEX_DIR: str = os.getenv("VECTOR_INDEX_DIR", "vector_index")  # Memory-mapped partitions
+    VECTOR_DIM: int = 256
+    VECTOR_IVF_THRESHOLD: int = 50_000  # Partitions at least this large search via IVF
+    VECTOR_IVF_NPROBE: int = 8  # Inverted lists scanned per query
+    VECTOR_IVF_QUANTIZE: bool = True  # Store IVF lists as int8 codes
     
     # Redis (for caching and sessions)
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
     
     # Turso Database configuration removed
     
+    # Local SQLite database (chat, presence write-back)
+    LOCAL_DB_PATH: str = os.getenv("LOCAL_DB_PATH", "local.db")
+    
     # WebSocket
     WEBSOCKET_HEARTBEAT_INTERVAL: int = 30
     
+    # Response compression (negotiated via Accept-Encoding)
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # Smaller single-chunk bodies are sent as-is
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4  # Low qualities suit per-request compression of dynamic bodies
+    COMPRESSION_STREAMING: bool = True  # Compress streamed bodies (e.g. SSE) chunk by chunk, flushing each
+    
+    # Presence
+    PRESENCE_BROADCAST_INTERVAL: float = 0.5  # Seconds between coalesced room broadcasts
+    PRESENCE_TYPING_TTL: int = 5  # Seconds a typing flag lives without a refresh
+    PRESENCE_LAST_SEEN_FLUSH_INTERVAL: int = 60  # Seconds between last_seen batch writes
+    
+    # Denormalized sender field propagation (chat_messages.sender_name/sender_avatar)
+    SENDER_PROPAGATION_BATCH_SIZE: int = 500
+    SENDER_PROPAGATION_ROWS_PER_SECOND: int = 5000
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,283 @@
+"""
+Local SQLite database access for lifeOS backend
+"""
+
+import asyncio
+import sqlite3
+import threading
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar('T')
+
+
+# Schema mirrors the tables shipped in local.db so a fresh database file
+# (e.g. a per-environment LOCAL_DB_PATH) can be bootstrapped on startup.
+SCHEMA_STATEMENTS: List[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id TEXT PRIMARY KEY,
+        email TEXT UNIQUE NOT NULL,
+        display_name TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS chats (
+        id TEXT PRIMARY KEY,
+        name TEXT,
+        description TEXT,
+        type TEXT NOT NULL DEFAULT 'direct',
+        is_private INTEGER DEFAULT 1,
+        team_id TEXT,
+        project_id TEXT,
+        task_id TEXT,
+        last_message_id TEXT,
+        last_message_at TEXT,
+        message_count INTEGER DEFAULT 0,
+        allow_ai_assistant INTEGER DEFAULT 1,
+        notification_settings TEXT,
+        created_by TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS chat_messages (
+        id TEXT PRIMARY KEY,
+        room_id TEXT NOT NULL,
+        content TEXT NOT NULL,
+        message_type TEXT NOT NULL DEFAULT 'text',
+        sender_id TEXT NOT NULL,
+        sender_name TEXT NOT NULL,
+        sender_avatar TEXT,
+        file_url TEXT,
+        file_name TEXT,
+        file_size INTEGER,
+        created_at TEXT NOT NULL,
+        updated_at TEXT,
+        is_edited INTEGER DEFAULT 0,
+        reply_to_id TEXT,
+        thread_count INTEGER DEFAULT 0,
+        reactions TEXT,
+        mentions TEXT,
+        ai_context TEXT,
+        call_type TEXT,
+        call_status TEXT,
+        call_duration INTEGER,
+        call_participants TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS chat_participants (
+        id TEXT PRIMARY KEY,
+        chat_id TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        user_name TEXT NOT NULL,
+        user_avatar TEXT,
+        is_admin INTEGER DEFAULT 0,
+        is_online INTEGER DEFAULT 0,
+        last_seen TEXT,
+        is_typing INTEGER DEFAULT 0,
+        joined_at TEXT NOT NULL,
+        UNIQUE(chat_id, user_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_chat_messages_room_id ON chat_messages(room_id)",
+    "CREATE INDEX IF NOT EXISTS idx_chat_messages_sender_id ON chat_messages(sender_id)",
+    "CREATE INDEX IF NOT EXISTS idx_chat_messages_room_created ON chat_messages(room_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_chat_participants_chat_id ON chat_participants(chat_id)",
+    "CREATE INDEX IF NOT EXISTS idx_chat_participants_user_id ON chat_participants(user_id)",
+    # Per-user inbox: one row per (user, room), read as a single range scan
+    """
+    CREATE TABLE IF NOT EXISTS chat_inbox (
+        user_id TEXT NOT NULL,
+        room_id TEXT NOT NULL,
+        room_name TEXT,
+        room_type TEXT NOT NULL DEFAULT 'direct',
+        last_message_id TEXT,
+        last_message_at TEXT NOT NULL,
+        last_message_preview TEXT,
+        last_sender_name TEXT,
+        unread_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, room_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_chat_inbox_activity ON chat_inbox(user_id, last_message_at DESC, room_id DESC)",
+    # Thread views page replies of one root message in order
+    "CREATE INDEX IF NOT EXISTS idx_chat_messages_reply_created ON chat_messages(reply_to_id, created_at)",
+    # Resumable background rewrites of denormalized sender fields
+    """
+    CREATE TABLE IF NOT EXISTS sender_propagation_jobs (
+        id TEXT PRIMARY KEY,
+        sender_id TEXT NOT NULL,
+        sender_name TEXT NOT NULL,
+        sender_avatar TEXT,
+        last_rowid INTEGER NOT NULL DEFAULT 0,
+        rows_updated INTEGER NOT NULL DEFAULT 0,
+        total_rows INTEGER NOT NULL DEFAULT 0,
+        status TEXT NOT NULL DEFAULT 'pending',
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_sender_propagation_jobs_status ON sender_propagation_jobs(status)",
+    # Durable, debounced document summarization queue (one row per document)
+    """
+    CREATE TABLE IF NOT EXISTS summary_jobs (
+        document_id TEXT PRIMARY KEY,
+        content TEXT NOT NULL,
+        version INTEGER,
+        priority INTEGER NOT NULL DEFAULT 0,
+        revision INTEGER NOT NULL DEFAULT 1,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        first_requested_at REAL NOT NULL,
+        run_after REAL NOT NULL,
+        last_error TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_summary_jobs_due ON summary_jobs(status, run_after)",
+    # Daily briefings precomputed per user and local date
+    """
+    CREATE TABLE IF NOT EXISTS daily_briefings (
+        user_id TEXT NOT NULL,
+        briefing_date TEXT NOT NULL,
+        timezone TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        generated_at TEXT NOT NULL,
+        PRIMARY KEY (user_id, briefing_date)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_daily_briefings_date ON daily_briefings(briefing_date)",
+    # Embedding index metadata; vectors live in per-partition memory-mapped files
+    """
+    CREATE TABLE IF NOT EXISTS vector_entries (
+        partition TEXT NOT NULL,
+        entry_key TEXT NOT NULL,
+        row INTEGER NOT NULL,
+        source_type TEXT NOT NULL,
+        source_id TEXT NOT NULL,
+        version TEXT,
+        text TEXT NOT NULL,
+        updated_at TEXT,
+        PRIMARY KEY (partition, entry_key)
+    )
+    """,
+    # Call sessions (write-through copy of the in-memory call registry)
+    """
+    CREATE TABLE IF NOT EXISTS call_sessions (
+        session_id TEXT PRIMARY KEY,
+        channel_name TEXT NOT NULL UNIQUE,
+        chat_room_id TEXT NOT NULL,
+        call_type TEXT NOT NULL,
+        status TEXT NOT NULL,
+        created_by TEXT NOT NULL,
+        participants TEXT NOT NULL,
+        active_participants TEXT NOT NULL,
+        message_id TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        expires_at TEXT NOT NULL,
+        ended_at TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_call_sessions_room ON call_sessions(chat_room_id, status)",
+    "CREATE INDEX IF NOT EXISTS idx_call_sessions_status ON call_sessions(status)",
+]
+
+# Columns added after local.db was first shipped: (table, column, definition)
+COLUMN_MIGRATIONS: List[Tuple[str, str, str]] = [
+    ("chat_messages", "thread_last_reply_at", "TEXT"),
+]
+
+# Idempotent data fixes run after the schema on every start
+BACKFILL_STATEMENTS: List[str] = [
+    # Inbox rows for memberships that predate chat_inbox (unread counts start at zero)
+    """
+    INSERT OR IGNORE INTO chat_inbox (
+        user_id, room_id, room_name, room_type, last_message_id,
+        last_message_at, last_message_preview, last_sender_name
+    )
+    SELECT p.user_id, c.id, c.name, c.type, c.last_message_id,
+           COALESCE(c.last_message_at, c.created_at), substr(m.content, 1, 120), m.sender_name
+    FROM chat_participants p
+    JOIN chats c ON c.id = p.chat_id
+    LEFT JOIN chat_messages m ON m.id = c.last_message_id
+    """,
+]
+
+
+class Database:
+    """Thin wrapper around a shared SQLite connection"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        schema: Optional[List[str]] = None,
+        migrations: Optional[List[Tuple[str, str, str]]] = None,
+        backfills: Optional[List[str]] = None,
+    ):
+        self.path = path or settings.LOCAL_DB_PATH
+        self.schema = SCHEMA_STATEMENTS if schema is None else schema
+        self.migrations = COLUMN_MIGRATIONS if migrations is None else migrations
+        self.backfills = BACKFILL_STATEMENTS if backfills is None else backfills
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Get (and lazily open) the SQLite connection"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        return self._conn
+
+    def initialize(self) -> None:
+        """Create any missing tables and indexes, then run the backfills"""
+        if self._initialized:
+            return
+        with self._lock:
+            for statement in self.schema:
+                self.conn.execute(statement)
+            for table, column, definition in self.migrations:
+                existing = {row["name"] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            for statement in self.backfills:
+                self.conn.execute(statement)
+            self.conn.commit()
+        self._initialized = True
+
+    def execute(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run fn against the connection inside a transaction"""
+        self.initialize()
+        with self._lock:
+            try:
+                result = fn(self.conn)
+                self.conn.commit()
+                return result
+            except Exception:
+                self.conn.rollback()
+                raise
+
+    async def run(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run fn in a worker thread so the event loop is never blocked"""
+        return await asyncio.to_thread(self.execute, fn)
+
+    def close(self) -> None:
+        """Close the connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        self._initialized = False
+
+
+# Global database instance
+database = Database()
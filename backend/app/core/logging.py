@@ -0,0 +1,188 @@
+"""
+Structured logging for lifeOS backend
+Records are queued without blocking and written as JSON lines by a background thread
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import queue
+import random
+import sys
+import traceback
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+LOGS_DROPPED = metrics.counter("log_records_dropped_total", "Log records not written, by reason")
+_SAMPLED_OUT = LOGS_DROPPED.labels(reason="sampled")
+_QUEUE_FULL = LOGS_DROPPED.labels(reason="queue_full")
+
+# Request ID for the current request (set by RequestIdMiddleware, copied into background tasks)
+request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+# Libraries that log every request at INFO (the provider HTTP client pool); WARNING and up only
+QUIET_LOGGERS = ("httpx", "httpcore")
+
+# LogRecord attributes that are not caller-supplied `extra` fields
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "request_id", "sample_rate",
+}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, request_id and any `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if getattr(record, "sample_rate", 1.0) < 1.0:
+            entry["sample_rate"] = record.sample_rate
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable single lines for local development"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s%(request)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.request = f" [{record.request_id}]" if getattr(record, "request_id", None) else ""
+        return super().format(record)
+
+
+class SamplingLogger(logging.Logger):
+    """
+    Logger that keeps a fraction of DEBUG records (high-volume events such as
+    mock calls), deciding before a record is built so dropped events cost
+    almost nothing. Kept records carry sample_rate so counts can be scaled
+    back up. A call can pass its own rate via extra={"sample_rate": ...}.
+    """
+
+    debug_sample_rate = 1.0
+
+    def findCaller(self, stack_info=False, stacklevel=1):
+        # The stack walk is the largest cost of building a record, and neither
+        # formatter prints file or line; exceptions still carry full tracebacks
+        return "(unknown file)", 0, "(unknown function)", None
+
+    def debug(self, msg, *args, **kwargs):
+        if not self.isEnabledFor(logging.DEBUG):
+            return
+        extra = kwargs.get("extra") or {}
+        rate = extra.get("sample_rate", self.debug_sample_rate)
+        if rate < 1.0:
+            if random.random() >= rate:
+                _SAMPLED_OUT.inc()
+                return
+            kwargs["extra"] = {**extra, "sample_rate": rate}
+        self._log(logging.DEBUG, msg, args, **kwargs)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Module logger with DEBUG sampling; use as `logger = get_logger(__name__)`"""
+    manager = logging.Logger.manager
+    previous = manager.loggerClass
+    manager.setLoggerClass(SamplingLogger)
+    try:
+        return logging.getLogger(name)
+    finally:
+        manager.loggerClass = previous
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread. The calling thread only resolves the
+    message and captures the request ID; formatting and I/O happen in the
+    listener. When the queue is full the record is dropped and counted rather
+    than stalling the event loop.
+    """
+
+    def __init__(self, maxsize: int):
+        # SimpleQueue's put takes no Python-level lock (unlike queue.Queue); bound it by hand
+        super().__init__(queue.SimpleQueue())
+        self.maxsize = maxsize
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = request_id.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.queue.qsize() >= self.maxsize:
+            _QUEUE_FULL.inc()
+            return
+        self.queue.put_nowait(record)
+
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(
+    level: Optional[str] = None,
+    format: Optional[str] = None,
+    debug_sample_rate: Optional[float] = None,
+    queue_size: Optional[int] = None,
+    stream=None,
+) -> QueueListener:
+    """
+    Route the root logger through a bounded queue to a single writer thread.
+    Safe to call again (e.g. in tests or tools); the previous listener is flushed first.
+    """
+    global _listener
+    shutdown_logging()
+
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(TextFormatter() if (format or settings.LOG_FORMAT) == "text" else JSONFormatter())
+
+    handler = NonBlockingQueueHandler(queue_size or settings.LOG_QUEUE_SIZE)
+    SamplingLogger.debug_sample_rate = (
+        settings.LOG_DEBUG_SAMPLE_RATE if debug_sample_rate is None else debug_sample_rate
+    )
+    # Records are built on the request path; skip fields the formatters never print
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if isinstance(h, NonBlockingQueueHandler)]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel((level or settings.LOG_LEVEL).upper())
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    _listener = QueueListener(handler.queue, writer, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Stop the writer thread after it drains the queue"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
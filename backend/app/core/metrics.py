@@ -0,0 +1,217 @@
+"""
+In-process metrics for lifeOS backend
+Counters, gauges and histograms shared by services and middleware
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Latency buckets in seconds (upper bounds; +Inf is implicit)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    if not labels:
+        return ()
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+class Metric:
+    """Base class for named metrics with optional labels"""
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+
+
+class BoundMetric:
+    """A metric with its labels resolved once, for hot paths (e.g. per-request middleware)"""
+    __slots__ = ("_metric", "_key")
+
+    def __init__(self, metric: Metric, key: LabelKey):
+        self._metric = metric
+        self._key = key
+
+    # Bodies repeat Counter._inc / Histogram._observe to save a call per update
+    def inc(self, amount: float = 1.0):
+        metric = self._metric
+        with metric._lock:
+            metric._values[self._key] = metric._values.get(self._key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def observe(self, value: float):
+        metric = self._metric
+        index = bisect_left(metric.buckets, value)
+        with metric._lock:
+            counts = metric._counts.get(self._key)
+            if counts is None:
+                counts = metric._counts[self._key] = [0] * (len(metric.buckets) + 1)
+                metric._sums[self._key] = 0.0
+            counts[index] += 1
+            metric._sums[self._key] += value
+
+
+class Counter(Metric):
+    """Monotonically increasing value"""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str = ""):
+        super().__init__(name, help)
+        self._values: Dict[LabelKey, float] = {}
+
+    def labels(self, **labels) -> BoundMetric:
+        return BoundMetric(self, _label_key(labels))
+
+    def inc(self, amount: float = 1.0, **labels):
+        self._inc(_label_key(labels), amount)
+
+    def _inc(self, key: LabelKey, amount: float):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[LabelKey, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """Bucketed distribution of observed values"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., +Inf count], sum
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+
+    def labels(self, **labels) -> BoundMetric:
+        return BoundMetric(self, _label_key(labels))
+
+    def observe(self, value: float, **labels):
+        self._observe(_label_key(labels), value)
+
+    def _observe(self, key: LabelKey, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(_label_key(labels), ()))
+
+    def sum(self, **labels) -> float:
+        return self._sums.get(_label_key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[LabelKey, List[int], float]]:
+        with self._lock:
+            return [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+
+
+class MetricsRegistry:
+    """Get-or-create registry so modules can declare metrics at import time"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help: str, **kwargs) -> Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {name} already registered as {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help)
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, help)
+
+    def histogram(self, name: str, help: str = "", buckets: Optional[Sequence[float]] = None) -> Histogram:
+        return self._get_or_create(Histogram, name, help, buckets=buckets or DEFAULT_BUCKETS)
+
+    def all(self) -> List[Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        for metric in sorted(self.all(), key=lambda m: m.name):
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {_escape_help(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if isinstance(metric, Histogram):
+                for key, counts, total in metric.samples():
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets + (math.inf,), counts):
+                        cumulative += count
+                        lines.append(f"{metric.name}_bucket{_format_labels(key, le=bound)} {cumulative}")
+                    lines.append(f"{metric.name}_sum{_format_labels(key)} {_format_value(total)}")
+                    lines.append(f"{metric.name}_count{_format_labels(key)} {cumulative}")
+            else:
+                for key, value in metric.samples():
+                    lines.append(f"{metric.name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(key: LabelKey, le: Optional[float] = None) -> str:
+    pairs = list(key)
+    if le is not None:
+        pairs.append(("le", _format_value(le)))
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
@@ -0,0 +1,304 @@
+"""
+ASGI middleware for lifeOS backend
+"""
+
+import re
+import time
+import uuid
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+from app.core.config import settings
+from app.core.logging import request_id
+from app.core.metrics import BoundMetric, MetricsRegistry, metrics
+
+UNMATCHED_ROUTE = "unmatched"
+
+REQUEST_ID_HEADER = b"x-request-id"
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+
+class MetricsMiddleware:
+    """
+    Records per-route, per-status request latency and in-flight requests.
+    Routes are labelled by their path template (e.g. /api/v1/chat/threads/{thread_id}),
+    never the raw path, so label cardinality stays bounded. Bound label sets
+    are cached, keeping the per-request cost to a few microseconds.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.latency = registry.histogram(
+            "http_request_duration_seconds", "HTTP request latency by method, route and status"
+        )
+        self.in_flight = registry.gauge("http_requests_in_flight", "HTTP requests currently being served")
+        self.exceptions = registry.counter(
+            "http_request_exceptions_total", "Unhandled exceptions raised while serving HTTP requests"
+        )
+        self._in_flight = self.in_flight.labels()
+        self._bound: Dict[Tuple[str, Any, int], BoundMetric] = {}  # (method, endpoint, status)
+        self._routes: Dict[Any, str] = {}  # endpoint -> path template
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        route = self._routes.get(endpoint)
+        if route is None:
+            route = UNMATCHED_ROUTE
+            router = scope.get("router") or getattr(scope.get("app"), "router", None)
+            for candidate in getattr(router, "routes", ()):
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    route = candidate.path
+                    break
+            self._routes[endpoint] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self._in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            self.exceptions.inc(route=self._route(scope))
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self._in_flight.dec()
+            key = (scope["method"], scope.get("endpoint"), status_code)
+            bound = self._bound.get(key)
+            if bound is None:
+                bound = self._bound[key] = self.latency.labels(
+                    method=key[0], route=self._route(scope), status=status_code
+                )
+            bound.observe(elapsed)
+
+
+class RequestIdMiddleware:
+    """
+    Gives every HTTP request and WebSocket connection an ID, available to log
+    records via the request_id context variable and echoed as X-Request-ID.
+    A well-formed X-Request-ID from the client (or a proxy) is kept.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        current = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                candidate = value.decode("latin-1")
+                if _VALID_REQUEST_ID.fullmatch(candidate):
+                    current = candidate
+                break
+        current = current or uuid.uuid4().hex
+        header = (REQUEST_ID_HEADER, current.encode())
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", ()), header]}
+            await send(message)
+
+        token = request_id.set(current)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id.reset(token)
+
+
+# Server preference when the client rates encodings equally
+_ENCODINGS = ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+_COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/javascript", "application/xml",
+    "application/x-ndjson", "image/svg+xml",
+)
+
+COMPRESSION_BYTES_IN = metrics.counter("http_compression_bytes_in_total", "Response bytes before compression, by encoding")
+COMPRESSION_BYTES_OUT = metrics.counter("http_compression_bytes_out_total", "Response bytes after compression, by encoding")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported encoding for an Accept-Encoding header (q-values honoured), or None"""
+    ratings: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        ratings[name.strip()] = quality
+    wildcard = ratings.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in _ENCODINGS:
+        quality = ratings.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return content_type.startswith(_COMPRESSIBLE_TYPES) or content_type.split(";", 1)[0].endswith("+json")
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._zlib = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._zlib.compress(data)
+
+    def flush(self) -> bytes:
+        return self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._zlib.flush()
+
+
+class _BrotliStream:
+    def __init__(self, quality: int):
+        self._brotli = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._brotli.process(data)
+
+    def flush(self) -> bytes:
+        return self._brotli.flush()
+
+    def finish(self) -> bytes:
+        return self._brotli.finish()
+
+
+class CompressionMiddleware:
+    """
+    Negotiated gzip/brotli response compression.
+    Single-chunk bodies under minimum_size, non-text content types and already
+    encoded responses pass through. Streamed bodies (SSE, NDJSON) are compressed
+    chunk by chunk with a flush after each, so clients receive every event as
+    it is produced instead of when the compressor's buffer fills.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: Optional[int] = None,
+        gzip_level: Optional[int] = None,
+        brotli_quality: Optional[int] = None,
+        compress_streams: Optional[bool] = None,
+    ):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+        self.gzip_level = gzip_level or settings.COMPRESSION_GZIP_LEVEL
+        self.brotli_quality = brotli_quality or settings.COMPRESSION_BROTLI_QUALITY
+        self.compress_streams = settings.COMPRESSION_STREAMING if compress_streams is None else compress_streams
+        self._negotiated: Dict[str, Optional[str]] = {}  # Accept-Encoding value -> encoding
+
+    def _encoding(self, scope) -> Optional[str]:
+        accept = Headers(scope=scope).get("accept-encoding")
+        if not accept:
+            return None
+        encoding = self._negotiated.get(accept, "")
+        if encoding == "":
+            encoding = negotiate_encoding(accept)
+            if len(self._negotiated) < 1024:  # Clients send a handful of distinct values
+                self._negotiated[accept] = encoding
+        return encoding
+
+    def _stream(self, encoding: str):
+        return _BrotliStream(self.brotli_quality) if encoding == "br" else _GzipStream(self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        stream = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, stream, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                if (
+                    "content-encoding" in headers
+                    or message["status"] in (204, 304)
+                    or not _compressible(headers.get("content-type", ""))
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Hold the start until the first body chunk shows whether this is a stream
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if stream is None:
+                headers = MutableHeaders(scope=start_message)
+                headers.add_vary_header("Accept-Encoding")
+                if (not more_body and len(body) < self.minimum_size) or (more_body and not self.compress_streams):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                stream = self._stream(encoding)
+                headers["Content-Encoding"] = encoding
+                if not more_body:
+                    compressed = stream.compress(body) + stream.finish()
+                    headers["Content-Length"] = str(len(compressed))
+                    COMPRESSION_BYTES_IN.inc(len(body), encoding=encoding)
+                    COMPRESSION_BYTES_OUT.inc(len(compressed), encoding=encoding)
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                del headers["Content-Length"]
+                await send(start_message)
+
+            chunk = stream.compress(body) + (stream.flush() if more_body else stream.finish())
+            COMPRESSION_BYTES_IN.inc(len(body), encoding=encoding)
+            COMPRESSION_BYTES_OUT.inc(len(chunk), encoding=encoding)
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
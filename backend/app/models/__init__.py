@@ -6,9 +6,10 @@ from .user import User, UserProfile
 from .team import Team, TeamMember
 from .project import Project, ProjectMember
 from .task import Task, TaskAssignment
-from .chat import ChatRoom, ChatMessage
+from .chat import ChatRoom, ChatMessage, ChatInboxEntry
 from .document import Document, DocumentVersion
 from .goal import Goal, KeyResult
+from .call import CallSession, CallStatus
 
 __all__ = [
     "User",
@@ -21,8 +22,11 @@ __all__ = [
     "TaskAssignment",
     "ChatRoom",
     "ChatMessage",
+    "ChatInboxEntry",
     "Document",
     "DocumentVersion",
     "Goal",
     "KeyResult",
+    "CallSession",
+    "CallStatus",
 ]
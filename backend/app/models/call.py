@@ -0,0 +1,58 @@
+"""
+Call session models for lifeOS backend
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+from enum import Enum
+
+
+class CallStatus(str, Enum):
+    """Call session status enumeration"""
+    ACTIVE = "active"
+    ENDED = "ended"
+    FAILED = "failed"
+
+
+class CallSession(BaseModel):
+    """An Agora call started from a chat room"""
+    session_id: str
+    channel_name: str
+    chat_room_id: str
+    call_type: str = "video"  # "video" or "voice"
+    status: CallStatus = CallStatus.ACTIVE
+    created_by: str
+
+    # Everyone who has joined, and who is in the call right now
+    participants: List[str] = Field(default_factory=list)
+    active_participants: List[str] = Field(default_factory=list)
+
+    # The call message posted to the chat room
+    message_id: Optional[str] = None
+
+    # Lifecycle
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime
+    ended_at: Optional[datetime] = None
+
+    class Config:
+        """Pydantic configuration"""
+        json_encoders = {
+            datetime: lambda v: v.isoformat()
+        }
+
+    def to_payload(self) -> Dict:
+        """Convert to a JSON-safe dict (API responses and realtime events)"""
+        data = self.dict()
+        for field in ('created_at', 'updated_at', 'expires_at', 'ended_at'):
+            if data.get(field):
+                data[field] = data[field].isoformat()
+        return data
+
+    @property
+    def duration(self) -> int:
+        """Call length in whole seconds (so far, if still active)"""
+        end = self.ended_at or datetime.utcnow()
+        return max(0, int((end - self.created_at).total_seconds()))
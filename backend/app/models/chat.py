@@ -24,6 +24,7 @@ class MessageType(str, Enum):
     IMAGE = "image"
     SYSTEM = "system"  # System-generated messages
     AI_RESPONSE = "ai_response"  # AI assistant responses
+    CALL = "call"  # Call started in the room; call_* fields track its lifecycle
 
 
 class ChatMessage(BaseModel):
@@ -31,10 +32,12 @@ class ChatMessage(BaseModel):
     id: str
     content: str
     message_type: MessageType = MessageType.TEXT
+    room_id: Optional[str] = None
     
     # Sender information
     sender_id: str
     sender_name: str  # Cached for performance
+    sender_avatar: Optional[str] = None
     
     # File attachments (for file/image messages)
     file_url: Optional[str] = None
@@ -49,6 +52,7 @@ class ChatMessage(BaseModel):
     # Threading
     reply_to_id: Optional[str] = None  # For threaded conversations
     thread_count: int = 0  # Number of replies
+    thread_last_reply_at: Optional[datetime] = None
     
     # Reactions and interactions
     reactions: Dict[str, List[str]] = Field(default_factory=dict)  # emoji -> [user_ids]
@@ -56,6 +60,27 @@ class ChatMessage(BaseModel):
     
     # AI context (for AI responses)
     ai_context: Optional[Dict] = None
+    
+    # Call details (for call messages)
+    call_type: Optional[str] = None
+    call_status: Optional[str] = None
+    call_duration: Optional[int] = None  # Seconds
+    call_participants: List[str] = Field(default_factory=list)
+
+
+class ChatInboxEntry(BaseModel):
+    """Per-user inbox row, maintained incrementally on message ingestion"""
+    room_id: str
+    room_name: Optional[str] = None
+    room_type: ChatRoomType = ChatRoomType.DIRECT
+    
+    # Last message preview
+    last_message_id: Optional[str] = None
+    last_message_at: datetime
+    last_message_preview: Optional[str] = None
+    last_sender_name: Optional[str] = None
+    
+    unread_count: int = 0
 
 
 class ChatRoom(BaseModel):
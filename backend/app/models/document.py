@@ -82,6 +82,7 @@ class Document(BaseModel):
     # AI interaction
     ai_summary: Optional[str] = None
     ai_last_updated: Optional[datetime] = None
+    ai_summary_version: Optional[int] = None  # current_version the summary was written from
     is_ai_editable: bool = True  # Whether AI can edit this document
     
     # Access control
@@ -5,9 +5,31 @@ Services for lifeOS backend
 from .firebase_service import FirebaseService
 from .auth_service import AuthService
 from .ai_service import AIService
+from .realtime_service import RealtimeService
+from .presence_service import PresenceService
+from .chat_service import ChatService
+from .message_processor import MessageProcessor
+from .propagation_service import PropagationService
+from .summary_worker import SummaryWorker
+from .vector_index import VectorIndex
+from .briefing_service import BriefingService
+from .http_client import HTTPClientPool
+from .agora_service import AgoraService
+from .call_registry import CallRegistry
 
 __all__ = [
     "FirebaseService",
     "AuthService", 
     "AIService",
+    "RealtimeService",
+    "PresenceService",
+    "ChatService",
+    "MessageProcessor",
+    "PropagationService",
+    "SummaryWorker",
+    "VectorIndex",
+    "BriefingService",
+    "HTTPClientPool",
+    "AgoraService",
+    "CallRegistry",
 ]
@@ -0,0 +1,170 @@
+"""
+Streaming helpers for action-item extraction over long transcripts
+Token-bounded overlapping chunking and de-duplicating merge of extracted items
+"""
+
+import re
+from typing import AsyncIterable, AsyncIterator, Dict, FrozenSet, List, Optional, Tuple
+
+from app.services.context_builder import TokenCounter
+
+# Sentence or line boundaries; chunks never split inside a sentence unless it alone exceeds the budget
+_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_NUMBER = re.compile(r"\d+")
+
+PRIORITY_RANK = {"low": 0, "medium": 1, "high": 2, "urgent": 3}
+# Jaccard over word bigrams at or above which two items are the same; only
+# near-identical wording (one extra or changed word in a long item) merges
+SIMILARITY_THRESHOLD = 0.95
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in _BOUNDARY.split(text) if sentence.strip()]
+
+
+async def chunk_text_stream(
+    text_stream: AsyncIterable[str],
+    tokens: TokenCounter,
+    chunk_tokens: int,
+    overlap_tokens: int,
+) -> AsyncIterator[str]:
+    """
+    Re-chunk an arbitrary text stream into chunks of at most chunk_tokens.
+    Each chunk repeats up to overlap_tokens of trailing sentences from the
+    previous one so items spanning a boundary are seen whole at least once.
+    Only the current chunk and an unfinished sentence are held in memory.
+    """
+    units: List[Tuple[str, int]] = []  # (sentence, tokens) in the current chunk
+    used = 0
+    fresh = False  # Whether units holds anything not yet emitted
+    pending = ""
+    max_pending_chars = chunk_tokens * 8  # Force a break in text with no boundaries
+
+    def sentence_units(sentence: str) -> List[Tuple[str, int]]:
+        cost = tokens.count(sentence) + 1
+        if cost <= chunk_tokens:
+            return [(sentence, cost)]
+        # A single over-long sentence is split on words
+        pieces, words, words_cost = [], [], 0
+        for word in sentence.split():
+            word_cost = tokens.count(" " + word)
+            if words and words_cost + word_cost + 1 > chunk_tokens:
+                pieces.append((" ".join(words), words_cost + 1))
+                words, words_cost = [], 0
+            words.append(word)
+            words_cost += word_cost
+        if words:
+            pieces.append((" ".join(words), words_cost + 1))
+        return pieces
+
+    def push(unit: Tuple[str, int]) -> Optional[str]:
+        nonlocal units, used, fresh
+        emitted = None
+        if units and used + unit[1] > chunk_tokens:
+            emitted = " ".join(text for text, _ in units) if fresh else None
+            # Carry trailing sentences forward as overlap
+            carried, carried_tokens = [], 0
+            for text, cost in reversed(units):
+                if carried_tokens + cost > min(overlap_tokens, chunk_tokens - unit[1]):
+                    break
+                carried.insert(0, (text, cost))
+                carried_tokens += cost
+            units, used = carried, carried_tokens
+        units.append(unit)
+        used += unit[1]
+        fresh = True
+        return emitted
+
+    def feed(sentence: str) -> List[str]:
+        sentence = sentence.strip()
+        if not sentence:
+            return []
+        return [chunk for chunk in map(push, sentence_units(sentence)) if chunk]
+
+    async for piece in text_stream:
+        pending += piece
+        parts = _BOUNDARY.split(pending)
+        pending = parts.pop()
+        if len(pending) > max_pending_chars:
+            head, _, pending = pending.rpartition(" ")
+            parts.append(head)
+        for sentence in parts:
+            for chunk in feed(sentence):
+                yield chunk
+
+    for chunk in feed(pending):
+        yield chunk
+    if units and fresh:
+        yield " ".join(text for text, _ in units)
+
+
+class ActionItemMerger:
+    """
+    Accumulates items from many chunks, folding repeats of the same item
+    (chunk overlap re-extracts items near a boundary). Items merge only when
+    their normalized text is equal or near-identical, and never when their
+    numbers, assignees or due dates differ.
+    """
+
+    def __init__(self, similarity_threshold: float = SIMILARITY_THRESHOLD):
+        self.similarity_threshold = similarity_threshold
+        self.items: List[Dict] = []
+        self._keys: Dict[str, int] = {}
+        # Numbers in the text -> (item index, word bigrams); only these can be near-duplicates
+        self._candidates: Dict[Tuple[str, ...], List[Tuple[int, FrozenSet[Tuple[str, ...]]]]] = {}
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return _NON_WORD.sub(" ", text.lower()).strip()
+
+    @staticmethod
+    def shingles(key: str) -> FrozenSet[Tuple[str, ...]]:
+        words = key.split()
+        return frozenset(zip(words, words[1:])) if len(words) > 1 else frozenset([tuple(words)])
+
+    @staticmethod
+    def _conflicts(existing: Dict, item: Dict) -> bool:
+        for field in ("assignee", "due_date"):
+            ours, theirs = existing.get(field), item.get(field)
+            if ours and theirs and str(ours).strip().lower() != str(theirs).strip().lower():
+                return True
+        return False
+
+    def _find(self, item: Dict, key: str, numbers: Tuple[str, ...], shingles: FrozenSet) -> Optional[int]:
+        index = self._keys.get(key)
+        if index is not None and not self._conflicts(self.items[index], item):
+            return index
+        for i, existing in self._candidates.get(numbers, []):
+            if (
+                len(shingles & existing) / len(shingles | existing) >= self.similarity_threshold
+                and not self._conflicts(self.items[i], item)
+            ):
+                return i
+        return None
+
+    def add(self, items: List[Dict]) -> List[Dict]:
+        """Merge items in; return those that were new"""
+        added = []
+        for item in items:
+            key = self.normalize(item.get("text", ""))
+            if not key:
+                continue
+            numbers = tuple(_NUMBER.findall(key))
+            shingles = self.shingles(key)
+            index = self._find(item, key, numbers, shingles)
+            if index is None:
+                self._keys.setdefault(key, len(self.items))
+                self._candidates.setdefault(numbers, []).append((len(self.items), shingles))
+                merged = dict(item)
+                self.items.append(merged)
+                added.append(merged)
+                continue
+
+            existing = self.items[index]
+            for field in ("assignee", "due_date"):
+                if not existing.get(field) and item.get(field):
+                    existing[field] = item[field]
+            if PRIORITY_RANK.get(item.get("priority"), 0) > PRIORITY_RANK.get(existing.get("priority"), 0):
+                existing["priority"] = item["priority"]
+        return added
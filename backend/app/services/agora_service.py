@@ -0,0 +1,233 @@
+"""
+Agora RTC token issuance for lifeOS backend
+Signed tokens are cached per (channel, uid, role) and re-signed only near expiry
+"""
+
+import asyncio
+import hashlib
+import hmac
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from agora_token_builder import RtcTokenBuilder
+from agora_token_builder.RtcTokenBuilder import Role_Attendee, Role_Publisher
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+AGORA_TOKEN_CACHE_HITS = metrics.counter("agora_token_cache_hits_total", "Agora tokens served from the cache")
+AGORA_TOKEN_CACHE_MISSES = metrics.counter(
+    "agora_token_cache_misses_total", "Agora tokens signed, by reason (absent or refresh)"
+)
+AGORA_TOKEN_CACHE_EVICTIONS = metrics.counter(
+    "agora_token_cache_evictions_total", "Cached Agora tokens evicted to stay within the size bound"
+)
+AGORA_TOKEN_CACHE_SIZE = metrics.gauge("agora_token_cache_size", "Agora tokens currently cached")
+
+
+def normalize_role(role: Optional[str]) -> str:
+    return "publisher" if (role or "publisher").lower() == "publisher" else "attendee"
+
+
+def sign_webhook(body: bytes, secret: str) -> str:
+    """Agora-Signature-V2 value for a notification body (hex HMAC-SHA256)"""
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def uid_for_user(user_id: str) -> int:
+    """Stable 32-bit Agora uid for a user id (its leading hex digits, else a CRC of the id)"""
+    if not user_id:
+        return 0
+    try:
+        return int(user_id[:8], 16)
+    except ValueError:
+        return zlib.crc32(user_id.encode()) & 0x7FFFFFFF
+
+
+class AgoraToken(BaseModel):
+    """A signed RTC token and its validity window (unix seconds)"""
+    token: str
+    channel_name: str
+    uid: int
+    role: str
+    issued_at: int
+    expires_at: int
+
+
+class AgoraService:
+    """Signs Agora RTC tokens behind a bounded LRU cache"""
+
+    def __init__(
+        self,
+        app_id: Optional[str] = None,
+        app_certificate: Optional[str] = None,
+        cache_size: Optional[int] = None,
+        refresh_ratio: Optional[float] = None,
+        signing_workers: Optional[int] = None,
+    ):
+        self.app_id = settings.AGORA_APP_ID if app_id is None else app_id
+        self.app_certificate = settings.AGORA_APP_CERTIFICATE if app_certificate is None else app_certificate
+        self.cache_size = cache_size or settings.AGORA_TOKEN_CACHE_SIZE
+        self.refresh_ratio = settings.AGORA_TOKEN_REFRESH_RATIO if refresh_ratio is None else refresh_ratio
+        self.signing_workers = signing_workers or settings.AGORA_SIGNING_WORKERS
+        self.webhook_secret = settings.AGORA_WEBHOOK_SECRET
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self._tokens: "OrderedDict[Tuple[str, int, str], AgoraToken]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.app_id and self.app_certificate)
+
+    def verify_webhook(self, body: bytes, signature_v2: Optional[str], signature: Optional[str] = None) -> bool:
+        """Check a notification's Agora-Signature-V2 (HMAC-SHA256) or legacy Agora-Signature (HMAC-SHA1)"""
+        if not self.webhook_secret:
+            return False
+        if signature_v2:
+            return hmac.compare_digest(sign_webhook(body, self.webhook_secret), signature_v2)
+        if signature:
+            expected = hmac.new(self.webhook_secret.encode(), body, hashlib.sha1).hexdigest()
+            return hmac.compare_digest(expected, signature)
+        return False
+
+    def build_token(self, channel_name: str, uid: int, role: str, expires_at: int) -> str:
+        """Sign a token without touching the cache (HMAC; safe to call from worker threads)"""
+        return RtcTokenBuilder.buildTokenWithUid(
+            self.app_id,
+            self.app_certificate,
+            channel_name,
+            uid,
+            Role_Publisher if normalize_role(role) == "publisher" else Role_Attendee,
+            expires_at,
+        )
+
+    def lookup(
+        self,
+        channel_name: str,
+        uid: int,
+        role: Optional[str],
+        expiry_time: int,
+        now: Optional[int] = None,
+    ) -> Optional[AgoraToken]:
+        """
+        The cached token if at least refresh_ratio of the requested lifetime is
+        left on it; otherwise None and the caller should sign a new one.
+        """
+        now = int(time.time()) if now is None else now
+        key = (channel_name, uid, normalize_role(role))
+        cached = self._tokens.get(key)
+        if cached is not None and cached.expires_at - now >= expiry_time * self.refresh_ratio:
+            self._tokens.move_to_end(key)
+            self.hits += 1
+            AGORA_TOKEN_CACHE_HITS.inc()
+            return cached
+
+        self.misses += 1
+        AGORA_TOKEN_CACHE_MISSES.inc(reason="refresh" if cached is not None else "absent")
+        return None
+
+    def store(self, token: AgoraToken):
+        key = (token.channel_name, token.uid, token.role)
+        self._tokens[key] = token
+        self._tokens.move_to_end(key)
+        while len(self._tokens) > self.cache_size:
+            self._tokens.popitem(last=False)
+            AGORA_TOKEN_CACHE_EVICTIONS.inc()
+        AGORA_TOKEN_CACHE_SIZE.set(len(self._tokens))
+
+    def issue_token(
+        self,
+        channel_name: str,
+        uid: int = 0,
+        role: Optional[str] = "publisher",
+        expiry_time: int = 86400,
+        now: Optional[int] = None,
+    ) -> AgoraToken:
+        """A token valid for roughly expiry_time seconds, reusing a cached one when possible"""
+        now = int(time.time()) if now is None else now
+        cached = self.lookup(channel_name, uid, role, expiry_time, now)
+        if cached is not None:
+            return cached
+
+        role = normalize_role(role)
+        expires_at = now + expiry_time
+        token = AgoraToken(
+            token=self.build_token(channel_name, uid, role, expires_at),
+            channel_name=channel_name,
+            uid=uid,
+            role=role,
+            issued_at=now,
+            expires_at=expires_at,
+        )
+        self.store(token)
+        return token
+
+    async def issue_tokens(
+        self,
+        channel_name: str,
+        uids: List[int],
+        role: Optional[str] = "publisher",
+        expiry_time: int = 86400,
+    ) -> List[AgoraToken]:
+        """
+        Tokens for many uids on one channel, in uid order.
+        Cached tokens are reused; the rest are signed concurrently on the
+        signing thread pool so a large group never blocks the event loop.
+        """
+        now = int(time.time())
+        tokens = [self.lookup(channel_name, uid, role, expiry_time, now) for uid in uids]
+        missing = [i for i, token in enumerate(tokens) if token is None]
+        if not missing:
+            return tokens
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.signing_workers, thread_name_prefix="agora-sign")
+        role = normalize_role(role)
+        expires_at = now + expiry_time
+        loop = asyncio.get_running_loop()
+        signed = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, self.build_token, channel_name, uids[i], role, expires_at)
+            for i in missing
+        ))
+        for i, signature in zip(missing, signed):
+            tokens[i] = AgoraToken(
+                token=signature,
+                channel_name=channel_name,
+                uid=uids[i],
+                role=role,
+                issued_at=now,
+                expires_at=expires_at,
+            )
+            self.store(tokens[i])
+        return tokens
+
+    def close(self):
+        """Shut down the signing pool (application shutdown)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def invalidate_channel(self, channel_name: str):
+        """Forget every cached token for a channel (e.g. when its call ends)"""
+        for key in [key for key in self._tokens if key[0] == channel_name]:
+            del self._tokens[key]
+        AGORA_TOKEN_CACHE_SIZE.set(len(self._tokens))
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._tokens),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Global Agora service instance
+agora_service = AgoraService()
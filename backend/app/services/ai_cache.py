@@ -0,0 +1,192 @@
+"""
+AI response cache for lifeOS backend
+Size-bounded in-memory LRU with an optional SQLite tier
+"""
+
+import copy
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.database import Database
+from app.core.metrics import metrics
+
+AI_CACHE_HITS = metrics.counter("ai_cache_hits_total", "AI response cache hits")
+AI_CACHE_MISSES = metrics.counter("ai_cache_misses_total", "AI response cache misses")
+
+# Seconds each AIService method's results stay fresh; 0 disables caching
+DEFAULT_TTLS: Dict[str, int] = {
+    "summarize_content": 24 * 3600,
+    "classify_content": 7 * 24 * 3600,
+    "suggest_document_improvements": 24 * 3600,
+}
+
+CACHE_SCHEMA: List[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS ai_cache (
+        key TEXT PRIMARY KEY,
+        method TEXT NOT NULL,
+        value TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        source_id TEXT,
+        source_version INTEGER
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_ai_cache_source ON ai_cache(source_id)",
+]
+
+# Sentinel for cache misses (None is a valid cached value)
+MISS = object()
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so formatting-only differences share a cache entry"""
+    return " ".join(prompt.split())
+
+
+class AIResponseCache:
+    """Two-tier cache of AI results keyed by model, normalized prompt and context"""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        db_path: Optional[str] = None,
+        ttls: Optional[Dict[str, int]] = None,
+    ):
+        self.max_entries = max_entries or settings.AI_CACHE_MAX_ENTRIES
+        db_path = db_path if db_path is not None else settings.AI_CACHE_DB_PATH
+        self.db = Database(db_path, schema=CACHE_SCHEMA, migrations=[], backfills=[]) if db_path else None
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+
+        # key -> (expires_at, value, source_id)
+        self._entries: "OrderedDict[str, Tuple[float, Any, Optional[str]]]" = OrderedDict()
+        self._source_keys: Dict[str, Set[str]] = {}
+        # Latest version seen per source, LRU-bounded like the entries themselves
+        self._source_versions: "OrderedDict[str, int]" = OrderedDict()
+
+    def ttl_for(self, method: str) -> int:
+        return self.ttls.get(method, 0)
+
+    @staticmethod
+    def make_key(
+        method: str,
+        model: str,
+        prompt: str,
+        context: Optional[Dict] = None,
+        source_version: Optional[int] = None,
+    ) -> str:
+        """Hash of everything that determines the provider's answer"""
+        payload = json.dumps(
+            [method, model, normalize_prompt(prompt), context or {}, source_version],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Any:
+        """Return a private copy of the cached value, or MISS"""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                AI_CACHE_HITS.inc(tier="memory")
+                return copy.deepcopy(entry[1])
+            self._discard(key)
+
+        if self.db is not None:
+            row = await self.db.run(lambda conn: conn.execute(
+                "SELECT value, expires_at, source_id FROM ai_cache WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone())
+            if row is not None:
+                value = json.loads(row["value"])
+                self._remember(key, row["expires_at"], copy.deepcopy(value), row["source_id"])
+                AI_CACHE_HITS.inc(tier="disk")
+                return value
+
+        AI_CACHE_MISSES.inc()
+        return MISS
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: int,
+        method: str = "",
+        source_id: Optional[str] = None,
+        source_version: Optional[int] = None,
+    ):
+        """Store a value in memory and, if configured, on disk"""
+        expires_at = time.time() + ttl
+        # The memory tier keeps its own copy so callers can mutate what they were given
+        self._remember(key, expires_at, copy.deepcopy(value), source_id)
+
+        if self.db is not None:
+            encoded = json.dumps(value, default=str)
+            await self.db.run(lambda conn: conn.execute(
+                """
+                INSERT OR REPLACE INTO ai_cache (key, method, value, expires_at, source_id, source_version)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (key, method, encoded, expires_at, source_id, source_version),
+            ))
+
+    async def observe_version(self, source_id: str, version: int):
+        """Drop a source's entries once a newer version of it is seen"""
+        known = self._source_versions.get(source_id)
+        if known is not None:
+            self._source_versions.move_to_end(source_id)
+            if version <= known:
+                return
+        self._source_versions[source_id] = version
+        if len(self._source_versions) > self.max_entries:
+            self._source_versions.popitem(last=False)
+        # An unknown source (new, or evicted above) may still have older entries on disk or in memory
+        if known is not None or self.db is not None or source_id in self._source_keys:
+            await self.invalidate_source(source_id, keep_version=version)
+
+    async def invalidate_source(self, source_id: str, keep_version: Optional[int] = None):
+        """Remove all entries derived from a source (e.g. a document)"""
+        for key in list(self._source_keys.get(source_id, ())):
+            self._discard(key)
+
+        if self.db is not None:
+            if keep_version is None:
+                await self.db.run(lambda conn: conn.execute(
+                    "DELETE FROM ai_cache WHERE source_id = ?", (source_id,)
+                ))
+            else:
+                await self.db.run(lambda conn: conn.execute(
+                    "DELETE FROM ai_cache WHERE source_id = ? AND source_version IS NOT ?",
+                    (source_id, keep_version),
+                ))
+
+    def clear(self):
+        """Empty the in-memory tier"""
+        self._entries.clear()
+        self._source_keys.clear()
+        self._source_versions.clear()
+
+    def _remember(self, key: str, expires_at: float, value: Any, source_id: Optional[str]):
+        if key in self._entries:
+            self._discard(key)
+        self._entries[key] = (expires_at, value, source_id)
+        if source_id is not None:
+            self._source_keys.setdefault(source_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+
+    def _discard(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None or entry[2] is None:
+            return
+        keys = self._source_keys.get(entry[2])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._source_keys[entry[2]]
@@ -0,0 +1,217 @@
+"""
+Pluggable AI providers for AIService
+The mock provider answers instantly; the fake provider simulates a real one
+(latency, token streaming rate, errors and rate limiting) for offline load tests
+"""
+
+import asyncio
+import math
+import random
+import re
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from app.core.config import settings
+
+_TOKEN = re.compile(r"\S+\s*|\s+")
+_FILLER = (
+    "Here is a summary of the relevant context along with a few suggestions "
+    "for the next steps you could take on this work today. "
+).split(" ")
+
+
+class ProviderError(Exception):
+    """A provider call failed (the upstream equivalent of a 5xx)"""
+
+    def __init__(self, message: str, status_code: int = 500, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class ProviderRateLimited(ProviderError):
+    """The provider rejected the call with a rate-limit response (429)"""
+
+    def __init__(self, message: str = "Rate limit exceeded", retry_after: Optional[float] = None):
+        super().__init__(message, status_code=429, retry_after=retry_after)
+
+
+class LatencyDistribution:
+    """
+    Samples delays in seconds from a spec string:
+    "fixed:<s>", "uniform:<min>,<max>", "exponential:<mean>" or "lognormal:<median>,<sigma>"
+    """
+
+    KINDS = ("fixed", "uniform", "exponential", "lognormal")
+
+    def __init__(self, kind: str, *params: float):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        expected = 2 if kind in ("uniform", "lognormal") else 1
+        if len(params) != expected:
+            raise ValueError(f"{kind} latency takes {expected} parameter(s)")
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        kind, _, args = spec.partition(":")
+        return cls(kind.strip(), *(float(arg) for arg in args.split(",") if arg.strip()))
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "exponential":
+            return rng.expovariate(1 / self.params[0]) if self.params[0] > 0 else 0.0
+        median, sigma = self.params
+        return rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return f"{self.kind}:{','.join(str(p) for p in self.params)}"
+
+
+class AIProvider:
+    """
+    Interface AIService calls providers through.
+    stream() yields response tokens; run() wraps a structured (non-streaming)
+    call whose result is produced by compute.
+    """
+
+    name = "base"
+
+    def stream(self, prompt: str, context: Optional[Dict], model: str) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    async def run(self, method: str, prompt: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        raise NotImplementedError
+
+
+class MockProvider(AIProvider):
+    """Canned responses with no delay"""
+
+    name = "mock"
+
+    async def stream(self, prompt: str, context: Optional[Dict], model: str) -> AsyncIterator[str]:
+        for token in _TOKEN.findall(f"AI Response to: {prompt[:50]}..."):
+            await asyncio.sleep(0)
+            yield token
+
+    async def run(self, method: str, prompt: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        return await compute()
+
+
+class FakeProvider(MockProvider):
+    """
+    Mock responses delivered like a real provider would: after a sampled
+    time to first token, at a fixed streaming rate, with random errors and
+    429s, and with 429s whenever more than max_concurrency calls overlap.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency: str = "uniform:2,20",
+        tokens_per_second: float = 40.0,
+        response_tokens: int = 200,
+        error_rate: float = 0.0,
+        stream_error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        max_concurrency: Optional[int] = None,
+        seed: Optional[int] = None,
+    ):
+        self.latency = LatencyDistribution.parse(latency)
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.error_rate = error_rate
+        self.stream_error_rate = stream_error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.max_concurrency = max_concurrency
+        self.rng = random.Random(seed)
+        self.in_flight = 0
+
+    @classmethod
+    def from_settings(cls) -> "FakeProvider":
+        return cls(
+            latency=settings.AI_FAKE_LATENCY,
+            tokens_per_second=settings.AI_FAKE_TOKENS_PER_SECOND,
+            response_tokens=settings.AI_FAKE_RESPONSE_TOKENS,
+            error_rate=settings.AI_FAKE_ERROR_RATE,
+            stream_error_rate=settings.AI_FAKE_STREAM_ERROR_RATE,
+            rate_limit_rate=settings.AI_FAKE_RATE_LIMIT_RATE,
+            retry_after=settings.AI_FAKE_RETRY_AFTER,
+            max_concurrency=settings.AI_FAKE_MAX_CONCURRENCY,
+            seed=settings.AI_FAKE_SEED,
+        )
+
+    def _admit(self):
+        """Fail the call up front the way a provider would, before any latency"""
+        if self.max_concurrency is not None and self.in_flight >= self.max_concurrency:
+            raise ProviderRateLimited("Too many concurrent requests", self.retry_after)
+        if self.rng.random() < self.rate_limit_rate:
+            raise ProviderRateLimited(retry_after=self.retry_after)
+
+    async def _first_token(self):
+        await asyncio.sleep(self.latency.sample(self.rng))
+        if self.rng.random() < self.error_rate:
+            raise ProviderError("Fake provider error")
+
+    def _tokens(self, prompt: str):
+        tokens = _TOKEN.findall(f"AI Response to: {prompt[:50]}... ")
+        while len(tokens) < self.response_tokens:
+            tokens.append(_FILLER[len(tokens) % len(_FILLER)] + " ")
+        return tokens[:max(self.response_tokens, 1)]
+
+    async def stream(self, prompt: str, context: Optional[Dict], model: str) -> AsyncIterator[str]:
+        self._admit()
+        self.in_flight += 1
+        try:
+            await self._first_token()
+            tokens = self._tokens(prompt)
+            # Fail after 1..len(tokens) tokens; len(tokens) drops the stream just before it completes
+            fail_at = self.rng.randrange(1, len(tokens) + 1) if self.rng.random() < self.stream_error_rate else None
+            interval = 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+            for i, token in enumerate(tokens):
+                if i == fail_at:
+                    raise ProviderError("Fake provider stream interrupted")
+                if i:
+                    await asyncio.sleep(interval)
+                yield token
+            if fail_at == len(tokens):
+                raise ProviderError("Fake provider stream interrupted")
+        finally:
+            self.in_flight -= 1
+
+    async def run(self, method: str, prompt: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        self._admit()
+        self.in_flight += 1
+        try:
+            await self._first_token()
+            if self.tokens_per_second > 0:
+                await asyncio.sleep(self.response_tokens / self.tokens_per_second)
+            return await compute()
+        finally:
+            self.in_flight -= 1
+
+
+PROVIDERS: Dict[str, Callable[[], AIProvider]] = {
+    "mock": MockProvider,
+    "fake": FakeProvider.from_settings,
+}
+
+
+def register_provider(name: str, factory: Callable[[], AIProvider]):
+    """Make a provider selectable by name (settings.AI_PROVIDER)"""
+    PROVIDERS[name] = factory
+
+
+def create_provider(name: Optional[str] = None) -> AIProvider:
+    name = name or settings.AI_PROVIDER
+    try:
+        factory = PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown AI provider: {name} (expected one of {', '.join(PROVIDERS)})")
+    return factory()
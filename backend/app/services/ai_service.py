@@ -2,20 +2,67 @@
 AI service for lifeOS backend
 """
 
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Any, Tuple
 from datetime import datetime
+import asyncio
+import copy
 import json
+import re
+import time
 
+from app.core.concurrency import ProviderLimiter, SingleFlight
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.task import Task, TaskStatus
+from app.services.action_items import ActionItemMerger, chunk_text_stream, split_sentences
+from app.services.ai_providers import AIProvider, ProviderError, create_provider
+from app.services.ai_cache import MISS, AIResponseCache
+from app.services.analytics_engine import TaskColumns, TeamAnalytics, UserAnalytics, analytics_engine
+from app.services.context_builder import ContextSnippet, context_builder
+from app.services.message_processor import message_processor
+from app.services.vector_index import partition_for, vector_index
+
+AI_TIME_TO_FIRST_TOKEN = metrics.histogram(
+    "ai_time_to_first_token_seconds", "Time from request to first streamed AI token"
+)
+AI_STREAM_TOKENS = metrics.counter("ai_stream_tokens_total", "AI tokens streamed to clients")
+AI_STREAM_CANCELLED = metrics.counter(
+    "ai_stream_cancelled_total", "AI streams abandoned before completion (e.g. client disconnect)"
+)
+AI_PROVIDER_ERRORS = metrics.counter("ai_provider_errors_total", "Failed AI provider calls by status code")
+AI_PROVIDER_CALLS = metrics.counter("ai_provider_calls_total", "Structured (non-streaming) AI provider calls by method")
+AI_PROVIDER_SECONDS = metrics.histogram("ai_provider_call_seconds", "Structured AI provider call latency by method")
+
+_ACTION_CUE = re.compile(
+    r"\b(action item|todo|to-do|follow up|follow-up|will|need to|needs to|should|must|by (monday|tuesday|"
+    r"wednesday|thursday|friday|tomorrow|eod|end of))\b",
+    re.IGNORECASE,
+)
+
+
+def _model_label(model: str) -> str:
+    """Metric label for a model; anything outside settings.AI_MODELS shares one bucket"""
+    return model if model in settings.AI_MODELS else "other"
 
 
 class AIService:
     """AI service for context management and assistance"""
     
-    def __init__(self):
+    def __init__(self, provider: Optional[AIProvider] = None):
         self.openai_api_key = settings.OPENAI_API_KEY
         self.anthropic_api_key = settings.ANTHROPIC_API_KEY
         self.context_window_size = 8000  # Token limit for context
+        self.default_model = "gpt-3.5-turbo"
+        self.cache = AIResponseCache()
+        self.context_builder = context_builder
+        self.single_flight = SingleFlight("ai")
+        self.limiter = ProviderLimiter(
+            "ai",
+            max_concurrency=settings.AI_PROVIDER_MAX_CONCURRENCY,
+            rate=settings.AI_PROVIDER_RATE_LIMIT,
+            burst=settings.AI_PROVIDER_BURST,
+        )
+        self.provider = provider or create_provider()
     
     async def generate_response(
         self, 
@@ -24,17 +71,123 @@ class AIService:
         model: str = "gpt-3.5-turbo"
     ) -> str:
         """Generate AI response with context"""
-        # This would integrate with OpenAI/Anthropic APIs
-        # For now, return a mock response
-        return f"AI Response to: {prompt[:50]}..."
+        return "".join([token async for token in self.stream_response(prompt, context, model)])
     
-    async def summarize_content(self, content: str, max_length: int = 200) -> str:
+    async def stream_response(
+        self,
+        prompt: str,
+        context: Optional[Dict] = None,
+        model: str = "gpt-3.5-turbo"
+    ) -> AsyncIterator[str]:
+        """
+        Stream an AI response token by token.
+        Tokens are produced only as the consumer pulls them, so a slow client
+        slows generation; closing the generator cancels the provider call.
+        """
+        started = time.perf_counter()
+        completed = False
+        first_token = True
+        label = _model_label(model)
+        async with self.limiter.slot():
+            stream = self._provider_stream(prompt, context, model)
+            try:
+                async for token in stream:
+                    if first_token:
+                        AI_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - started, model=label)
+                        first_token = False
+                    AI_STREAM_TOKENS.inc(model=label)
+                    yield token
+                completed = True
+            except ProviderError as e:
+                AI_PROVIDER_ERRORS.inc(provider=self.provider.name, status=str(e.status_code))
+                raise
+            finally:
+                if not completed:
+                    AI_STREAM_CANCELLED.inc(model=label)
+                await stream.aclose()
+    
+    async def _provider_stream(
+        self,
+        prompt: str,
+        context: Optional[Dict],
+        model: str
+    ) -> AsyncIterator[str]:
+        """Provider token stream"""
+        async for token in self.provider.stream(prompt, context, model):
+            yield token
+    
+    async def _provider_call(
+        self,
+        method: str,
+        prompt: str,
+        compute,
+        context: Optional[Dict] = None,
+        model: Optional[str] = None,
+        source_id: Optional[str] = None,
+        source_version: Optional[int] = None
+    ) -> Any:
+        """
+        Run a provider-backed computation.
+        Cached results are served directly; identical concurrent calls share one
+        in-flight call; the call itself runs under the provider's concurrency
+        and rate limits.
+        """
+        ttl = self.cache.ttl_for(method)
+        if source_id is not None and source_version is not None:
+            await self.cache.observe_version(source_id, source_version)
+        
+        key = self.cache.make_key(method, model or self.default_model, prompt, context, source_version)
+        if ttl:
+            value = await self.cache.get(key)
+            if value is not MISS:
+                return value
+        
+        async def leader() -> Any:
+            async with self.limiter.slot():
+                value = await self._provider_run(method, prompt, compute)
+            if ttl:
+                await self.cache.set(key, value, ttl, method, source_id, source_version)
+            return value
+        
+        # Every caller sharing the flight gets its own copy of the result
+        return copy.deepcopy(await self.single_flight.do(key, leader))
+    
+    async def _provider_run(self, method: str, prompt: str, compute) -> Any:
+        """One structured provider call (the caller holds a limiter slot)"""
+        AI_PROVIDER_CALLS.inc(method=method)
+        started = time.perf_counter()
+        try:
+            return await self.provider.run(method, prompt, compute)
+        except ProviderError as e:
+            AI_PROVIDER_ERRORS.inc(provider=self.provider.name, status=str(e.status_code))
+            raise
+        finally:
+            AI_PROVIDER_SECONDS.observe(time.perf_counter() - started, method=method)
+    
+    async def invalidate_document(self, document_id: str):
+        """Drop cached AI results derived from a document"""
+        await self.cache.invalidate_source(document_id)
+    
+    async def summarize_content(
+        self,
+        content: str,
+        max_length: int = 200,
+        document_id: Optional[str] = None,
+        version: Optional[int] = None
+    ) -> str:
         """Summarize content using AI"""
-        # This would use AI to summarize content
-        # For now, return a simple truncation
-        if len(content) <= max_length:
-            return content
-        return content[:max_length] + "..."
+        async def compute() -> str:
+            # This would use AI to summarize content
+            # For now, return a simple truncation
+            if len(content) <= max_length:
+                return content
+            return content[:max_length] + "..."
+        
+        return await self._provider_call(
+            "summarize_content", content, compute,
+            context={"max_length": max_length},
+            source_id=document_id, source_version=version,
+        )
     
     async def generate_task_suggestions(
         self, 
@@ -42,35 +195,67 @@ class AIService:
         user_context: Dict
     ) -> List[Dict]:
         """Generate task suggestions based on project and user context"""
-        # This would analyze context and generate relevant task suggestions
-        # For now, return mock suggestions
-        return [
-            {
-                "title": "Review project requirements",
-                "description": "Analyze and document project requirements",
-                "priority": "high",
-                "estimated_hours": 2
-            },
-            {
-                "title": "Set up development environment",
-                "description": "Configure development tools and dependencies",
-                "priority": "medium", 
-                "estimated_hours": 1
-            }
-        ]
+        query = " ".join(str(project_context.get(field) or "") for field in ("name", "description")).strip()
+        snippets = await self.retrieve_context(
+            self._retrieval_partitions(user_context, team_ids=[project_context.get("team_id")]),
+            query,
+            source_types=["task", "document"],
+        )
+        context = self._build_context(user_context, project_context, query=query, snippets=snippets)
+        
+        async def compute() -> List[Dict]:
+            # This would analyze context and generate relevant task suggestions
+            # For now, return mock suggestions
+            return [
+                {
+                    "title": "Review project requirements",
+                    "description": "Analyze and document project requirements",
+                    "priority": "high",
+                    "estimated_hours": 2
+                },
+                {
+                    "title": "Set up development environment",
+                    "description": "Configure development tools and dependencies",
+                    "priority": "medium", 
+                    "estimated_hours": 1
+                }
+            ]
+        
+        return await self._provider_call(
+            "generate_task_suggestions", f"{context}\n\nSuggest next tasks for this project.", compute
+        )
     
     async def analyze_team_health(self, team_data: Dict) -> Dict:
-        """Analyze team health metrics"""
-        # This would analyze team performance and health
-        # For now, return mock analysis
+        """Analyze team health metrics from task history"""
+        team, _ = await self._team_analytics(team_data)
+        if team.total_tasks == team.status_counts.get(TaskStatus.CANCELLED.value, 0):
+            # Nothing to measure yet; a score here would only reflect the formula's defaults
+            return {
+                "overall_health": None,
+                "productivity_trend": "stable",
+                "collaboration_score": None,
+                "recommendations": ["No active tasks yet; add tasks to start tracking team health"],
+                "metrics": team.dict()
+            }
+        
+        recommendations = []
+        if team.drifting:
+            recommendations.append(f"{team.drifting} open tasks have had no activity for a week or more")
+        if team.overdue:
+            recommendations.append(f"{team.overdue} tasks are past their due date")
+        if team.estimate_ratio > 1.25:
+            recommendations.append(
+                f"Completed tasks took {team.estimate_ratio - 1:.0%} longer than estimated; consider padding estimates"
+            )
+        if not recommendations:
+            recommendations.append("Team is performing well on current sprint")
+        
         return {
-            "overall_health": 75,
-            "productivity_trend": "increasing",
-            "collaboration_score": 80,
-            "recommendations": [
-                "Consider scheduling more regular check-ins",
-                "Team is performing well on current sprint"
-            ]
+            "overall_health": team.health_score,
+            "productivity_trend": self._trend(team.completed_last_7d, team.completed_prev_7d),
+            "collaboration_score": round(team.collaboration_rate * 100),
+            "recommendations": recommendations,
+            "metrics": team.dict()
         }
     
     async def generate_goal_suggestions(self, user_context: Dict) -> List[Dict]:
@@ -99,45 +284,139 @@ class AIService:
         if not self._is_ai_mention(message):
             return None
         
-        # Generate contextual response
-        # This would use the full context to generate a helpful response
-        return f"AI Assistant: I understand you're asking about '{message[:30]}...'. Let me help with that."
+        snippets = await self.retrieve_context(
+            self._retrieval_partitions(
+                user_context, team_ids=[chat_context.get("team_id")], room_id=chat_context.get("room_id")
+            ),
+            message,
+        )
+        context = self._build_context(user_context, query=message, snippets=snippets)
+        
+        async def compute() -> str:
+            # This would use the full context to generate a helpful response
+            return f"AI Assistant: I understand you're asking about '{message[:30]}...'. Let me help with that."
+        
+        return await self._provider_call("process_chat_message", f"{context}\n\n{message}", compute)
     
-    async def update_document_summary(self, document_content: str) -> str:
+    async def update_document_summary(
+        self,
+        document_content: str,
+        document_id: Optional[str] = None,
+        version: Optional[int] = None
+    ) -> str:
         """Generate or update document summary"""
         # This would analyze document content and generate a summary
-        summary = await self.summarize_content(document_content, 300)
+        summary = await self.summarize_content(document_content, 300, document_id, version)
         return summary
     
-    async def suggest_document_improvements(self, document_content: str) -> List[str]:
+    async def suggest_document_improvements(
+        self,
+        document_content: str,
+        document_id: Optional[str] = None,
+        version: Optional[int] = None
+    ) -> List[str]:
         """Suggest improvements for document content"""
-        # This would analyze document and suggest improvements
-        # For now, return mock suggestions
-        return [
-            "Consider adding more specific examples",
-            "The introduction could be more concise",
-            "Add section headers for better organization"
-        ]
+        async def compute() -> List[str]:
+            # This would analyze document and suggest improvements
+            # For now, return mock suggestions
+            return [
+                "Consider adding more specific examples",
+                "The introduction could be more concise",
+                "Add section headers for better organization"
+            ]
+        
+        return await self._provider_call(
+            "suggest_document_improvements", document_content, compute,
+            source_id=document_id, source_version=version,
+        )
     
     async def analyze_user_productivity(self, user_data: Dict) -> Dict:
-        """Analyze user productivity patterns"""
-        # This would analyze user's task completion, time usage, etc.
-        # For now, return mock analysis
+        """Analyze user productivity patterns from their assigned tasks"""
+        _, users = await self._team_analytics(user_data)
+        user = next((u for u in users if u.user_id == user_data.get("user_id")), None)
+        if user is None:
+            user = UserAnalytics(
+                user_id=user_data.get("user_id", ""), assigned=0, completed=0, completion_rate=0.0,
+                overdue=0, drifting=0, time_spent=0.0, estimated_hours=0.0, actual_hours=0.0,
+                estimate_ratio=0.0, completed_last_7d=0,
+            )
+        
+        open_tasks = max(user.assigned - user.completed, 1)
+        stalled = min(1.0, (user.drifting + user.overdue) / open_tasks)
+        recommendations = []
+        if user.drifting:
+            recommendations.append("Try blocking larger chunks of time for deep work on stalled tasks")
+        if user.estimate_ratio > 1.25:
+            recommendations.append("Tasks are running over estimate; consider splitting them up")
+        
         return {
-            "productivity_score": 78,
-            "time_utilization": 85,
-            "focus_time_average": 2.5,  # hours
-            "completion_rate": 82,
-            "recommendations": [
-                "Try blocking larger chunks of time for deep work",
-                "Consider reducing meeting frequency"
-            ]
+            "productivity_score": round(100 * (0.7 * user.completion_rate + 0.3 * (1 - stalled))),
+            "time_utilization": round(100 * min(1.0, user.estimated_hours / user.actual_hours)) if user.actual_hours else 0,
+            "focus_time_average": round(user.focus_time_average, 1),  # hours
+            "time_spent": round(user.time_spent, 1),
+            "completion_rate": round(user.completion_rate * 100),
+            "recommendations": recommendations,
+            "metrics": user.dict()
         }
     
+    async def _team_analytics(self, data: Dict) -> Tuple[TeamAnalytics, List[UserAnalytics]]:
+        """Metrics over data["tasks"] (Task models or Firestore dicts), else the cached team snapshot"""
+        tasks = data.get("tasks")
+        if tasks is None and data.get("team_id"):
+            return await analytics_engine.get_team_snapshot(data["team_id"])
+        
+        tasks = tasks or []
+        if tasks and isinstance(tasks[0], Task):
+            columns = TaskColumns.from_tasks(tasks)
+        else:
+            columns = TaskColumns.from_records(tasks)
+        return analytics_engine.snapshot(columns)
+    
+    @staticmethod
+    def _trend(current: int, previous: int) -> str:
+        if current > previous:
+            return "increasing"
+        if current < previous:
+            return "decreasing"
+        return "stable"
+    
     async def generate_daily_briefing(self, user_context: Dict) -> Dict:
         """Generate daily briefing for user"""
-        # This would compile relevant information for the user's day
-        # For now, return mock briefing
+        return (await self.generate_daily_briefings([user_context]))[0]
+    
+    async def generate_daily_briefings(self, user_contexts: List[Dict]) -> List[Dict]:
+        """Generate daily briefings for many users with one provider call"""
+        retrieved = await asyncio.gather(*(
+            self._briefing_context(user_context) for user_context in user_contexts
+        ))
+        
+        async def compute() -> List[Dict]:
+            # This would send one batched prompt with every user's context
+            # For now, return mock briefings
+            return [self._compose_briefing(user_context) for user_context in user_contexts]
+        
+        prompt = json.dumps(
+            [{"user_id": c.get("user_id"), "context": context} for c, context in zip(user_contexts, retrieved)],
+            default=str,
+        )
+        async with self.limiter.slot():
+            return await self._provider_run("generate_daily_briefings", prompt, compute)
+    
+    async def _briefing_context(self, user_context: Dict) -> str:
+        """One user's briefing context: their goals and open tasks plus related workspace snippets"""
+        goals = [goal for goal in user_context.get("goals", []) if goal]
+        tasks = [task.get("title") for task in user_context.get("tasks", []) if task.get("title")]
+        query = " ".join(goals + tasks)
+        snippets = await self.retrieve_context(
+            self._retrieval_partitions(user_context, team_ids=user_context.get("team_ids", [])), query
+        ) if query else []
+        return self._build_context(
+            user_context, {"goals": ", ".join(goals), "open_tasks": ", ".join(tasks)},
+            query=query, snippets=snippets,
+        )
+    
+    def _compose_briefing(self, user_context: Dict) -> Dict:
+        """Compile relevant information for the user's day"""
         return {
             "greeting": "Good morning! Here's your daily briefing.",
             "priority_tasks": [
@@ -151,52 +430,172 @@ class AIService:
             "weather": "Sunny, 22°C"
         }
     
+    async def retrieve_context(
+        self,
+        partitions: Iterable[str],
+        query: str,
+        k: int = 20,
+        source_types: Optional[List[str]] = None
+    ) -> List[ContextSnippet]:
+        """Workspace snippets most similar to the query across partitions, for _build_context"""
+        if not query.strip():
+            return []
+        results = await asyncio.gather(*(
+            vector_index.search(partition, query, k, source_types) for partition in dict.fromkeys(partitions)
+        ))
+        matches = sorted((match for result in results for match in result), key=lambda match: -match.score)
+        return [match.snippet for match in matches[:k]]
+    
+    @staticmethod
+    def _retrieval_partitions(
+        user_context: Dict,
+        team_ids: Iterable[Optional[str]] = (),
+        room_id: Optional[str] = None
+    ) -> List[str]:
+        """Index partitions a user's prompt may draw from: their teams, the chat room and their own"""
+        partitions = [partition_for(team_id=team_id) for team_id in team_ids if team_id]
+        if room_id:
+            partitions.append(partition_for(room_id=room_id))
+        user_id = user_context.get("user_id") or user_context.get("id")
+        if user_id:
+            partitions.append(partition_for(user_id=user_id))
+        return partitions
+    
     def _is_ai_mention(self, message: str) -> bool:
         """Check if message mentions AI assistant"""
-        ai_triggers = ["@ai", "@assistant", "@chotu", "hey ai", "ai help"]
-        message_lower = message.lower()
-        return any(trigger in message_lower for trigger in ai_triggers)
+        return message_processor.process(message).is_ai_mention
     
-    def _build_context(self, user_context: Dict, additional_context: Dict = None) -> str:
-        """Build context string for AI prompts"""
-        context_parts = []
+    def _build_context(
+        self,
+        user_context: Dict,
+        additional_context: Dict = None,
+        query: str = "",
+        snippets: Optional[List[ContextSnippet]] = None
+    ) -> str:
+        """
+        Build context string for AI prompts within context_window_size tokens.
+        Explicit additional_context ranks first; task/document/chat snippets are
+        ranked by relevance to the query and recency, then packed greedily.
+        """
+        header = []
         
         # Add user context
         if user_context:
-            context_parts.append(f"User: {user_context.get('name', 'Unknown')}")
-            context_parts.append(f"Role: {user_context.get('role', 'Team Member')}")
+            header.append(f"User: {user_context.get('name', 'Unknown')}")
+            header.append(f"Role: {user_context.get('role', 'Team Member')}")
+        
+        candidates = list(snippets or [])
         
         # Add additional context
         if additional_context:
             for key, value in additional_context.items():
-                context_parts.append(f"{key}: {value}")
+                candidates.append(ContextSnippet(
+                    source_type="context",
+                    source_id=str(key),
+                    text=f"{key}: {value}",
+                    boost=1000.0,
+                ))
         
-        return "\n".join(context_parts)
+        return self.context_builder.build(
+            candidates, self.context_window_size, query=query, header=header
+        )
     
     async def extract_action_items(self, text: str) -> List[Dict]:
         """Extract action items from text (meeting notes, documents, etc.)"""
-        # This would use NLP to extract actionable items
-        # For now, return mock action items
-        return [
-            {
-                "text": "Follow up with client about requirements",
-                "assignee": None,
-                "due_date": None,
-                "priority": "medium"
-            }
-        ]
+        if self.context_builder.tokens.count(text) <= settings.ACTION_ITEM_CHUNK_TOKENS:
+            return ActionItemMerger().add(await self._extract_chunk_items(text))
+        
+        async def single() -> AsyncIterator[str]:
+            yield text
+        
+        merger = ActionItemMerger()
+        async for items in self.extract_action_items_stream(single(), merger=merger):
+            pass
+        return merger.items
     
-    async def classify_content(self, content: str) -> Dict:
+    async def extract_action_items_stream(
+        self,
+        text_stream: AsyncIterable[str],
+        chunk_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        merger: Optional[ActionItemMerger] = None
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Extract action items from a long transcript as it streams in.
+        The text is cut into overlapping token-bounded chunks that are extracted
+        concurrently (at most max_concurrency in flight, which also bounds how far
+        ahead the stream is read). Each time a chunk finishes, the items it added
+        after de-duplication are yielded; merger.items holds the merged result.
+        """
+        chunk_tokens = chunk_tokens or settings.ACTION_ITEM_CHUNK_TOKENS
+        overlap_tokens = settings.ACTION_ITEM_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+        max_concurrency = max_concurrency or settings.ACTION_ITEM_MAX_CONCURRENCY
+        merger = merger if merger is not None else ActionItemMerger()
+        
+        chunks = chunk_text_stream(text_stream, self.context_builder.tokens, chunk_tokens, overlap_tokens)
+        in_flight = set()
+        try:
+            async for chunk in chunks:
+                if len(in_flight) >= max_concurrency:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        added = merger.add(task.result())
+                        if added:
+                            yield added
+                in_flight.add(asyncio.ensure_future(self._extract_chunk_items(chunk)))
+            
+            while in_flight:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    added = merger.add(task.result())
+                    if added:
+                        yield added
+        finally:
+            for task in in_flight:
+                task.cancel()
+            await chunks.aclose()
+    
+    async def _extract_chunk_items(self, text: str) -> List[Dict]:
+        """Action items in one model-window-sized chunk"""
+        async def compute() -> List[Dict]:
+            # This would use NLP to extract actionable items
+            # For now, pick out sentences phrased as commitments or follow-ups
+            return [
+                {
+                    "text": sentence,
+                    "assignee": None,
+                    "due_date": None,
+                    "priority": "medium"
+                }
+                for sentence in split_sentences(text)
+                if _ACTION_CUE.search(sentence)
+            ]
+        
+        return await self._provider_call("extract_action_items", text, compute)
+    
+    async def classify_content(
+        self,
+        content: str,
+        document_id: Optional[str] = None,
+        version: Optional[int] = None
+    ) -> Dict:
         """Classify content type and extract metadata"""
-        # This would classify content and extract relevant metadata
-        # For now, return mock classification
-        return {
-            "type": "project_document",
-            "confidence": 0.85,
-            "topics": ["planning", "requirements", "timeline"],
-            "sentiment": "neutral",
-            "complexity": "medium"
-        }
+        async def compute() -> Dict:
+            # This would classify content and extract relevant metadata
+            # For now, return mock classification
+            return {
+                "type": "project_document",
+                "confidence": 0.85,
+                "topics": ["planning", "requirements", "timeline"],
+                "sentiment": "neutral",
+                "complexity": "medium"
+            }
+        
+        return await self._provider_call(
+            "classify_content", content, compute,
+            source_id=document_id, source_version=version,
+        )
 
 
 # Global AI service instance
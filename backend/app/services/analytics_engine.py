@@ -0,0 +1,353 @@
+"""
+Team health and productivity analytics for lifeOS backend
+Task history is held as columnar NumPy arrays and every metric is one vectorized pass
+"""
+
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.task import Task, TaskStatus
+from app.services.firebase_service import FirebaseService, firebase_service
+
+ANALYTICS_SNAPSHOT_SECONDS = metrics.histogram("analytics_snapshot_seconds", "Time to compute a team analytics snapshot")
+
+STATUSES: List[TaskStatus] = list(TaskStatus)
+STATUS_CODES: Dict[str, int] = {status.value: code for code, status in enumerate(STATUSES)}
+DONE = STATUS_CODES[TaskStatus.DONE.value]
+CANCELLED = STATUS_CODES[TaskStatus.CANCELLED.value]
+DAY = 86400.0
+WEEK = 7 * DAY
+
+
+def _epoch(value: Any) -> float:
+    """Naive-UTC datetime or ISO string to epoch seconds; NaN when missing"""
+    if value is None:
+        return np.nan
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _hours(value: Any) -> float:
+    return np.nan if value is None else float(value)
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    return float(numerator / denominator) if denominator else 0.0
+
+
+class TaskColumns:
+    """Task history as parallel arrays, one element per task"""
+
+    def __init__(
+        self,
+        status: np.ndarray,
+        estimated_hours: np.ndarray,
+        actual_hours: np.ndarray,
+        time_spent: np.ndarray,
+        created_at: np.ndarray,
+        completed_at: np.ndarray,
+        due_at: np.ndarray,
+        last_activity: np.ndarray,
+        is_blocked: np.ndarray,
+        assignee_task: np.ndarray,
+        assignee_user: np.ndarray,
+        user_ids: List[str],
+    ):
+        self.status = status
+        self.estimated_hours = estimated_hours
+        self.actual_hours = actual_hours
+        self.time_spent = time_spent
+        self.created_at = created_at
+        self.completed_at = completed_at
+        self.due_at = due_at
+        self.last_activity = last_activity
+        self.is_blocked = is_blocked
+        # Assignments as (task index, user index) pairs; user index -> user_ids
+        self.assignee_task = assignee_task
+        self.assignee_user = assignee_user
+        self.user_ids = user_ids
+
+    def __len__(self) -> int:
+        return len(self.status)
+
+    @classmethod
+    def _build(cls, rows: Iterable[Tuple], assignments: Iterable[List[str]]) -> 'TaskColumns':
+        rows = list(rows)
+        user_index: Dict[str, int] = {}
+        pair_tasks, pair_users = [], []
+        for task_index, user_ids in enumerate(assignments):
+            for user_id in user_ids:
+                pair_tasks.append(task_index)
+                pair_users.append(user_index.setdefault(user_id, len(user_index)))
+
+        columns = list(zip(*rows)) if rows else [()] * 9
+        return cls(
+            status=np.fromiter(columns[0], dtype=np.int8, count=len(rows)),
+            estimated_hours=np.fromiter(columns[1], dtype=np.float64, count=len(rows)),
+            actual_hours=np.fromiter(columns[2], dtype=np.float64, count=len(rows)),
+            time_spent=np.fromiter(columns[3], dtype=np.float64, count=len(rows)),
+            created_at=np.fromiter(columns[4], dtype=np.float64, count=len(rows)),
+            completed_at=np.fromiter(columns[5], dtype=np.float64, count=len(rows)),
+            due_at=np.fromiter(columns[6], dtype=np.float64, count=len(rows)),
+            last_activity=np.fromiter(columns[7], dtype=np.float64, count=len(rows)),
+            is_blocked=np.fromiter(columns[8], dtype=bool, count=len(rows)),
+            assignee_task=np.asarray(pair_tasks, dtype=np.int64),
+            assignee_user=np.asarray(pair_users, dtype=np.int64),
+            user_ids=list(user_index),
+        )
+
+    @classmethod
+    def from_tasks(cls, tasks: Iterable[Task]) -> 'TaskColumns':
+        tasks = list(tasks)
+        return cls._build(
+            (
+                (
+                    STATUS_CODES[task.status.value], _hours(task.estimated_hours), _hours(task.actual_hours),
+                    task.time_spent, _epoch(task.created_at), _epoch(task.completed_date),
+                    _epoch(task.due_date), _epoch(task.last_activity), task.is_blocked,
+                )
+                for task in tasks
+            ),
+            (task.get_assigned_users() for task in tasks),
+        )
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> 'TaskColumns':
+        """Build from Firestore task documents without constructing Task models"""
+        records = list(records)
+        return cls._build(
+            (
+                (
+                    STATUS_CODES.get(record.get("status"), 0), _hours(record.get("estimated_hours")),
+                    _hours(record.get("actual_hours")), float(record.get("time_spent") or 0.0),
+                    _epoch(record.get("created_at")), _epoch(record.get("completed_date")),
+                    _epoch(record.get("due_date")), _epoch(record.get("last_activity")),
+                    bool(record.get("is_blocked")),
+                )
+                for record in records
+            ),
+            ([a["user_id"] for a in record.get("quest_team") or []] for record in records),
+        )
+
+
+class TeamAnalytics(BaseModel):
+    """Team-wide task metrics at one point in time"""
+    total_tasks: int
+    status_counts: Dict[str, int]
+    completion_rate: float  # Done / not cancelled
+    overdue: int
+    drifting: int
+    blocked: int
+    estimated_hours: float  # Over done tasks with both estimate and actual
+    actual_hours: float
+    estimate_ratio: float  # Actual / estimated; > 1 means underestimation
+    estimate_error: float  # Mean absolute relative error of estimates
+    time_spent: float
+    median_cycle_hours: Optional[float] = None
+    completed_last_7d: int
+    completed_prev_7d: int
+    collaboration_rate: float  # Share of open tasks with more than one assignee
+    health_score: int
+    computed_at: datetime
+
+
+class UserAnalytics(BaseModel):
+    """One assignee's task metrics"""
+    user_id: str
+    assigned: int
+    completed: int
+    completion_rate: float
+    overdue: int
+    drifting: int
+    time_spent: float
+    estimated_hours: float
+    actual_hours: float
+    estimate_ratio: float
+    completed_last_7d: int
+    focus_time_average: float = 0.0  # Mean actual hours per done task with estimate and actual
+
+
+class AnalyticsEngine:
+    """Computes team and per-user metrics over TaskColumns, with a TTL snapshot cache"""
+
+    def __init__(
+        self,
+        firebase: FirebaseService = firebase_service,
+        drift_threshold_days: int = 7,
+        snapshot_ttl: Optional[int] = None,
+        max_snapshots: int = 256,
+    ):
+        self.firebase = firebase
+        self.drift_threshold_days = drift_threshold_days
+        self.snapshot_ttl = settings.ANALYTICS_SNAPSHOT_TTL if snapshot_ttl is None else snapshot_ttl
+        self.max_snapshots = max_snapshots
+        # team_id -> (expires_at, team snapshot, per-user snapshots)
+        self._snapshots: "OrderedDict[str, Tuple[float, TeamAnalytics, List[UserAnalytics]]]" = OrderedDict()
+
+    def _masks(self, columns: TaskColumns, now: float) -> Dict[str, np.ndarray]:
+        """Per-task boolean columns shared by team and user metrics"""
+        done = columns.status == DONE
+        open_ = ~done & (columns.status != CANCELLED)
+        last_activity = np.where(np.isnan(columns.last_activity), columns.created_at, columns.last_activity)
+        # Whole days inactive, as in Task.calculate_drift_status, but only open tasks count
+        drifting = open_ & (np.floor((now - last_activity) / DAY) >= self.drift_threshold_days)
+        with np.errstate(invalid="ignore"):
+            overdue = open_ & (columns.due_at < now)
+            estimated = done & (columns.estimated_hours > 0) & ~np.isnan(columns.actual_hours)
+            recent = done & (columns.completed_at >= now - WEEK) & (columns.completed_at < now)
+            previous = done & (columns.completed_at >= now - 2 * WEEK) & (columns.completed_at < now - WEEK)
+        return {
+            "done": done, "open": open_, "drifting": drifting, "overdue": overdue,
+            "estimated": estimated, "recent": recent, "previous": previous,
+        }
+
+    def snapshot(
+        self, columns: TaskColumns, now: Optional[datetime] = None
+    ) -> Tuple[TeamAnalytics, List[UserAnalytics]]:
+        """Team and per-user metrics sharing one set of per-task masks"""
+        now = now or datetime.utcnow()
+        m = self._masks(columns, _epoch(now))
+        return self._team_metrics(columns, m, now), self._user_metrics(columns, m)
+
+    def team_metrics(self, columns: TaskColumns, now: Optional[datetime] = None) -> TeamAnalytics:
+        now = now or datetime.utcnow()
+        return self._team_metrics(columns, self._masks(columns, _epoch(now)), now)
+
+    def user_metrics(self, columns: TaskColumns, now: Optional[datetime] = None) -> List[UserAnalytics]:
+        return self._user_metrics(columns, self._masks(columns, _epoch(now or datetime.utcnow())))
+
+    def _team_metrics(self, columns: TaskColumns, m: Dict[str, np.ndarray], now: datetime) -> TeamAnalytics:
+        started = time.perf_counter()
+
+        status_counts = np.bincount(columns.status, minlength=len(STATUSES))
+        done_count = int(status_counts[DONE])
+        not_cancelled = len(columns) - int(status_counts[CANCELLED])
+
+        estimated = columns.estimated_hours[m["estimated"]]
+        actual = columns.actual_hours[m["estimated"]]
+        estimate_error = float(np.mean(np.abs(actual - estimated) / estimated)) if len(estimated) else 0.0
+
+        cycle = (columns.completed_at - columns.created_at)[m["done"]]
+        cycle = cycle[~np.isnan(cycle)]
+
+        assignees_per_task = np.bincount(columns.assignee_task, minlength=len(columns))
+        open_count = int(m["open"].sum())
+        collaboration_rate = _ratio(int((m["open"] & (assignees_per_task > 1)).sum()), open_count)
+
+        completion_rate = _ratio(done_count, not_cancelled)
+        drifting = int(m["drifting"].sum())
+        overdue = int(m["overdue"].sum())
+        open_or_done = max(open_count, 1)
+        health = 100 * (
+            0.4 * completion_rate
+            + 0.3 * (1 - min(1.0, drifting / open_or_done))
+            + 0.2 * (1 - min(1.0, overdue / open_or_done))
+            + 0.1 * max(0.0, 1 - estimate_error)
+        )
+
+        snapshot = TeamAnalytics(
+            total_tasks=len(columns),
+            status_counts={status.value: int(count) for status, count in zip(STATUSES, status_counts)},
+            completion_rate=completion_rate,
+            overdue=overdue,
+            drifting=drifting,
+            blocked=int((columns.is_blocked & ~m["done"]).sum()),
+            estimated_hours=float(estimated.sum()),
+            actual_hours=float(actual.sum()),
+            estimate_ratio=_ratio(actual.sum(), estimated.sum()),
+            estimate_error=estimate_error,
+            time_spent=float(columns.time_spent.sum()),
+            median_cycle_hours=float(np.median(cycle) / 3600) if len(cycle) else None,
+            completed_last_7d=int(m["recent"].sum()),
+            completed_prev_7d=int(m["previous"].sum()),
+            collaboration_rate=collaboration_rate,
+            health_score=int(round(health)),
+            computed_at=now,
+        )
+        ANALYTICS_SNAPSHOT_SECONDS.observe(time.perf_counter() - started, scope="team")
+        return snapshot
+
+    def _user_metrics(self, columns: TaskColumns, m: Dict[str, np.ndarray]) -> List[UserAnalytics]:
+        started = time.perf_counter()
+        tasks, users = columns.assignee_task, columns.assignee_user
+        size = len(columns.user_ids)
+
+        # Pack the per-task flags into one small code so a single bincount over
+        # (user, code) yields every per-user count
+        flags = [m["done"], columns.status != CANCELLED, m["overdue"], m["drifting"], m["recent"], m["estimated"]]
+        codes = np.zeros(len(columns), dtype=np.int64)
+        for bit, flag in enumerate(flags):
+            codes |= flag.astype(np.int64) << bit
+        combos = 1 << len(flags)
+        by_code = np.bincount(users * combos + codes[tasks], minlength=size * combos).reshape(size, combos)
+        has_bit = (np.arange(combos)[:, None] >> np.arange(len(flags))) & 1
+        counts = (by_code @ has_bit).T
+        completed, not_cancelled, overdue, drifting, recent = counts[:5].tolist()
+        assigned = by_code.sum(axis=1).tolist()
+
+        picked = m["estimated"][tasks]
+        estimated = np.bincount(users[picked], weights=columns.estimated_hours[tasks[picked]], minlength=size)
+        actual = np.bincount(users[picked], weights=columns.actual_hours[tasks[picked]], minlength=size)
+        time_spent = np.bincount(users, weights=columns.time_spent[tasks], minlength=size).tolist()
+        focus = np.divide(actual, counts[5], out=np.zeros(size), where=counts[5] > 0).tolist()
+        estimated, actual = estimated.tolist(), actual.tolist()
+
+        result = [
+            UserAnalytics(
+                user_id=user_id,
+                assigned=assigned[i],
+                completed=completed[i],
+                completion_rate=_ratio(completed[i], not_cancelled[i]),
+                overdue=overdue[i],
+                drifting=drifting[i],
+                time_spent=time_spent[i],
+                estimated_hours=estimated[i],
+                actual_hours=actual[i],
+                estimate_ratio=_ratio(actual[i], estimated[i]),
+                completed_last_7d=recent[i],
+                focus_time_average=focus[i],
+            )
+            for i, user_id in enumerate(columns.user_ids)
+        ]
+        ANALYTICS_SNAPSHOT_SECONDS.observe(time.perf_counter() - started, scope="users")
+        return result
+
+    async def load_team_columns(self, team_id: str) -> TaskColumns:
+        """Fetch every task under the team's projects"""
+        records = []
+        for project in await self.firebase.get_team_projects(team_id):
+            records.extend(await self.firebase.get_project_tasks(project["id"]))
+        return TaskColumns.from_records(records)
+
+    async def get_team_snapshot(self, team_id: str) -> Tuple[TeamAnalytics, List[UserAnalytics]]:
+        """Cached team and per-user metrics, recomputed after snapshot_ttl seconds"""
+        cached = self._snapshots.get(team_id)
+        if cached is not None and cached[0] > time.time():
+            self._snapshots.move_to_end(team_id)
+            return cached[1], cached[2]
+
+        columns = await self.load_team_columns(team_id)
+        team, users = self.snapshot(columns)
+        self._snapshots[team_id] = (time.time() + self.snapshot_ttl, team, users)
+        self._snapshots.move_to_end(team_id)
+        while len(self._snapshots) > self.max_snapshots:
+            self._snapshots.popitem(last=False)
+        return team, users
+
+    def invalidate(self, team_id: str):
+        """Drop a team's snapshot (e.g. after bulk task changes)"""
+        self._snapshots.pop(team_id, None)
+
+
+# Global analytics engine instance
+analytics_engine = AnalyticsEngine()
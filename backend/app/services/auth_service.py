@@ -12,8 +12,16 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, List, Any
 
 from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import metrics
 from app.models.user import User, UserProfile
 
+logger = get_logger(__name__)
+
+AUTH_TOKEN_CHECKS = metrics.counter(
+    "auth_token_checks_total", "Bearer token checks by outcome (ok, invalid_token, unknown_user)"
+)
+
 
 class AuthService:
     """Mock authentication service (Turso service removed)"""
@@ -26,7 +34,7 @@ class AuthService:
     
     async def authenticate_user(self, email: str, password: str) -> Optional[User]:
         """Authenticate a user with email and password (mock implementation)"""
-        print(f"Mock authentication attempt for: {email}")
+        logger.debug("Mock authentication attempt", extra={"email": email})
         
         # Mock user data
         if email in self._users:
@@ -44,11 +52,11 @@ class AuthService:
     
     async def create_user(self, email: str, display_name: str, password: str = None) -> Optional[User]:
         """Create a new user (mock implementation)"""
-        print(f"Mock user creation for: {email}")
+        logger.debug("Mock user creation", extra={"email": email})
         
         # Check if user already exists
         if email in self._users:
-            print(f"User {email} already exists")
+            logger.info("User already exists", extra={"email": email})
             return None
         
         # Create mock user
@@ -90,9 +98,23 @@ class AuthService:
                 )
         return None
     
+    async def update_user_profile(self, user_id: str, updates: Dict[str, Any]) -> Optional[User]:
+        """
+        Update profile fields for a user (mock implementation)
+        The merged profile is validated before it is stored, so a bad update
+        raises ValidationError and leaves the stored profile untouched
+        """
+        for user_data in self._users.values():
+            if user_data["id"] == user_id:
+                profile = UserProfile(**{**user_data["profile"], **updates})
+                user_data["profile"] = profile.dict()
+                user_data["updated_at"] = datetime.utcnow().isoformat()
+                return await self.get_user_by_id(user_id)
+        return None
+    
     async def register_webauthn_begin(self, user_id: str) -> Dict[str, Any]:
         """Begin WebAuthn registration (mock implementation)"""
-        print(f"Mock WebAuthn registration begin for user: {user_id}")
+        logger.debug("Mock WebAuthn registration begin", extra={"user_id": user_id})
         
         # Generate mock challenge
         challenge = base64.urlsafe_b64encode(secrets.token_bytes(32)).decode('utf-8')
@@ -118,7 +140,7 @@ class AuthService:
     
     async def register_webauthn_complete(self, user_id: str, credential_data: Dict[str, Any], challenge_id: str) -> bool:
         """Complete WebAuthn registration (mock implementation)"""
-        print(f"Mock WebAuthn registration complete for user: {user_id}")
+        logger.debug("Mock WebAuthn registration complete", extra={"user_id": user_id})
         
         # Mock verification - always succeed
         credential_id = credential_data.get('id', str(uuid.uuid4()))
@@ -140,7 +162,7 @@ class AuthService:
     
     async def authenticate_webauthn_begin(self, email: str) -> Dict[str, Any]:
         """Begin WebAuthn authentication (mock implementation)"""
-        print(f"Mock WebAuthn authentication begin for: {email}")
+        logger.debug("Mock WebAuthn authentication begin", extra={"email": email})
         
         # Find user
         if email not in self._users:
@@ -179,7 +201,7 @@ class AuthService:
     
     async def authenticate_webauthn_complete(self, email: str, credential_data: Dict[str, Any], challenge_id: str) -> Optional[User]:
         """Complete WebAuthn authentication (mock implementation)"""
-        print(f"Mock WebAuthn authentication complete for: {email}")
+        logger.debug("Mock WebAuthn authentication complete", extra={"email": email})
         
         # Find user
         if email not in self._users:
@@ -234,14 +256,13 @@ class AuthService:
     async def get_current_user(self, token: str) -> Optional[User]:
         """Get current user from JWT token"""
         payload = self.decode_access_token(token)
-        if payload is None:
-            return None
-        
-        user_id = payload.get("sub")
-        if user_id is None:
+        if payload is None or payload.get("sub") is None:
+            AUTH_TOKEN_CHECKS.inc(outcome="invalid_token")
             return None
         
-        return await self.get_user_by_id(user_id)
+        user = await self.get_user_by_id(payload["sub"])
+        AUTH_TOKEN_CHECKS.inc(outcome="ok" if user else "unknown_user")
+        return user
     
     # API-Expected Method Wrappers
     async def start_webauthn_registration(self, user_id: str, email: str, display_name: str) -> Dict[str, Any]:
@@ -0,0 +1,240 @@
+"""
+Daily briefing scheduler for lifeOS backend
+Precomputes briefings shortly before each timezone's local morning, in batches
+"""
+
+import asyncio
+import json
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
+
+from app.core.config import settings
+from app.core.database import Database, database
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.models.user import User
+from app.services.ai_service import AIService, ai_service
+from app.services.firebase_service import FirebaseService, firebase_service
+
+logger = get_logger(__name__)
+
+BRIEFING_CACHE_HITS = metrics.counter("briefing_cache_hits_total", "Briefings served from the precomputed cache")
+BRIEFING_CACHE_MISSES = metrics.counter("briefing_cache_misses_total", "Briefings generated on request")
+BRIEFINGS_PRECOMPUTED = metrics.counter("briefings_precomputed_total", "Briefings generated ahead of local morning")
+
+FIRESTORE_IN_LIMIT = 30  # Max values in one Firestore "in" filter
+BRIEFING_RETENTION_DAYS = 2
+
+
+def _zone(name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo("UTC")
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class BriefingService:
+    """Serves daily briefings from a per-user, per-local-date cache"""
+
+    def __init__(
+        self,
+        db: Database = database,
+        ai: AIService = ai_service,
+        firebase: FirebaseService = firebase_service,
+        local_hour: Optional[int] = None,
+        lead_minutes: Optional[int] = None,
+        catchup_hours: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        tick_seconds: float = 60.0,
+    ):
+        self.db = db
+        self.ai = ai
+        self.firebase = firebase
+        self.local_hour = settings.BRIEFING_LOCAL_HOUR if local_hour is None else local_hour
+        self.lead_minutes = settings.BRIEFING_LEAD_MINUTES if lead_minutes is None else lead_minutes
+        self.catchup_hours = settings.BRIEFING_CATCHUP_HOURS if catchup_hours is None else catchup_hours
+        self.batch_size = batch_size or settings.BRIEFING_BATCH_SIZE
+        self.tick_seconds = tick_seconds
+
+        self._zones = sorted(available_timezones())
+        self._handled: Dict[str, date] = {}  # timezone -> local date already precomputed
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def local_date(timezone_name: str, now: Optional[datetime] = None) -> date:
+        now = now or datetime.now(timezone.utc)
+        return now.astimezone(_zone(timezone_name)).date()
+
+    def due_timezones(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        Timezones whose precompute window [local_hour - lead, local_hour + catchup)
+        is open and not yet handled today. Zones sharing a UTC offset open together,
+        so each tick returns whole offset buckets.
+        """
+        now = now or datetime.now(timezone.utc)
+        opens = timedelta(hours=self.local_hour) - timedelta(minutes=self.lead_minutes)
+        closes = timedelta(hours=self.local_hour + self.catchup_hours)
+
+        due = []
+        for name in self._zones:
+            local = now.astimezone(_zone(name))
+            if self._handled.get(name) == local.date():
+                continue
+            since_midnight = timedelta(hours=local.hour, minutes=local.minute, seconds=local.second)
+            if opens <= since_midnight < closes:
+                due.append(name)
+            elif since_midnight >= closes:
+                # Window missed (e.g. server was down); requests will fill the cache lazily
+                self._handled[name] = local.date()
+        return due
+
+    async def get_briefing(self, user: User) -> Dict:
+        """Cached briefing for the user's local today, generated on a miss"""
+        briefing_date = self.local_date(user.profile.timezone).isoformat()
+        row = await self.db.run(lambda conn: conn.execute(
+            "SELECT payload FROM daily_briefings WHERE user_id = ? AND briefing_date = ?",
+            (user.id, briefing_date),
+        ).fetchone())
+        if row is not None:
+            BRIEFING_CACHE_HITS.inc()
+            return json.loads(row["payload"])
+
+        BRIEFING_CACHE_MISSES.inc()
+        briefings = await self._generate([user.dict()])
+        return briefings[user.id]
+
+    async def precompute(self, zones: List[str], now: Optional[datetime] = None) -> int:
+        """Generate missing briefings for every user in the given timezones"""
+        users = []
+        for chunk in _chunks(zones, FIRESTORE_IN_LIMIT):
+            users.extend(await self.firebase.query_documents(
+                "users", filters=[("profile.timezone", "in", chunk)]
+            ))
+
+        by_date: Dict[str, List[Dict]] = {}
+        for user in users:
+            zone = (user.get("profile") or {}).get("timezone", "UTC")
+            by_date.setdefault(self.local_date(zone, now).isoformat(), []).append(user)
+
+        generated = 0
+        for briefing_date, date_users in by_date.items():
+            cached = await self._cached_user_ids([u["id"] for u in date_users], briefing_date)
+            pending = [u for u in date_users if u["id"] not in cached]
+            for batch in _chunks(pending, self.batch_size):
+                generated += len(await self._generate(batch, now))
+
+        BRIEFINGS_PRECOMPUTED.inc(generated)
+        return generated
+
+    async def run_once(self, now: Optional[datetime] = None) -> int:
+        now = now or datetime.now(timezone.utc)
+        zones = self.due_timezones(now)
+        if not zones:
+            return 0
+
+        generated = await self.precompute(zones, now)
+        for name in zones:
+            self._handled[name] = self.local_date(name, now)
+        await self._prune(now)
+        return generated
+
+    async def _cached_user_ids(self, user_ids: List[str], briefing_date: str) -> Set[str]:
+        cached: Set[str] = set()
+        for chunk in _chunks(user_ids, 500):
+            placeholders = ",".join("?" * len(chunk))
+            rows = await self.db.run(lambda conn: conn.execute(
+                f"SELECT user_id FROM daily_briefings WHERE briefing_date = ? AND user_id IN ({placeholders})",
+                (briefing_date, *chunk),
+            ).fetchall())
+            cached.update(row["user_id"] for row in rows)
+        return cached
+
+    async def _load_contexts(self, users: List[Dict]) -> List[Dict]:
+        """Briefing inputs for a batch of users, fetched with one query per collection"""
+        user_ids = [user["id"] for user in users]
+        goals: Dict[str, List[str]] = {}
+        tasks: Dict[str, List[Dict]] = {}
+        for chunk in _chunks(user_ids, FIRESTORE_IN_LIMIT):
+            for goal in await self.firebase.query_documents("goals", filters=[("owner_id", "in", chunk)]):
+                goals.setdefault(goal.get("owner_id"), []).append(goal.get("title"))
+            for task in await self.firebase.query_documents("tasks", filters=[("created_by", "in", chunk)]):
+                if task.get("status") != "done":
+                    tasks.setdefault(task.get("created_by"), []).append(
+                        {"title": task.get("title"), "due": task.get("due_date")}
+                    )
+
+        return [
+            {
+                "user_id": user["id"],
+                "name": (user.get("profile") or {}).get("display_name", "Unknown"),
+                "timezone": (user.get("profile") or {}).get("timezone", "UTC"),
+                "goals": goals.get(user["id"], []),
+                "tasks": tasks.get(user["id"], []),
+                "team_ids": user.get("team_memberships", []),
+            }
+            for user in users
+        ]
+
+    async def _generate(self, users: List[Dict], now: Optional[datetime] = None) -> Dict[str, Dict]:
+        """Generate and store briefings for one batch of users"""
+        contexts = await self._load_contexts(users)
+        briefings = await self.ai.generate_daily_briefings(contexts)
+        generated_at = datetime.utcnow().isoformat()
+
+        rows = [
+            (
+                context["user_id"],
+                self.local_date(context["timezone"], now).isoformat(),
+                context["timezone"],
+                json.dumps(briefing, default=str),
+                generated_at,
+            )
+            for context, briefing in zip(contexts, briefings)
+        ]
+        await self.db.run(lambda conn: conn.executemany(
+            """
+            INSERT OR REPLACE INTO daily_briefings (user_id, briefing_date, timezone, payload, generated_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            rows,
+        ))
+        return {context["user_id"]: briefing for context, briefing in zip(contexts, briefings)}
+
+    async def _prune(self, now: datetime):
+        cutoff = (now - timedelta(days=BRIEFING_RETENTION_DAYS)).date().isoformat()
+        await self.db.run(lambda conn: conn.execute(
+            "DELETE FROM daily_briefings WHERE briefing_date < ?", (cutoff,)
+        ))
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Error precomputing briefings")
+            await asyncio.sleep(self.tick_seconds)
+
+    async def start(self):
+        """Start the precompute loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Stop the precompute loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global briefing service instance
+briefing_service = BriefingService()
@@ -0,0 +1,440 @@
+"""
+Call session registry for lifeOS backend
+Active calls live in memory, indexed by session, chat room and channel, and are
+written through to the local SQLite database so they survive a restart.
+Channel occupancy is kept from join/leave events (API calls and Agora webhooks).
+"""
+
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.database import Database, database
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.models.call import CallSession, CallStatus
+from app.models.chat import MessageType
+from app.models.user import User
+from app.services.agora_service import AgoraService, agora_service, uid_for_user
+from app.services.chat_service import ChatService, chat_service
+from app.services.realtime_service import RealtimeService, realtime_service
+
+logger = get_logger(__name__)
+
+CALLS_ACTIVE = metrics.gauge("call_sessions_active", "Call sessions currently active")
+CALLS_REAPED = metrics.counter("call_sessions_reaped_total", "Call sessions ended by the idle/expiry reaper")
+CALL_WEBHOOK_EVENTS = metrics.counter("agora_webhook_events_total", "Agora channel events received, by type")
+
+# Agora notification event types: joins (with the member's role), leaves and channel destroy
+AGORA_JOIN_EVENTS = {103: "publisher", 105: "audience", 111: "publisher", 112: "audience"}
+AGORA_LEAVE_EVENTS = {104, 106}
+AGORA_CHANNEL_DESTROY = 102
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _row_to_session(row) -> CallSession:
+    data = dict(row)
+    data["participants"] = json.loads(data["participants"])
+    data["active_participants"] = json.loads(data["active_participants"])
+    for field in ("created_at", "updated_at", "expires_at", "ended_at"):
+        if data.get(field):
+            data[field] = datetime.fromisoformat(data[field])
+    return CallSession(**data)
+
+
+class ChannelOccupancy:
+    """Members of one Agora channel, with counts kept as O(1) counters"""
+
+    def __init__(self):
+        self.members: Dict[int, str] = {}  # uid -> "publisher" | "audience"
+        self.publishers = 0
+        self._seq: Dict[int, int] = {}
+
+    @property
+    def count(self) -> int:
+        return len(self.members)
+
+    def accept(self, uid: int, seq: Optional[int]) -> bool:
+        """False for an event older than the last one seen for uid (webhooks may arrive out of order)"""
+        if seq is None:
+            return True
+        if seq <= self._seq.get(uid, -1):
+            return False
+        self._seq[uid] = seq
+        return True
+
+    def join(self, uid: int, role: str = "publisher") -> bool:
+        previous = self.members.get(uid)
+        if previous == role:
+            return False
+        self.publishers += (role == "publisher") - (previous == "publisher")
+        self.members[uid] = role
+        return True
+
+    def leave(self, uid: int) -> bool:
+        role = self.members.pop(uid, None)
+        if role is None:
+            return False
+        self.publishers -= role == "publisher"
+        return True
+
+
+class CallRegistry:
+    """Tracks call sessions, their participants, channel occupancy and expiry"""
+
+    def __init__(
+        self,
+        db: Database = database,
+        chat: ChatService = chat_service,
+        realtime: RealtimeService = realtime_service,
+        agora: AgoraService = agora_service,
+        idle_timeout: Optional[int] = None,
+        max_duration: Optional[int] = None,
+        reaper_interval: Optional[float] = None,
+    ):
+        self.db = db
+        self.chat = chat
+        self.realtime = realtime
+        self.agora = agora
+        self.idle_timeout = timedelta(seconds=idle_timeout or settings.CALL_SESSION_IDLE_TIMEOUT)
+        self.max_duration = timedelta(seconds=max_duration or settings.CALL_SESSION_MAX_DURATION)
+        self.reaper_interval = reaper_interval or settings.CALL_REAPER_INTERVAL
+
+        # Active sessions only; ended ones are only kept in the database
+        self._sessions: Dict[str, CallSession] = {}
+        self._by_room: Dict[str, str] = {}
+        self._by_channel: Dict[str, str] = {}
+        self._occupancy: Dict[str, ChannelOccupancy] = {}
+        self._channel_users: Dict[str, Dict[int, str]] = {}  # channel -> Agora uid -> user id
+        self._task: Optional[asyncio.Task] = None
+
+    # Lookups (memory reads)
+    def get(self, session_id: str) -> Optional[CallSession]:
+        return self._sessions.get(session_id)
+
+    def get_for_room(self, chat_room_id: str) -> Optional[CallSession]:
+        """The room's active call, if any"""
+        session_id = self._by_room.get(chat_room_id)
+        return self._sessions.get(session_id) if session_id else None
+
+    def get_by_channel(self, channel_name: str) -> Optional[CallSession]:
+        session_id = self._by_channel.get(channel_name)
+        return self._sessions.get(session_id) if session_id else None
+
+    def active_sessions(self) -> List[CallSession]:
+        return list(self._sessions.values())
+
+    def occupancy(self, channel_name: str) -> Dict:
+        """Current member counts for a channel"""
+        occupancy = self._occupancy.get(channel_name)
+        count = occupancy.count if occupancy else 0
+        publishers = occupancy.publishers if occupancy else 0
+        return {
+            "channel_name": channel_name,
+            "participant_count": count,
+            "publishers": publishers,
+            "audience": count - publishers,
+            "is_active": count > 0,
+        }
+
+    # Lifecycle
+    async def start_call(self, chat_room_id: str, user: User, call_type: str = "video") -> CallSession:
+        """
+        Start a call in a chat room and post its call message.
+        A room has at most one active call; starting another joins it instead.
+        """
+        existing = self.get_for_room(chat_room_id)
+        if existing is not None:
+            return await self.join(existing.session_id, user.id)
+
+        now = datetime.utcnow()
+        session_id = str(uuid.uuid4())
+        session = CallSession(
+            session_id=session_id,
+            channel_name=f"call_{chat_room_id}_{session_id[:8]}",
+            chat_room_id=chat_room_id,
+            call_type=call_type,
+            created_by=user.id,
+            participants=[user.id],
+            active_participants=[user.id],
+            created_at=now,
+            updated_at=now,
+            expires_at=now + self.max_duration,
+        )
+        # Indexed before any await so a concurrent start in the same room joins this call
+        self._index(session)
+        try:
+            message = await self.chat.send_message(
+                room_id=chat_room_id,
+                sender=user,
+                content=f"{call_type.capitalize()} call started",
+                message_type=MessageType.CALL,
+                call_type=call_type,
+                call_status=session.status.value,
+                call_participants=session.participants,
+            )
+        except Exception:
+            self._unindex(session)
+            raise
+        session.message_id = message.id
+        await self._persist(session)
+
+        payload = message.dict()
+        payload["created_at"] = message.created_at.isoformat()
+        await self.realtime.broadcast(chat_room_id, {"type": "message", "message": payload})
+        await self._broadcast(session, "started", user.id)
+        await self._push_occupancy(session.channel_name)
+        return session
+
+    async def join(self, session_id: str, user_id: str, role: str = "publisher") -> Optional[CallSession]:
+        """Add a participant; None if the session is not active"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+
+        uid = uid_for_user(user_id)
+        self._channel_users.setdefault(session.channel_name, {})[uid] = user_id
+        occupancy_changed = self._occupancy.setdefault(session.channel_name, ChannelOccupancy()).join(uid, role)
+        if user_id in session.active_participants:
+            if occupancy_changed:
+                await self._push_occupancy(session.channel_name)
+            return session
+
+        if user_id not in session.participants:
+            session.participants.append(user_id)
+        if user_id not in session.active_participants:
+            session.active_participants.append(user_id)
+        session.updated_at = datetime.utcnow()
+        session.expires_at = session.created_at + self.max_duration
+
+        await self._persist(session)
+        await self._update_message(session)
+        await self._broadcast(session, "joined", user_id)
+        await self._push_occupancy(session.channel_name)
+        return session
+
+    async def leave(self, session_id: str, user_id: str) -> Optional[CallSession]:
+        """Remove a participant; an empty call is ended after the idle timeout"""
+        session = self._sessions.get(session_id)
+        if session is None or user_id not in session.active_participants:
+            return session
+
+        session.active_participants.remove(user_id)
+        occupancy = self._occupancy.get(session.channel_name)
+        if occupancy is not None:
+            occupancy.leave(uid_for_user(user_id))
+        session.updated_at = datetime.utcnow()
+        if not session.active_participants:
+            session.expires_at = min(
+                session.updated_at + self.idle_timeout, session.created_at + self.max_duration
+            )
+
+        await self._persist(session)
+        await self._broadcast(session, "left", user_id)
+        await self._push_occupancy(session.channel_name)
+        return session
+
+    async def end(self, session_id: str, status: CallStatus = CallStatus.ENDED) -> Optional[CallSession]:
+        """End a call and record its final status and duration on the call message"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+
+        self._unindex(session)
+        now = datetime.utcnow()
+        # A call that emptied out ended when the last participant left, not when it was reaped
+        session.ended_at = now if session.active_participants else session.updated_at
+        session.status = status
+        session.updated_at = now
+        session.active_participants = []
+
+        await self._persist(session)
+        await self._update_message(session)
+        self.agora.invalidate_channel(session.channel_name)
+        await self._broadcast(session, status.value)
+        await self._push_occupancy(session.channel_name, session.chat_room_id)
+        return session
+
+    async def channel_event(
+        self,
+        channel_name: str,
+        uid: int,
+        joined: bool,
+        role: str = "publisher",
+        seq: Optional[int] = None,
+    ) -> bool:
+        """
+        Apply a member join/leave reported by Agora.
+        Members mapped to a user of the channel's session go through join/leave
+        (so an emptied call starts its idle timer); others only move the counters.
+        Returns whether the event was applied (stale, reordered events are not).
+        """
+        occupancy = self._occupancy.setdefault(channel_name, ChannelOccupancy())
+        if not occupancy.accept(uid, seq):
+            return False
+
+        session = self.get_by_channel(channel_name)
+        user_id = self._channel_users.get(channel_name, {}).get(uid)
+        if session is not None and user_id is not None:
+            if joined:
+                await self.join(session.session_id, user_id, role)
+            else:
+                await self.leave(session.session_id, user_id)
+            return True
+
+        changed = occupancy.join(uid, role) if joined else occupancy.leave(uid)
+        if changed:
+            await self._push_occupancy(channel_name)
+        return True
+
+    async def channel_destroyed(self, channel_name: str):
+        """Agora closed the channel: everyone has left"""
+        session = self.get_by_channel(channel_name)
+        if session is not None:
+            for user_id in list(session.active_participants):
+                await self.leave(session.session_id, user_id)
+        self._occupancy.pop(channel_name, None)
+        await self._push_occupancy(channel_name)
+
+    async def handle_webhook_event(self, event: Dict) -> bool:
+        """Dispatch one Agora channel notification (eventType plus payload)"""
+        event_type = event.get("eventType")
+        payload = event.get("payload") or {}
+        channel_name = payload.get("channelName")
+        if not channel_name:
+            return False
+        CALL_WEBHOOK_EVENTS.inc(event_type=str(event_type))
+
+        if event_type == AGORA_CHANNEL_DESTROY:
+            await self.channel_destroyed(channel_name)
+            return True
+        if event_type in AGORA_JOIN_EVENTS or event_type in AGORA_LEAVE_EVENTS:
+            return await self.channel_event(
+                channel_name,
+                int(payload.get("uid", 0)),
+                joined=event_type in AGORA_JOIN_EVENTS,
+                role=AGORA_JOIN_EVENTS.get(event_type, "publisher"),
+                seq=payload.get("clientSeq"),
+            )
+        return False
+
+    async def reap(self, now: Optional[datetime] = None) -> int:
+        """End every session past its expiry (empty for too long, or over the max duration)"""
+        now = now or datetime.utcnow()
+        expired = [session.session_id for session in self._sessions.values() if session.expires_at <= now]
+        for session_id in expired:
+            await self.end(session_id)
+        CALLS_REAPED.inc(len(expired))
+        return len(expired)
+
+    async def load(self):
+        """Rebuild the in-memory indexes from persisted active sessions"""
+        rows = await self.db.run(lambda conn: conn.execute(
+            "SELECT * FROM call_sessions WHERE status = ?", (CallStatus.ACTIVE.value,)
+        ).fetchall())
+        for row in rows:
+            self._index(_row_to_session(row))
+
+    # Internals
+    def _index(self, session: CallSession):
+        self._sessions[session.session_id] = session
+        self._by_room[session.chat_room_id] = session.session_id
+        self._by_channel[session.channel_name] = session.session_id
+        users = self._channel_users.setdefault(session.channel_name, {})
+        users.update((uid_for_user(user_id), user_id) for user_id in session.participants)
+        occupancy = self._occupancy.setdefault(session.channel_name, ChannelOccupancy())
+        for user_id in session.active_participants:
+            occupancy.join(uid_for_user(user_id))
+        CALLS_ACTIVE.set(len(self._sessions))
+
+    def _unindex(self, session: CallSession):
+        self._sessions.pop(session.session_id, None)
+        if self._by_room.get(session.chat_room_id) == session.session_id:
+            del self._by_room[session.chat_room_id]
+        self._by_channel.pop(session.channel_name, None)
+        self._occupancy.pop(session.channel_name, None)
+        self._channel_users.pop(session.channel_name, None)
+        CALLS_ACTIVE.set(len(self._sessions))
+
+    async def _persist(self, session: CallSession):
+        def write(conn):
+            # Serialized in the worker thread so the newest in-memory state always wins
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO call_sessions (
+                    session_id, channel_name, chat_room_id, call_type, status, created_by,
+                    participants, active_participants, message_id,
+                    created_at, updated_at, expires_at, ended_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    session.session_id, session.channel_name, session.chat_room_id,
+                    session.call_type, session.status.value, session.created_by,
+                    json.dumps(session.participants), json.dumps(session.active_participants),
+                    session.message_id, _iso(session.created_at), _iso(session.updated_at),
+                    _iso(session.expires_at), _iso(session.ended_at),
+                ),
+            )
+
+        await self.db.run(write)
+
+    async def _update_message(self, session: CallSession):
+        if session.message_id is None:
+            return
+        await self.chat.update_call_message(
+            session.message_id,
+            call_status=session.status.value,
+            call_participants=list(session.participants),
+            call_duration=session.duration if session.ended_at else None,
+        )
+
+    async def _broadcast(self, session: CallSession, event: str, user_id: Optional[str] = None):
+        await self.realtime.broadcast(session.chat_room_id, {
+            "type": "call",
+            "event": event,
+            "user_id": user_id,
+            "session": session.to_payload(),
+        })
+
+    async def _push_occupancy(self, channel_name: str, chat_room_id: Optional[str] = None):
+        """Send the channel's counts to its chat room (if the channel belongs to a call)"""
+        if chat_room_id is None:
+            session = self.get_by_channel(channel_name)
+            if session is None:
+                return
+            chat_room_id = session.chat_room_id
+        await self.realtime.broadcast(chat_room_id, {"type": "occupancy", **self.occupancy(channel_name)})
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.reaper_interval)
+            try:
+                await self.reap()
+            except Exception:
+                logger.exception("Error reaping call sessions")
+
+    async def start(self):
+        """Load active sessions and start the reaper"""
+        if self._task is None:
+            await self.load()
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Stop the reaper"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global call registry instance
+call_registry = CallRegistry()
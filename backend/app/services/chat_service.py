@@ -0,0 +1,387 @@
+"""
+Chat service for lifeOS backend
+Message ingestion and the per-user inbox index over the local SQLite database
+"""
+
+import json
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.core.database import Database, database
+from app.models.chat import ChatInboxEntry, ChatMessage, ChatRoomType, MessageType
+from app.models.user import User
+
+PREVIEW_LENGTH = 120
+
+
+def _now() -> str:
+    # Fixed-width timestamps so ISO strings sort chronologically
+    return datetime.utcnow().isoformat(timespec="microseconds")
+
+
+def encode_cursor(timestamp: str, row_id: str) -> str:
+    """Encode a (timestamp, id) keyset cursor for inbox and thread pages"""
+    return f"{timestamp}|{row_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a (timestamp, id) keyset cursor"""
+    timestamp, _, row_id = cursor.partition("|")
+    return timestamp, row_id
+
+
+class ChatService:
+    """Chat room, message and inbox operations"""
+
+    def __init__(self, db: Database = database):
+        self.db = db
+
+    async def create_room(
+        self,
+        creator: User,
+        participants: List[User],
+        name: Optional[str] = None,
+        room_type: ChatRoomType = ChatRoomType.GROUP,
+        team_id: Optional[str] = None,
+        project_id: Optional[str] = None,
+    ) -> Dict:
+        """Create a chat room, its participants and their inbox rows"""
+        room_id = str(uuid.uuid4())
+        now = _now()
+        members = {creator.id: creator}
+        for user in participants:
+            members.setdefault(user.id, user)
+
+        def write(conn):
+            conn.execute(
+                """
+                INSERT INTO chats (
+                    id, name, type, team_id, project_id, created_by, created_at, updated_at, last_message_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (room_id, name, room_type.value, team_id, project_id, creator.id, now, now, now),
+            )
+            conn.executemany(
+                """
+                INSERT INTO chat_participants (id, chat_id, user_id, user_name, user_avatar, is_admin, joined_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        str(uuid.uuid4()), room_id, user.id, user.profile.display_name,
+                        user.profile.avatar_url, int(user.id == creator.id), now,
+                    )
+                    for user in members.values()
+                ],
+            )
+            conn.executemany(
+                """
+                INSERT INTO chat_inbox (user_id, room_id, room_name, room_type, last_message_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [(user_id, room_id, name, room_type.value, now) for user_id in members],
+            )
+
+        await self.db.run(write)
+        return {
+            "id": room_id,
+            "name": name,
+            "room_type": room_type.value,
+            "team_id": team_id,
+            "project_id": project_id,
+            "participant_ids": list(members),
+            "created_by": creator.id,
+            "created_at": now,
+        }
+
+    async def get_room_team(self, room_id: str) -> Optional[str]:
+        """Team a room belongs to, if any"""
+        row = await self.db.run(lambda conn: conn.execute(
+            "SELECT team_id FROM chats WHERE id = ?", (room_id,)
+        ).fetchone())
+        return row["team_id"] if row else None
+
+    async def is_participant(self, room_id: str, user_id: str) -> bool:
+        """Check room membership via the (chat_id, user_id) unique index"""
+        def read(conn):
+            return conn.execute(
+                "SELECT 1 FROM chat_participants WHERE chat_id = ? AND user_id = ?",
+                (room_id, user_id),
+            ).fetchone()
+
+        return await self.db.run(read) is not None
+
+    async def get_participants(self, room_id: str) -> List[Tuple[str, str]]:
+        """Get (user_id, user_name) pairs for a room"""
+        def read(conn):
+            return conn.execute(
+                "SELECT user_id, user_name FROM chat_participants WHERE chat_id = ?",
+                (room_id,),
+            ).fetchall()
+
+        return [(row["user_id"], row["user_name"]) for row in await self.db.run(read)]
+
+    async def send_message(
+        self,
+        room_id: str,
+        sender: User,
+        content: str,
+        message_type: MessageType = MessageType.TEXT,
+        mentions: Optional[List[str]] = None,
+        reply_to_id: Optional[str] = None,
+        call_type: Optional[str] = None,
+        call_status: Optional[str] = None,
+        call_participants: Optional[List[str]] = None,
+    ) -> ChatMessage:
+        """
+        Persist a message and fan it out to every participant's inbox in one transaction.
+        Replies also bump the parent's thread_count and thread_last_reply_at.
+        Raises ValueError if reply_to_id is not a message in the same room.
+        """
+        message = ChatMessage(
+            id=str(uuid.uuid4()),
+            room_id=room_id,
+            content=content,
+            message_type=message_type,
+            sender_id=sender.id,
+            sender_name=sender.profile.display_name,
+            sender_avatar=sender.profile.avatar_url,
+            mentions=mentions or [],
+            reply_to_id=reply_to_id,
+            call_type=call_type,
+            call_status=call_status,
+            call_participants=call_participants or [],
+        )
+        created_at = message.created_at.isoformat(timespec="microseconds")
+        preview = content[:PREVIEW_LENGTH]
+
+        def write(conn):
+            if reply_to_id:
+                # Bump the parent first; rolls back the whole message if it is missing
+                bumped = conn.execute(
+                    """
+                    UPDATE chat_messages
+                    SET thread_count = thread_count + 1, thread_last_reply_at = ?
+                    WHERE id = ? AND room_id = ?
+                    """,
+                    (created_at, reply_to_id, room_id),
+                ).rowcount
+                if not bumped:
+                    raise ValueError(f"Message {reply_to_id} not found in room {room_id}")
+            
+            conn.execute(
+                """
+                INSERT INTO chat_messages (
+                    id, room_id, content, message_type, sender_id, sender_name,
+                    sender_avatar, created_at, mentions, reply_to_id,
+                    call_type, call_status, call_participants
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    message.id, room_id, content, message_type.value, sender.id,
+                    message.sender_name, message.sender_avatar, created_at,
+                    json.dumps(message.mentions), reply_to_id, call_type, call_status,
+                    json.dumps(message.call_participants) if call_type else None,
+                ),
+            )
+            conn.execute(
+                """
+                UPDATE chats
+                SET last_message_id = ?, last_message_at = ?,
+                    message_count = message_count + 1, updated_at = ?
+                WHERE id = ?
+                """,
+                (message.id, created_at, created_at, room_id),
+            )
+            # Upsert every participant's inbox row; the sender's unread count resets
+            conn.execute(
+                """
+                INSERT INTO chat_inbox (
+                    user_id, room_id, room_name, room_type, last_message_id,
+                    last_message_at, last_message_preview, last_sender_name, unread_count
+                )
+                SELECT p.user_id, p.chat_id, c.name, c.type, ?, ?, ?, ?,
+                       CASE WHEN p.user_id = ? THEN 0 ELSE 1 END
+                FROM chat_participants p JOIN chats c ON c.id = p.chat_id
+                WHERE p.chat_id = ?
+                ON CONFLICT (user_id, room_id) DO UPDATE SET
+                    last_message_id = excluded.last_message_id,
+                    last_message_at = excluded.last_message_at,
+                    last_message_preview = excluded.last_message_preview,
+                    last_sender_name = excluded.last_sender_name,
+                    unread_count = CASE
+                        WHEN excluded.user_id = ? THEN 0
+                        ELSE chat_inbox.unread_count + 1
+                    END
+                """,
+                (
+                    message.id, created_at, preview, message.sender_name,
+                    sender.id, room_id, sender.id,
+                ),
+            )
+
+        await self.db.run(write)
+        return message
+
+    async def get_messages(
+        self,
+        room_id: str,
+        limit: int = 50,
+        before: Optional[str] = None,
+    ) -> List[Dict]:
+        """Page messages newest-first through the (room_id, created_at) index"""
+        def read(conn):
+            if before:
+                rows = conn.execute(
+                    """
+                    SELECT * FROM chat_messages
+                    WHERE room_id = ? AND created_at < ?
+                    ORDER BY created_at DESC LIMIT ?
+                    """,
+                    (room_id, before, limit),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM chat_messages WHERE room_id = ? ORDER BY created_at DESC LIMIT ?",
+                    (room_id, limit),
+                ).fetchall()
+            return [self._row_to_message(row) for row in rows]
+
+        return await self.db.run(read)
+
+    async def get_thread(
+        self,
+        room_id: str,
+        message_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Optional[Dict]:
+        """
+        Fetch a root message and one page of its replies, oldest first.
+        Two indexed reads regardless of page size: primary key, then (reply_to_id, created_at).
+        Pages on a (created_at, id) keyset so replies sharing a timestamp are never skipped.
+        """
+        def read(conn):
+            root = conn.execute(
+                "SELECT * FROM chat_messages WHERE id = ? AND room_id = ?",
+                (message_id, room_id),
+            ).fetchone()
+            if root is None:
+                return None
+
+            created_at, reply_id = decode_cursor(cursor) if cursor else ("", "")
+            replies = conn.execute(
+                """
+                SELECT * FROM chat_messages
+                WHERE reply_to_id = ? AND (created_at, id) > (?, ?)
+                ORDER BY created_at, id LIMIT ?
+                """,
+                (message_id, created_at, reply_id, limit),
+            ).fetchall()
+            return root, replies
+
+        result = await self.db.run(read)
+        if result is None:
+            return None
+
+        root, replies = result
+        next_cursor = None
+        if len(replies) == limit:
+            last = replies[-1]
+            next_cursor = encode_cursor(last["created_at"], last["id"])
+        return {
+            "root": self._row_to_message(root),
+            "replies": [self._row_to_message(row) for row in replies],
+            "next_cursor": next_cursor,
+        }
+
+    async def get_inbox(
+        self,
+        user_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[ChatInboxEntry], Optional[str]]:
+        """Read one page of a user's inbox, most recent activity first"""
+        def read(conn):
+            if cursor:
+                last_message_at, room_id = decode_cursor(cursor)
+                return conn.execute(
+                    """
+                    SELECT * FROM chat_inbox
+                    WHERE user_id = ? AND (last_message_at, room_id) < (?, ?)
+                    ORDER BY last_message_at DESC, room_id DESC LIMIT ?
+                    """,
+                    (user_id, last_message_at, room_id, limit),
+                ).fetchall()
+            return conn.execute(
+                """
+                SELECT * FROM chat_inbox WHERE user_id = ?
+                ORDER BY last_message_at DESC, room_id DESC LIMIT ?
+                """,
+                (user_id, limit),
+            ).fetchall()
+
+        rows = await self.db.run(read)
+        entries = [
+            ChatInboxEntry(
+                room_id=row["room_id"],
+                room_name=row["room_name"],
+                room_type=row["room_type"],
+                last_message_id=row["last_message_id"],
+                last_message_at=datetime.fromisoformat(row["last_message_at"]),
+                last_message_preview=row["last_message_preview"],
+                last_sender_name=row["last_sender_name"],
+                unread_count=row["unread_count"],
+            )
+            for row in rows
+        ]
+
+        next_cursor = None
+        if len(rows) == limit:
+            last = rows[-1]
+            next_cursor = encode_cursor(last["last_message_at"], last["room_id"])
+        return entries, next_cursor
+
+    async def update_call_message(
+        self,
+        message_id: str,
+        call_status: str,
+        call_participants: List[str],
+        call_duration: Optional[int] = None,
+    ) -> None:
+        """Record a call's latest status, participants and (once ended) duration on its message"""
+        def write(conn):
+            conn.execute(
+                """
+                UPDATE chat_messages
+                SET call_status = ?, call_participants = ?, call_duration = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (call_status, json.dumps(call_participants), call_duration, _now(), message_id),
+            )
+
+        await self.db.run(write)
+
+    async def mark_read(self, room_id: str, user_id: str) -> None:
+        """Reset a user's unread count for a room"""
+        def write(conn):
+            conn.execute(
+                "UPDATE chat_inbox SET unread_count = 0 WHERE user_id = ? AND room_id = ?",
+                (user_id, room_id),
+            )
+
+        await self.db.run(write)
+
+    @staticmethod
+    def _row_to_message(row) -> Dict:
+        data = dict(row)
+        data["is_edited"] = bool(data.get("is_edited"))
+        for field in ("reactions", "mentions", "ai_context", "call_participants"):
+            if data.get(field):
+                data[field] = json.loads(data[field])
+        return data
+
+
+# Global chat service instance
+chat_service = ChatService()
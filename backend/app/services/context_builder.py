@@ -0,0 +1,273 @@
+"""
+Token-budget-aware context assembly for lifeOS AI prompts
+"""
+
+import heapq
+import math
+import re
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+# Note: tiktoken is optional; without it token counts are estimated
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+from app.models.chat import ChatMessage
+from app.models.document import Document
+from app.models.task import Task
+
+_TERM = re.compile(r"[a-z0-9]{3,}")
+CHARS_PER_TOKEN = 4  # Estimate used when no tokenizer is installed
+SEPARATOR_TOKENS = 1  # Newline between packed snippets
+RECENCY_REBASE_SECONDS = 30 * 24 * 3600  # Cached recency is recomputed after this long
+
+
+class ContextSnippet(BaseModel):
+    """A candidate piece of context from a task, document, chat message, etc."""
+    source_type: str
+    source_id: str
+    version: Optional[str] = None  # Changes whenever text changes; None disables caching
+    text: str
+    updated_at: Optional[datetime] = None
+    boost: float = 0.0  # Extra score for snippets that must rank high (e.g. the current task)
+
+    @property
+    def cache_key(self) -> Optional[Tuple[str, str, str]]:
+        if self.version is None:
+            return None
+        return (self.source_type, self.source_id, self.version)
+
+    @classmethod
+    def from_task(cls, task: Task) -> 'ContextSnippet':
+        text = f"Task: {task.title} [{task.status.value}, {task.priority.value}]"
+        if task.description:
+            text += f"\n{task.description}"
+        return cls(
+            source_type="task",
+            source_id=task.id,
+            version=task.updated_at.isoformat(),
+            text=text,
+            updated_at=task.last_activity or task.updated_at,
+        )
+
+    @classmethod
+    def from_document(cls, document: Document) -> 'ContextSnippet':
+        # A summary written for an older version would hide the latest edit
+        summary_current = bool(document.ai_summary) and document.ai_summary_version == document.current_version
+        body = document.ai_summary if summary_current else document.content
+        # updated_at catches title-only renames; ai_last_updated catches the summary landing
+        version = f"{document.current_version}:{document.updated_at.isoformat()}"
+        if summary_current and document.ai_last_updated:
+            version += f":{document.ai_last_updated.isoformat()}"
+        return cls(
+            source_type="document",
+            source_id=document.id,
+            version=version,
+            text=f"Document: {document.title}\n{body}",
+            updated_at=document.updated_at,
+        )
+
+    @classmethod
+    def from_chat_message(cls, message: ChatMessage) -> 'ContextSnippet':
+        updated_at = message.updated_at or message.created_at
+        return cls(
+            source_type="chat",
+            source_id=message.id,
+            version=updated_at.isoformat(),
+            text=f"{message.sender_name}: {message.content}",
+            updated_at=updated_at,
+        )
+
+
+class TokenCounter:
+    """Counts tokens, caching results per source object and version"""
+
+    def __init__(self, encoding: str = "cl100k_base", max_cached: int = 50_000):
+        self.max_cached = max_cached
+        self._encoding = None
+        if TIKTOKEN_AVAILABLE:
+            try:
+                self._encoding = tiktoken.get_encoding(encoding)
+            except Exception:
+                self._encoding = None
+        self._cache: "OrderedDict[Hashable, int]" = OrderedDict()
+
+    def count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return max(1, math.ceil(len(text) / CHARS_PER_TOKEN)) if text else 0
+
+    def count_cached(self, key: Optional[Hashable], text: str) -> int:
+        if key is None:
+            return self.count(text)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+        tokens = self.count(text)
+        self._cache[key] = tokens
+        if len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return tokens
+
+
+class ContextBuilder:
+    """Ranks snippets by relevance and recency and packs them greedily into a token budget"""
+
+    def __init__(
+        self,
+        token_counter: Optional[TokenCounter] = None,
+        recency_half_life_hours: float = 72.0,
+        recency_weight: float = 0.5,
+        max_cached_terms: int = 50_000,
+        max_cached_queries: int = 16,
+        max_skips: int = 64,
+    ):
+        self.tokens = token_counter or TokenCounter()
+        self.recency_half_life_hours = recency_half_life_hours
+        self.recency_weight = recency_weight
+        self.max_cached_terms = max_cached_terms
+        self.max_cached_queries = max_cached_queries
+        self.max_skips = max_skips
+        # exp(decay * age_seconds) halves every recency_half_life_hours
+        self._decay = math.log(0.5) / (recency_half_life_hours * 3600)
+        # Recency is cached relative to this instant and rescaled by one factor per build
+        self._epoch = datetime.utcnow()
+        # source key -> (terms, 1 / sqrt(term count), updated_at, recency at _epoch)
+        self._features: Dict[Hashable, Tuple[FrozenSet[str], float, Optional[datetime], float]] = {}
+        # query terms -> {source key: (relevance, recency at _epoch, updated_at)}, most recently used last
+        self._scores: "OrderedDict[FrozenSet[str], Dict[Hashable, Tuple[float, float, Optional[datetime]]]]" = OrderedDict()
+
+    @staticmethod
+    def terms(text: str) -> FrozenSet[str]:
+        return frozenset(_TERM.findall(text.lower()))
+
+    def _snippet_features(
+        self, snippet: ContextSnippet, key: Optional[Hashable]
+    ) -> Tuple[FrozenSet[str], float, Optional[datetime], float]:
+        cached = self._features.get(key) if key is not None else None
+        if cached is not None and cached[2] == snippet.updated_at:
+            return cached
+        terms = self.terms(snippet.text) if cached is None else cached[0]
+        recency = 0.0
+        if snippet.updated_at is not None:
+            exponent = self._decay * (self._epoch - snippet.updated_at).total_seconds()
+            recency = self.recency_weight * math.exp(min(exponent, 700.0))
+        features = (terms, 1 / math.sqrt(len(terms)) if terms else 0.0, snippet.updated_at, recency)
+        if key is not None:
+            self._features[key] = features
+            if len(self._features) > self.max_cached_terms:
+                # Evict oldest-inserted; stale versions age out first
+                del self._features[next(iter(self._features))]
+        return features
+
+    def _score_cache(self, query_terms: FrozenSet[str]) -> Dict[Hashable, Tuple[float, float, Optional[datetime]]]:
+        """Per-snippet score parts already computed for this query"""
+        cached = self._scores.get(query_terms)
+        if cached is None:
+            cached = self._scores[query_terms] = {}
+            if len(self._scores) > self.max_cached_queries:
+                self._scores.popitem(last=False)
+        else:
+            self._scores.move_to_end(query_terms)
+            if len(cached) > self.max_cached_terms:
+                cached.clear()
+        return cached
+
+    def _recency_scale(self, now: datetime) -> float:
+        """Factor turning recency cached at _epoch into recency at `now`"""
+        elapsed = (now - self._epoch).total_seconds()
+        if abs(elapsed) > RECENCY_REBASE_SECONDS:
+            # Keep the cached exponents in floating-point range for long-lived builders
+            self._epoch = now
+            self._features.clear()
+            self._scores.clear()
+            return 1.0
+        return math.exp(self._decay * elapsed)
+
+    def score(self, snippet: ContextSnippet, query_terms: FrozenSet[str], now: datetime) -> float:
+        """Term-overlap relevance plus exponentially decaying recency"""
+        scale = self._recency_scale(now)
+        terms, inverse_norm, _, recency = self._snippet_features(snippet, snippet.cache_key)
+        relevance = len(query_terms & terms) * inverse_norm if query_terms else 0.0
+        # Capped at the weight: snippets dated after `now` count as brand new
+        return relevance + min(self.recency_weight, recency * scale) + snippet.boost
+
+    def pack(
+        self,
+        snippets: List[ContextSnippet],
+        budget: int,
+        query: str = "",
+        now: Optional[datetime] = None,
+    ) -> List[ContextSnippet]:
+        """
+        Choose the highest-scoring snippets that fit in `budget` tokens.
+        Scoring is one pass over the candidates; each snippet's relevance and
+        recency are cached per query and source version, so a repeated build only
+        rescales recency. A heap then yields snippets best-first so token counts
+        are only looked up for snippets actually considered.
+        """
+        if budget <= 0 or not snippets:
+            return []
+
+        now = now or datetime.utcnow()
+        query_terms = self.terms(query)
+        scale = self._recency_scale(now)
+        # key -> (relevance, recency at _epoch, updated_at) for this query
+        scores = self._score_cache(query_terms)
+        weight = self.recency_weight
+        heap = []
+        for index, snippet in enumerate(snippets):
+            version = snippet.version
+            key = (snippet.source_type, snippet.source_id, version) if version is not None else None
+            updated_at = snippet.updated_at
+            cached = scores.get(key) if key is not None else None
+            if cached is None or cached[2] != updated_at:
+                terms, inverse_norm, _, recency = self._snippet_features(snippet, key)
+                relevance = len(query_terms & terms) * inverse_norm if query_terms else 0.0
+                cached = (relevance, recency, updated_at)
+                if key is not None:
+                    scores[key] = cached
+            score = cached[0] + min(weight, cached[1] * scale) + snippet.boost
+            heap.append((-score, index, key))
+        heapq.heapify(heap)
+
+        chosen = []
+        remaining = budget
+        skipped = 0
+        while heap and remaining > SEPARATOR_TOKENS and skipped < self.max_skips:
+            _, index, key = heapq.heappop(heap)
+            snippet = snippets[index]
+            cost = self.tokens.count_cached(key, snippet.text) + SEPARATOR_TOKENS
+            if cost <= remaining:
+                chosen.append(snippet)
+                remaining -= cost
+            else:
+                # Budget is nearly full; stop after a run of snippets that do not fit
+                skipped += 1
+        return chosen
+
+    def build(
+        self,
+        snippets: List[ContextSnippet],
+        budget: int,
+        query: str = "",
+        header: Optional[List[str]] = None,
+        now: Optional[datetime] = None,
+    ) -> str:
+        """Render a header plus the packed snippets as one context string"""
+        parts = list(header or [])
+        used = sum(self.tokens.count(part) for part in parts)
+        packed = self.pack(snippets, budget - used, query, now)
+        parts.extend(snippet.text for snippet in packed)
+        return "\n".join(parts)
+
+
+# Global context builder instance
+context_builder = ContextBuilder()
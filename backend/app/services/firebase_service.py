@@ -2,8 +2,10 @@
 Firebase service for Firestore operations
 """
 
+import functools
 import json
 import os
+import time
 from typing import Dict, List, Optional, Any, Type, TypeVar
 from datetime import datetime
 
@@ -17,9 +19,32 @@ except ImportError:
     FIREBASE_AVAILABLE = False
 
 from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import metrics
 
 T = TypeVar('T')
 
+logger = get_logger(__name__)
+
+FIRESTORE_CALLS = metrics.counter("firestore_calls_total", "Firestore operations by operation and collection")
+FIRESTORE_ERRORS = metrics.counter("firestore_errors_total", "Firestore operations that failed")
+FIRESTORE_SECONDS = metrics.histogram("firestore_call_seconds", "Firestore operation latency by operation")
+
+
+def _tracked(op: str):
+    """Count and time a Firestore operation whose first argument is the collection"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(self, collection: str, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(self, collection, *args, **kwargs)
+            finally:
+                FIRESTORE_CALLS.inc(op=op, collection=collection)
+                FIRESTORE_SECONDS.observe(time.perf_counter() - started, op=op)
+        return wrapper
+    return decorator
+
 
 class FirebaseService:
     """Firebase service for Firestore operations"""
@@ -27,11 +52,15 @@ class FirebaseService:
     def __init__(self):
         self._db = None
         self._initialized = False
+        self._mock_mode_logged = False
     
     def initialize(self) -> bool:
         """Initialize Firebase connection"""
         if not FIREBASE_AVAILABLE:
-            print("Warning: Firebase dependencies not available. Using mock mode.")
+            # initialize() is retried on every access in mock mode; say so once
+            if not self._mock_mode_logged:
+                logger.warning("Firebase dependencies not available, using mock mode")
+                self._mock_mode_logged = True
             return False
         
         if self._initialized:
@@ -63,16 +92,18 @@ class FirebaseService:
                     cred = credentials.Certificate(cred_dict)
                     firebase_admin.initialize_app(cred)
                 else:
-                    print("Warning: Firebase credentials not configured. Using mock mode.")
+                    if not self._mock_mode_logged:
+                        logger.warning("Firebase credentials not configured, using mock mode")
+                        self._mock_mode_logged = True
                     return False
             
             self._db = firestore.client()
             self._initialized = True
-            print("✅ Firebase initialized successfully")
+            logger.info("Firebase initialized")
             return True
             
-        except Exception as e:
-            print(f"❌ Failed to initialize Firebase: {e}")
+        except Exception:
+            logger.exception("Failed to initialize Firebase")
             return False
     
     @property
@@ -83,24 +114,27 @@ class FirebaseService:
         return self._db
     
     # Generic CRUD operations
+    @_tracked("create")
     async def create_document(self, collection: str, document_id: str, data: Dict) -> bool:
         """Create a new document"""
         if not self.db:
-            print(f"Mock: Creating document {document_id} in {collection}")
+            logger.debug("Mock create document", extra={"collection": collection, "document_id": document_id})
             return True
         
         try:
             doc_ref = self.db.collection(collection).document(document_id)
             doc_ref.set(data)
             return True
-        except Exception as e:
-            print(f"Error creating document: {e}")
+        except Exception:
+            FIRESTORE_ERRORS.inc(op="create")
+            logger.exception("Error creating document", extra={"collection": collection, "document_id": document_id})
             return False
     
+    @_tracked("get")
     async def get_document(self, collection: str, document_id: str) -> Optional[Dict]:
         """Get a document by ID"""
         if not self.db:
-            print(f"Mock: Getting document {document_id} from {collection}")
+            logger.debug("Mock get document", extra={"collection": collection, "document_id": document_id})
             return None
         
         try:
@@ -110,38 +144,44 @@ class FirebaseService:
             if doc.exists:
                 return doc.to_dict()
             return None
-        except Exception as e:
-            print(f"Error getting document: {e}")
+        except Exception:
+            FIRESTORE_ERRORS.inc(op="get")
+            logger.exception("Error getting document", extra={"collection": collection, "document_id": document_id})
             return None
     
+    @_tracked("update")
     async def update_document(self, collection: str, document_id: str, data: Dict) -> bool:
         """Update a document"""
         if not self.db:
-            print(f"Mock: Updating document {document_id} in {collection}")
+            logger.debug("Mock update document", extra={"collection": collection, "document_id": document_id})
             return True
         
         try:
             doc_ref = self.db.collection(collection).document(document_id)
             doc_ref.update(data)
             return True
-        except Exception as e:
-            print(f"Error updating document: {e}")
+        except Exception:
+            FIRESTORE_ERRORS.inc(op="update")
+            logger.exception("Error updating document", extra={"collection": collection, "document_id": document_id})
             return False
     
+    @_tracked("delete")
     async def delete_document(self, collection: str, document_id: str) -> bool:
         """Delete a document"""
         if not self.db:
-            print(f"Mock: Deleting document {document_id} from {collection}")
+            logger.debug("Mock delete document", extra={"collection": collection, "document_id": document_id})
             return True
         
         try:
             doc_ref = self.db.collection(collection).document(document_id)
             doc_ref.delete()
             return True
-        except Exception as e:
-            print(f"Error deleting document: {e}")
+        except Exception:
+            FIRESTORE_ERRORS.inc(op="delete")
+            logger.exception("Error deleting document", extra={"collection": collection, "document_id": document_id})
             return False
     
+    @_tracked("query")
     async def query_documents(
         self, 
         collection: str, 
@@ -151,7 +191,7 @@ class FirebaseService:
     ) -> List[Dict]:
         """Query documents with filters"""
         if not self.db:
-            print(f"Mock: Querying documents from {collection}")
+            logger.debug("Mock query documents", extra={"collection": collection})
             return []
         
         try:
@@ -179,8 +219,9 @@ class FirebaseService:
                 results.append(doc_data)
             
             return results
-        except Exception as e:
-            print(f"Error querying documents: {e}")
+        except Exception:
+            FIRESTORE_ERRORS.inc(op="query")
+            logger.exception("Error querying documents", extra={"collection": collection})
             return []
     
     # Collection-specific methods
@@ -240,7 +281,7 @@ class FirebaseService:
     def listen_to_collection(self, collection: str, callback):
         """Set up real-time listener for a collection"""
         if not self.db:
-            print(f"Mock: Setting up listener for {collection}")
+            logger.debug("Mock collection listener", extra={"collection": collection})
             return
         
         # This would be implemented for real-time updates
@@ -0,0 +1,267 @@
+"""
+Pooled HTTP clients for upstream AI providers
+One keep-alive httpx.AsyncClient per provider, with a retry budget and optional hedging
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional
+
+import httpx
+from pydantic import BaseModel
+
+# Note: HTTP/2 needs the h2 package (httpx[http2]); without it clients use HTTP/1.1 keep-alive
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+HTTP_CLIENT_REQUESTS = metrics.counter("http_client_requests_total", "Upstream HTTP attempts by provider and outcome")
+HTTP_CLIENT_RETRIES = metrics.counter("http_client_retries_total", "Upstream HTTP retries")
+HTTP_CLIENT_HEDGES = metrics.counter("http_client_hedges_total", "Hedged (duplicate) upstream requests sent")
+HTTP_CLIENT_BUDGET_EXHAUSTED = metrics.counter(
+    "http_client_retry_budget_exhausted_total", "Retries or hedges skipped because the retry budget was spent"
+)
+HTTP_CLIENT_SECONDS = metrics.histogram("http_client_request_seconds", "Upstream HTTP latency including retries")
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class ProviderConfig(BaseModel):
+    """Connection settings for one upstream provider"""
+    name: str
+    base_url: str
+    headers: Dict[str, str] = {}
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 60.0
+    write_timeout: float = 10.0
+    pool_timeout: float = 5.0
+
+
+def default_providers() -> Dict[str, ProviderConfig]:
+    common = dict(
+        max_connections=settings.HTTP_PROVIDER_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_PROVIDER_MAX_KEEPALIVE,
+        connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+        read_timeout=settings.HTTP_READ_TIMEOUT,
+    )
+    return {
+        "openai": ProviderConfig(
+            name="openai",
+            base_url=settings.OPENAI_BASE_URL,
+            headers={"Authorization": f"Bearer {settings.OPENAI_API_KEY}"} if settings.OPENAI_API_KEY else {},
+            **common,
+        ),
+        "anthropic": ProviderConfig(
+            name="anthropic",
+            base_url=settings.ANTHROPIC_BASE_URL,
+            headers={
+                "anthropic-version": "2023-06-01",
+                **({"x-api-key": settings.ANTHROPIC_API_KEY} if settings.ANTHROPIC_API_KEY else {}),
+            },
+            **common,
+        ),
+    }
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of recent first attempts (plus a small floor),
+    so a struggling provider sees at most (1 + ratio)x its normal load.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, window: float = 10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window = window
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+
+    def _trim(self, now: float):
+        cutoff = now - self.window
+        for events in (self._requests, self._retries):
+            while events and events[0] < cutoff:
+                events.popleft()
+
+    def record_request(self):
+        self._requests.append(time.monotonic())
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget if any is left"""
+        now = time.monotonic()
+        self._trim(now)
+        allowed = len(self._requests) * self.ratio + self.min_per_second * self.window
+        if len(self._retries) >= allowed:
+            return False
+        self._retries.append(now)
+        return True
+
+
+class HTTPClientPool:
+    """Lifespan-managed, per-provider keep-alive clients"""
+
+    def __init__(
+        self,
+        providers: Optional[Dict[str, ProviderConfig]] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: float = 0.25,
+        backoff_max: float = 8.0,
+        budget_ratio: Optional[float] = None,
+        http2: Optional[bool] = None,
+    ):
+        self.providers = providers if providers is not None else default_providers()
+        self.max_retries = settings.HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        budget_ratio = settings.HTTP_RETRY_BUDGET_RATIO if budget_ratio is None else budget_ratio
+        self.http2 = (settings.HTTP_HTTP2 if http2 is None else http2) and HTTP2_AVAILABLE
+        self.budgets = {name: RetryBudget(budget_ratio) for name in self.providers}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def client(self, provider: str) -> httpx.AsyncClient:
+        """The shared client for a provider (created on first use)"""
+        client = self._clients.get(provider)
+        if client is None:
+            config = self.providers[provider]
+            client = self._clients[provider] = httpx.AsyncClient(
+                base_url=config.base_url,
+                headers=config.headers,
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=config.max_connections,
+                    max_keepalive_connections=config.max_keepalive_connections,
+                    keepalive_expiry=config.keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(
+                    connect=config.connect_timeout,
+                    read=config.read_timeout,
+                    write=config.write_timeout,
+                    pool=config.pool_timeout,
+                ),
+            )
+        return client
+
+    def backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After when sent"""
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(self.backoff_max, float(retry_after))
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _attempt(self, provider: str, method: str, url: str, **kwargs) -> httpx.Response:
+        try:
+            response = await self.client(provider).request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            HTTP_CLIENT_REQUESTS.inc(provider=provider, outcome=type(e).__name__)
+            raise
+        HTTP_CLIENT_REQUESTS.inc(provider=provider, outcome=str(response.status_code))
+        return response
+
+    async def _hedged(self, provider: str, hedge_after: float, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a second copy if the first is slower than hedge_after; first to finish wins"""
+        first = asyncio.ensure_future(self._attempt(provider, method, url, **kwargs))
+        done, _ = await asyncio.wait({first}, timeout=hedge_after)
+        if done or not self.budgets[provider].try_spend():
+            if not done:
+                HTTP_CLIENT_BUDGET_EXHAUSTED.inc(provider=provider)
+            return await first
+
+        HTTP_CLIENT_HEDGES.inc(provider=provider)
+        second = asyncio.ensure_future(self._attempt(provider, method, url, **kwargs))
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result().status_code not in RETRYABLE_STATUS:
+                        return task.result()
+            # Both failed or were retryable; surface the first copy's outcome
+            return first.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def request(
+        self,
+        provider: str,
+        method: str,
+        url: str,
+        retries: Optional[int] = None,
+        hedge_after: Optional[float] = None,
+        **kwargs
+    ) -> httpx.Response:
+        """
+        Send a request on the provider's pooled client.
+        Transport errors and 429/5xx responses are retried with jittered backoff
+        while the provider's retry budget allows. With hedge_after (seconds),
+        a duplicate request is raced against a slow first attempt; only use it
+        for idempotent or deduplicated calls.
+        """
+        retries = self.max_retries if retries is None else retries
+        budget = self.budgets[provider]
+        budget.record_request()
+        started = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                response = None
+                error = None
+                try:
+                    if hedge_after is not None:
+                        response = await self._hedged(provider, hedge_after, method, url, **kwargs)
+                    else:
+                        response = await self._attempt(provider, method, url, **kwargs)
+                    if response.status_code not in RETRYABLE_STATUS:
+                        return response
+                except httpx.TransportError as e:
+                    error = e
+
+                if attempt >= retries:
+                    if error is not None:
+                        raise error
+                    return response
+                if not budget.try_spend():
+                    HTTP_CLIENT_BUDGET_EXHAUSTED.inc(provider=provider)
+                    if error is not None:
+                        raise error
+                    return response
+
+                HTTP_CLIENT_RETRIES.inc(provider=provider)
+                delay = self.backoff(attempt, response)
+                if response is not None:
+                    await response.aclose()
+                await asyncio.sleep(delay)
+                attempt += 1
+        finally:
+            HTTP_CLIENT_SECONDS.observe(time.perf_counter() - started, provider=provider)
+
+    @asynccontextmanager
+    async def stream(self, provider: str, method: str, url: str, **kwargs):
+        """Stream a response body (e.g. SSE tokens); not retried once bytes flow"""
+        async with self.client(provider).stream(method, url, **kwargs) as response:
+            HTTP_CLIENT_REQUESTS.inc(provider=provider, outcome=str(response.status_code))
+            yield response
+
+    async def close(self):
+        """Close every pooled connection (application shutdown)"""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+# Global provider HTTP client pool
+http_client_pool = HTTPClientPool()
@@ -0,0 +1,218 @@
+"""
+Chat message preprocessing for lifeOS backend
+One Aho-Corasick scan per message yields AI triggers, @mentions, links and slash-commands
+"""
+
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+# Phrases that address the AI assistant (matched case-insensitively, anywhere in the text)
+AI_TRIGGERS = ["@ai", "@assistant", "@chotu", "hey ai", "ai help"]
+
+LINK_PREFIXES = ["http://", "https://", "www."]
+LINK_TRAILING_PUNCTUATION = ".,;:!?)]}'\""
+
+_NON_SPACE = re.compile(r"\S*")
+_COMMAND = re.compile(r"/([A-Za-z][\w-]*)\s*(.*)", re.DOTALL)
+
+# Pattern kinds stored in automaton outputs
+_TRIGGER = 0
+_MENTION = 1
+_LINK = 2
+
+
+class SlashCommand(BaseModel):
+    """Slash-command parsed from the start of a message"""
+    name: str
+    args: str = ""
+
+
+class ProcessedMessage(BaseModel):
+    """Everything extracted from a chat message in one pass"""
+    ai_triggers: List[str] = Field(default_factory=list)
+    mentions: List[str] = Field(default_factory=list)  # Resolved user IDs
+    links: List[str] = Field(default_factory=list)
+    command: Optional[SlashCommand] = None
+
+    @property
+    def is_ai_mention(self) -> bool:
+        return bool(self.ai_triggers)
+
+
+class AhoCorasick:
+    """
+    Case-insensitive multi-pattern automaton compiled to a DFA.
+    Transitions are stored for both cases of every pattern character, so the
+    input is never lower-cased; characters outside the alphabet reset to the root.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Tuple[int, str]]]):
+        children: List[Dict[str, int]] = [{}]
+        outputs: List[List[Tuple[int, Tuple[int, str]]]] = [[]]
+
+        for pattern, payload in patterns:
+            pattern = pattern.lower()
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                nxt = children[state].get(ch)
+                if nxt is None:
+                    nxt = len(children)
+                    children[state][ch] = nxt
+                    children.append({})
+                    outputs.append([])
+                state = nxt
+            outputs[state].append((len(pattern), payload))
+
+        alphabet = set()
+        for edges in children:
+            for ch in edges:
+                alphabet.add(ch)
+                alphabet.add(ch.upper())
+
+        # Breadth-first construction of failure links and the full transition table
+        delta: List[Dict[str, int]] = [{} for _ in children]
+        fail = [0] * len(children)
+        queue = []
+        for ch, nxt in children[0].items():
+            queue.append(nxt)
+        for ch in alphabet:
+            delta[0][ch] = children[0].get(ch.lower(), 0)
+
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            outputs[state].extend(outputs[fail[state]])
+            for ch, nxt in children[state].items():
+                fail[nxt] = delta[fail[state]][ch]
+                queue.append(nxt)
+            fallback = delta[fail[state]]
+            edges = children[state]
+            table = delta[state]
+            for ch in alphabet:
+                nxt = edges.get(ch.lower())
+                table[ch] = nxt if nxt is not None else fallback[ch]
+
+        # Drop root-only transitions to keep per-state dicts small
+        self.delta = [{ch: nxt for ch, nxt in table.items() if nxt} for table in delta]
+        self.outputs = [tuple(out) if out else None for out in outputs]
+
+
+class MessageProcessor:
+    """Builds (and caches per room) the automaton and runs the single scan"""
+
+    def __init__(self, ai_triggers: Optional[List[str]] = None, max_cached_rooms: int = 1024):
+        self.ai_triggers = ai_triggers or AI_TRIGGERS
+        self.max_cached_rooms = max_cached_rooms
+        self._base = self._build([])
+        self._room_automata: "OrderedDict[str, Tuple[Tuple, AhoCorasick]]" = OrderedDict()
+
+    def _build(self, participants: Iterable[Tuple[str, str]]) -> AhoCorasick:
+        patterns = [(trigger, (_TRIGGER, trigger)) for trigger in self.ai_triggers]
+        patterns.extend((prefix, (_LINK, prefix)) for prefix in LINK_PREFIXES)
+        for user_id, name in participants:
+            if not name:
+                continue
+            name = name.strip().lower()
+            patterns.append(("@" + name, (_MENTION, user_id)))
+            compact = "".join(name.split())
+            if compact != name:
+                patterns.append(("@" + compact, (_MENTION, user_id)))
+        return AhoCorasick(patterns)
+
+    def automaton_for(self, room_id: Optional[str], participants: List[Tuple[str, str]]) -> AhoCorasick:
+        """Get the room's automaton, rebuilding it only when the participant set changes"""
+        if room_id is None or not participants:
+            return self._base
+
+        key = tuple(sorted(participants))
+        cached = self._room_automata.get(room_id)
+        if cached is not None and cached[0] == key:
+            self._room_automata.move_to_end(room_id)
+            return cached[1]
+
+        automaton = self._build(participants)
+        self._room_automata[room_id] = (key, automaton)
+        self._room_automata.move_to_end(room_id)
+        if len(self._room_automata) > self.max_cached_rooms:
+            self._room_automata.popitem(last=False)
+        return automaton
+
+    def process(
+        self,
+        content: str,
+        room_id: Optional[str] = None,
+        participants: Optional[List[Tuple[str, str]]] = None,
+    ) -> ProcessedMessage:
+        """Scan a message once; participants are (user_id, display_name) pairs"""
+        automaton = self.automaton_for(room_id, participants or [])
+        delta = automaton.delta
+        outputs = automaton.outputs
+
+        triggers: List[str] = []
+        links: List[str] = []
+        # Mention start index -> (length, user_id); longest name wins at each start
+        mentions: Dict[int, Tuple[int, str]] = {}
+
+        length = len(content)
+        state = 0
+        i = 0
+        while i < length:
+            state = delta[state].get(content[i], 0)
+            out = outputs[state]
+            i += 1
+            if out is None:
+                continue
+
+            for size, (kind, value) in out:
+                if kind == _TRIGGER:
+                    if value not in triggers:
+                        triggers.append(value)
+                elif kind == _MENTION:
+                    # Require word boundaries so "@al" does not match "@alice"
+                    # and "bob@alice.com" is not a mention of alice
+                    if i < length and (content[i].isalnum() or content[i] == "_"):
+                        continue
+                    start = i - size
+                    if start and (content[start - 1].isalnum() or content[start - 1] == "_"):
+                        continue
+                    current = mentions.get(start)
+                    if current is None or current[0] < size:
+                        mentions[start] = (size, value)
+                else:
+                    start = i - size
+                    end = _NON_SPACE.match(content, i).end()
+                    link = content[start:end].rstrip(LINK_TRAILING_PUNCTUATION)
+                    if len(link) > size:
+                        links.append(link)
+                    # Resume after the link so "@" inside URLs is not a mention
+                    i = end
+                    state = 0
+                    break
+
+        resolved: List[str] = []
+        for _, user_id in mentions.values():
+            if user_id not in resolved:
+                resolved.append(user_id)
+
+        command = None
+        if content[:1] == "/":
+            match = _COMMAND.match(content)
+            if match:
+                command = SlashCommand(name=match.group(1).lower(), args=match.group(2).strip())
+
+        return ProcessedMessage(
+            ai_triggers=triggers,
+            mentions=resolved,
+            links=links,
+            command=command,
+        )
+
+
+# Global message processor instance
+message_processor = MessageProcessor()
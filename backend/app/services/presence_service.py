@@ -0,0 +1,229 @@
+"""
+Presence service for lifeOS backend
+Ephemeral online/typing state kept in memory; only last_seen is persisted
+"""
+
+import asyncio
+import heapq
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.database import Database, database
+from app.core.logging import get_logger
+from app.services.realtime_service import RealtimeService, realtime_service
+
+logger = get_logger(__name__)
+
+
+class PresenceService:
+    """In-memory presence and typing store with coalesced room broadcasts"""
+
+    def __init__(
+        self,
+        db: Database = database,
+        realtime: RealtimeService = realtime_service,
+        heartbeat_interval: Optional[float] = None,
+        typing_ttl: Optional[float] = None,
+        broadcast_interval: Optional[float] = None,
+        flush_interval: Optional[float] = None,
+    ):
+        self.db = db
+        self.realtime = realtime
+        heartbeat_interval = heartbeat_interval or settings.WEBSOCKET_HEARTBEAT_INTERVAL
+        # One missed heartbeat is tolerated before a user drops offline
+        self.online_ttl = heartbeat_interval * 2
+        self.typing_ttl = typing_ttl or settings.PRESENCE_TYPING_TTL
+        self.broadcast_interval = broadcast_interval or settings.PRESENCE_BROADCAST_INTERVAL
+        self.flush_interval = flush_interval or settings.PRESENCE_LAST_SEEN_FLUSH_INTERVAL
+
+        # room_id -> user_id -> expiry (monotonic seconds)
+        self._online: Dict[str, Dict[str, float]] = {}
+        self._typing: Dict[str, Dict[str, float]] = {}
+        self._user_rooms: Dict[str, Set[str]] = {}
+        self._connections: Dict[Tuple[str, str], int] = {}
+
+        # Lazy-deletion heap of (expiry, kind, room_id, user_id)
+        self._expiry_heap: List[Tuple[float, str, str, str]] = []
+
+        self._dirty_rooms: Set[str] = set()
+        self._pending_last_seen: Dict[Tuple[str, str], str] = {}
+
+        self._tasks: List[asyncio.Task] = []
+
+    # Connection lifecycle
+    def connect(self, room_id: str, user_id: str, now: Optional[float] = None):
+        """Register a realtime connection and mark the user online"""
+        key = (room_id, user_id)
+        self._connections[key] = self._connections.get(key, 0) + 1
+        self.heartbeat(room_id, user_id, now)
+
+    def disconnect(self, room_id: str, user_id: str):
+        """Drop a realtime connection; the user goes offline with their last one"""
+        key = (room_id, user_id)
+        remaining = self._connections.get(key, 0) - 1
+        if remaining > 0:
+            self._connections[key] = remaining
+            return
+
+        self._connections.pop(key, None)
+        self._remove(self._online, room_id, user_id)
+        self._remove(self._typing, room_id, user_id)
+        self._pending_last_seen[key] = datetime.utcnow().isoformat()
+
+    # Hot path - memory only
+    def heartbeat(self, room_id: str, user_id: str, now: Optional[float] = None):
+        """Refresh a user's online TTL in a room"""
+        now = time.monotonic() if now is None else now
+        room = self._online.setdefault(room_id, {})
+        if user_id not in room:
+            self._dirty_rooms.add(room_id)
+            self._user_rooms.setdefault(user_id, set()).add(room_id)
+
+        expires_at = now + self.online_ttl
+        room[user_id] = expires_at
+        heapq.heappush(self._expiry_heap, (expires_at, "online", room_id, user_id))
+        self._pending_last_seen[(room_id, user_id)] = datetime.utcnow().isoformat()
+
+    def set_typing(self, room_id: str, user_id: str, is_typing: bool, now: Optional[float] = None):
+        """Set or clear a user's typing flag; typing also counts as a heartbeat"""
+        now = time.monotonic() if now is None else now
+        self.heartbeat(room_id, user_id, now)
+
+        if not is_typing:
+            if self._remove(self._typing, room_id, user_id):
+                self._dirty_rooms.add(room_id)
+            return
+
+        room = self._typing.setdefault(room_id, {})
+        if user_id not in room:
+            self._dirty_rooms.add(room_id)
+
+        expires_at = now + self.typing_ttl
+        room[user_id] = expires_at
+        heapq.heappush(self._expiry_heap, (expires_at, "typing", room_id, user_id))
+
+    # Queries
+    def get_room_presence(self, room_id: str) -> Dict[str, List[str]]:
+        """Current online and typing users in a room"""
+        return {
+            "online": sorted(self._online.get(room_id, {})),
+            "typing": sorted(self._typing.get(room_id, {})),
+        }
+
+    def is_online(self, user_id: str, room_id: Optional[str] = None) -> bool:
+        """Whether a user is online (in a specific room, or anywhere)"""
+        if room_id is not None:
+            return user_id in self._online.get(room_id, {})
+        return bool(self._user_rooms.get(user_id))
+
+    # Background work
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop entries whose TTL lapsed; returns number of entries expired"""
+        now = time.monotonic() if now is None else now
+        expired = 0
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, kind, room_id, user_id = heapq.heappop(heap)
+            store = self._online if kind == "online" else self._typing
+            # Skip stale heap entries superseded by a later refresh
+            if store.get(room_id, {}).get(user_id) != expires_at:
+                continue
+            self._remove(store, room_id, user_id)
+            if kind == "online":
+                self._remove(self._typing, room_id, user_id)
+            expired += 1
+        return expired
+
+    async def broadcast_dirty_rooms(self) -> int:
+        """Send one coalesced presence update per changed room"""
+        if not self._dirty_rooms:
+            return 0
+
+        dirty, self._dirty_rooms = self._dirty_rooms, set()
+        for room_id in dirty:
+            await self.realtime.broadcast(room_id, {
+                "type": "presence",
+                "room_id": room_id,
+                **self.get_room_presence(room_id),
+            })
+        return len(dirty)
+
+    async def flush_last_seen(self) -> int:
+        """Write pending last_seen values back to chat_participants in one batch"""
+        if not self._pending_last_seen:
+            return 0
+
+        pending, self._pending_last_seen = self._pending_last_seen, {}
+        rows = [(seen, room_id, user_id) for (room_id, user_id), seen in pending.items()]
+
+        def write(conn):
+            conn.executemany(
+                "UPDATE chat_participants SET last_seen = ? WHERE chat_id = ? AND user_id = ?",
+                rows,
+            )
+
+        try:
+            await self.db.run(write)
+        except Exception:
+            logger.exception("Error flushing last_seen", extra={"rows": len(rows)})
+            # Keep newer values that arrived during the failed write
+            for key, seen in pending.items():
+                self._pending_last_seen.setdefault(key, seen)
+            return 0
+        return len(rows)
+
+    async def _broadcast_loop(self):
+        while True:
+            await asyncio.sleep(self.broadcast_interval)
+            self.expire()
+            await self.broadcast_dirty_rooms()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush_last_seen()
+
+    async def start(self):
+        """Start the broadcast and write-back loops"""
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._broadcast_loop()),
+            asyncio.create_task(self._flush_loop()),
+        ]
+
+    async def stop(self):
+        """Stop background loops and flush outstanding last_seen values"""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        await self.flush_last_seen()
+
+    def _remove(self, store: Dict[str, Dict[str, float]], room_id: str, user_id: str) -> bool:
+        room = store.get(room_id)
+        if not room or user_id not in room:
+            return False
+
+        del room[user_id]
+        if not room:
+            del store[room_id]
+        self._dirty_rooms.add(room_id)
+
+        if store is self._online:
+            rooms = self._user_rooms.get(user_id)
+            if rooms is not None:
+                rooms.discard(room_id)
+                if not rooms:
+                    del self._user_rooms[user_id]
+        return True
+
+
+# Global presence service instance
+presence_service = PresenceService()
@@ -0,0 +1,302 @@
+"""
+Sender field propagation for lifeOS backend
+Rewrites denormalized chat_messages.sender_name/sender_avatar in bounded, throttled batches
+"""
+
+import asyncio
+import time
+import uuid
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.database import Database, database
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+PROGRESS_REPORT_EVERY = 20  # Batches between progress log lines
+
+
+class PropagationStatus(str, Enum):
+    """Propagation job status enumeration"""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    SUPERSEDED = "superseded"  # A newer rename for the same sender replaced this job
+    FAILED = "failed"
+
+
+class PropagationJob(BaseModel):
+    """Progress record for one sender's rewrite"""
+    id: str
+    sender_id: str
+    sender_name: str
+    sender_avatar: Optional[str] = None
+    last_rowid: int = 0  # Resume point: rows up to here are done
+    rows_updated: int = 0
+    total_rows: int = 0
+    status: PropagationStatus = PropagationStatus.PENDING
+    created_at: datetime
+    updated_at: datetime
+
+    @property
+    def progress(self) -> float:
+        """Completion percentage"""
+        if self.status == PropagationStatus.COMPLETED or self.total_rows == 0:
+            return 100.0 if self.status == PropagationStatus.COMPLETED else 0.0
+        return min(100.0, self.rows_updated * 100.0 / self.total_rows)
+
+
+class PropagationService:
+    """Background worker that applies profile changes to denormalized chat rows"""
+
+    def __init__(
+        self,
+        db: Database = database,
+        batch_size: Optional[int] = None,
+        rows_per_second: Optional[int] = None,
+    ):
+        self.db = db
+        self.batch_size = batch_size or settings.SENDER_PROPAGATION_BATCH_SIZE
+        self.rows_per_second = rows_per_second or settings.SENDER_PROPAGATION_ROWS_PER_SECOND
+        self._queue: Optional["asyncio.Queue[str]"] = None
+        self._latest_job: Dict[str, str] = {}  # sender_id -> newest job id
+        self._worker: Optional[asyncio.Task] = None
+
+    async def enqueue(
+        self,
+        sender_id: str,
+        sender_name: str,
+        sender_avatar: Optional[str] = None,
+    ) -> PropagationJob:
+        """Record a propagation job (superseding older ones for the sender) and queue it"""
+        now = datetime.utcnow()
+        job = PropagationJob(
+            id=str(uuid.uuid4()),
+            sender_id=sender_id,
+            sender_name=sender_name,
+            sender_avatar=sender_avatar,
+            created_at=now,
+            updated_at=now,
+        )
+
+        def write(conn):
+            conn.execute(
+                """
+                UPDATE sender_propagation_jobs SET status = ?, updated_at = ?
+                WHERE sender_id = ? AND status IN (?, ?)
+                """,
+                (
+                    PropagationStatus.SUPERSEDED.value, now.isoformat(), sender_id,
+                    PropagationStatus.PENDING.value, PropagationStatus.RUNNING.value,
+                ),
+            )
+            job.total_rows = conn.execute(
+                "SELECT COUNT(*) FROM chat_messages WHERE sender_id = ?",
+                (sender_id,),
+            ).fetchone()[0]
+            # Participant rows are one per room, small enough to update directly
+            conn.execute(
+                "UPDATE chat_participants SET user_name = ?, user_avatar = ? WHERE user_id = ?",
+                (sender_name, sender_avatar, sender_id),
+            )
+            conn.execute(
+                """
+                INSERT INTO sender_propagation_jobs (
+                    id, sender_id, sender_name, sender_avatar, total_rows, status, created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    job.id, sender_id, sender_name, sender_avatar, job.total_rows,
+                    job.status.value, now.isoformat(), now.isoformat(),
+                ),
+            )
+
+        await self.db.run(write)
+        self._latest_job[sender_id] = job.id
+        if self._queue is not None:
+            await self._queue.put(job.id)
+        # Without a running worker the job stays pending and is resumed by start()
+        return job
+
+    async def get_job(self, job_id: str) -> Optional[PropagationJob]:
+        """Get a job's current progress"""
+        def read(conn):
+            return conn.execute(
+                "SELECT * FROM sender_propagation_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+
+        row = await self.db.run(read)
+        return self._row_to_job(row) if row else None
+
+    async def get_latest_job(self, sender_id: str) -> Optional[PropagationJob]:
+        """Get the newest job for a sender"""
+        def read(conn):
+            return conn.execute(
+                """
+                SELECT * FROM sender_propagation_jobs WHERE sender_id = ?
+                ORDER BY created_at DESC LIMIT 1
+                """,
+                (sender_id,),
+            ).fetchone()
+
+        row = await self.db.run(read)
+        return self._row_to_job(row) if row else None
+
+    async def run_job(self, job_id: str) -> Optional[PropagationJob]:
+        """Process a job batch by batch until done, superseded or failed"""
+        job = await self.get_job(job_id)
+        if job is None or job.status in (PropagationStatus.COMPLETED, PropagationStatus.SUPERSEDED):
+            return job
+
+        self._latest_job.setdefault(job.sender_id, job.id)
+        job.status = PropagationStatus.RUNNING
+        logger.info("Propagating sender fields", extra={"sender_id": job.sender_id, "total_rows": job.total_rows})
+        batches = 0
+
+        while True:
+            if self._latest_job.get(job.sender_id) != job.id:
+                job.status = PropagationStatus.SUPERSEDED
+                await self._save_status(job)
+                return job
+
+            started = time.monotonic()
+            try:
+                processed, last_rowid = await self.db.run(lambda conn: self._apply_batch(conn, job))
+            except Exception:
+                logger.exception("Error propagating sender fields", extra={"sender_id": job.sender_id})
+                job.status = PropagationStatus.FAILED
+                await self._save_status(job)
+                return job
+
+            if last_rowid is None:
+                job.status = PropagationStatus.COMPLETED
+                await self._save_status(job)
+                logger.info(
+                    "Sender propagation complete", extra={"sender_id": job.sender_id, "rows_updated": job.rows_updated}
+                )
+                return job
+
+            job.last_rowid = last_rowid
+            job.rows_updated += processed
+            batches += 1
+            if batches % PROGRESS_REPORT_EVERY == 0:
+                logger.info(
+                    "Sender propagation progress",
+                    extra={
+                        "sender_id": job.sender_id,
+                        "rows_updated": job.rows_updated,
+                        "total_rows": job.total_rows,
+                        "progress": round(job.progress, 1),
+                    },
+                )
+
+            # Throttle to the target write rate so live chat keeps the write lock
+            budget = self.batch_size / self.rows_per_second
+            elapsed = time.monotonic() - started
+            if budget > elapsed:
+                await asyncio.sleep(budget - elapsed)
+
+    def _apply_batch(self, conn, job: PropagationJob):
+        """Rewrite one (sender_id, rowid) range and persist the resume point atomically"""
+        bounds = conn.execute(
+            """
+            SELECT MAX(rowid), COUNT(*) FROM (
+                SELECT rowid FROM chat_messages
+                WHERE sender_id = ? AND rowid > ?
+                ORDER BY rowid LIMIT ?
+            )
+            """,
+            (job.sender_id, job.last_rowid, self.batch_size),
+        ).fetchone()
+        last_rowid, count = bounds[0], bounds[1]
+        if not count:
+            return 0, None
+
+        # Rows already carrying the new values are skipped rather than rewritten
+        conn.execute(
+            """
+            UPDATE chat_messages SET sender_name = ?, sender_avatar = ?
+            WHERE sender_id = ? AND rowid > ? AND rowid <= ?
+              AND (sender_name IS NOT ? OR sender_avatar IS NOT ?)
+            """,
+            (
+                job.sender_name, job.sender_avatar, job.sender_id, job.last_rowid, last_rowid,
+                job.sender_name, job.sender_avatar,
+            ),
+        )
+        conn.execute(
+            """
+            UPDATE sender_propagation_jobs
+            SET last_rowid = ?, rows_updated = rows_updated + ?, status = ?, updated_at = ?
+            WHERE id = ?
+            """,
+            (last_rowid, count, PropagationStatus.RUNNING.value, datetime.utcnow().isoformat(), job.id),
+        )
+        return count, last_rowid
+
+    async def _save_status(self, job: PropagationJob):
+        def write(conn):
+            conn.execute(
+                "UPDATE sender_propagation_jobs SET status = ?, updated_at = ? WHERE id = ?",
+                (job.status.value, datetime.utcnow().isoformat(), job.id),
+            )
+
+        await self.db.run(write)
+
+    async def _run_worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self.run_job(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def start(self):
+        """Resume unfinished jobs from the database and start the worker"""
+        if self._worker is not None:
+            return
+
+        self._queue = asyncio.Queue()
+
+        def read(conn):
+            return conn.execute(
+                """
+                SELECT id, sender_id FROM sender_propagation_jobs
+                WHERE status IN (?, ?) ORDER BY created_at
+                """,
+                (PropagationStatus.PENDING.value, PropagationStatus.RUNNING.value),
+            ).fetchall()
+
+        for row in await self.db.run(read):
+            self._latest_job[row["sender_id"]] = row["id"]
+            await self._queue.put(row["id"])
+
+        self._worker = asyncio.create_task(self._run_worker())
+
+    async def stop(self):
+        """Stop the worker; in-flight jobs resume from their last batch on restart"""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        self._queue = None
+
+    @staticmethod
+    def _row_to_job(row) -> PropagationJob:
+        data = dict(row)
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        data["updated_at"] = datetime.fromisoformat(data["updated_at"])
+        return PropagationJob(**data)
+
+
+# Global propagation service instance
+propagation_service = PropagationService()
@@ -0,0 +1,61 @@
+"""
+Realtime (WebSocket) connection management for lifeOS backend
+"""
+
+from typing import Any, Dict, Set
+
+from fastapi import WebSocket
+
+
+class RealtimeService:
+    """Tracks WebSocket connections per chat room and per user"""
+
+    def __init__(self):
+        self._rooms: Dict[str, Set[WebSocket]] = {}
+        self._users: Dict[str, Set[WebSocket]] = {}
+
+    def connect(self, room_id: str, user_id: str, websocket: WebSocket):
+        """Register an accepted WebSocket for a room and user"""
+        self._rooms.setdefault(room_id, set()).add(websocket)
+        self._users.setdefault(user_id, set()).add(websocket)
+
+    def disconnect(self, room_id: str, user_id: str, websocket: WebSocket):
+        """Forget a WebSocket"""
+        room = self._rooms.get(room_id)
+        if room is not None:
+            room.discard(websocket)
+            if not room:
+                del self._rooms[room_id]
+
+        sockets = self._users.get(user_id)
+        if sockets is not None:
+            sockets.discard(websocket)
+            if not sockets:
+                del self._users[user_id]
+
+    def room_connection_count(self, room_id: str) -> int:
+        """Number of live connections in a room"""
+        return len(self._rooms.get(room_id, ()))
+
+    async def broadcast(self, room_id: str, payload: Dict[str, Any]) -> int:
+        """Send a JSON payload to every connection in a room"""
+        return await self._send_all(list(self._rooms.get(room_id, ())), payload)
+
+    async def send_to_user(self, user_id: str, payload: Dict[str, Any]) -> int:
+        """Send a JSON payload to every connection of a user"""
+        return await self._send_all(list(self._users.get(user_id, ())), payload)
+
+    async def _send_all(self, sockets, payload: Dict[str, Any]) -> int:
+        delivered = 0
+        for websocket in sockets:
+            try:
+                await websocket.send_json(payload)
+                delivered += 1
+            except Exception:
+                # Dead sockets are cleaned up by their own receive loop
+                continue
+        return delivered
+
+
+# Global realtime service instance
+realtime_service = RealtimeService()
@@ -0,0 +1,265 @@
+"""
+Background document summarization for lifeOS backend
+Debounced per document, durable in SQLite, run on a bounded asyncio worker pool
+"""
+
+import asyncio
+import itertools
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.database import Database, database
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.services.ai_service import AIService, ai_service
+from app.models.document import Document
+from app.services.context_builder import ContextSnippet
+from app.services.firebase_service import FirebaseService, firebase_service
+from app.services.vector_index import VectorIndex, partition_for, vector_index
+
+logger = get_logger(__name__)
+
+SUMMARY_JOBS_COMPLETED = metrics.counter("summary_jobs_completed_total", "Document summaries refreshed")
+SUMMARY_JOBS_FAILED = metrics.counter("summary_jobs_failed_total", "Document summary attempts that failed")
+SUMMARY_REQUESTS_COALESCED = metrics.counter(
+    "summary_requests_coalesced_total", "Summary requests folded into an already-queued job"
+)
+
+
+class SummaryWorker:
+    """Refreshes Document.ai_summary off the write path"""
+
+    def __init__(
+        self,
+        db: Database = database,
+        ai: AIService = ai_service,
+        firebase: FirebaseService = firebase_service,
+        index: VectorIndex = vector_index,
+        workers: Optional[int] = None,
+        debounce_seconds: Optional[float] = None,
+        max_delay_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        self.db = db
+        self.ai = ai
+        self.firebase = firebase
+        self.index = index
+        self.workers = workers or settings.SUMMARY_WORKERS
+        self.debounce_seconds = debounce_seconds if debounce_seconds is not None else settings.SUMMARY_DEBOUNCE_SECONDS
+        self.max_delay_seconds = max_delay_seconds if max_delay_seconds is not None else settings.SUMMARY_MAX_DELAY_SECONDS
+        self.max_attempts = max_attempts or settings.SUMMARY_MAX_ATTEMPTS
+
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._sequence = itertools.count()
+
+    async def schedule(
+        self,
+        document_id: str,
+        content: str,
+        version: Optional[int] = None,
+        priority: int = 0,
+    ):
+        """
+        Request a summary refresh. Repeated requests within the debounce window
+        replace the queued content and push the run time back, up to max_delay
+        after the first request, so a burst of saves yields one summarization.
+        """
+        now = time.time()
+
+        def write(conn):
+            existing = conn.execute(
+                "SELECT status FROM summary_jobs WHERE document_id = ?", (document_id,)
+            ).fetchone()
+            conn.execute(
+                """
+                INSERT INTO summary_jobs (
+                    document_id, content, version, priority, first_requested_at, run_after
+                ) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (document_id) DO UPDATE SET
+                    content = excluded.content,
+                    version = excluded.version,
+                    priority = MAX(summary_jobs.priority, excluded.priority),
+                    revision = summary_jobs.revision + 1,
+                    attempts = 0,
+                    first_requested_at = CASE WHEN summary_jobs.status = 'pending'
+                        THEN summary_jobs.first_requested_at ELSE excluded.first_requested_at END,
+                    run_after = MIN(excluded.run_after, CASE WHEN summary_jobs.status = 'pending'
+                        THEN summary_jobs.first_requested_at ELSE excluded.first_requested_at END + ?),
+                    status = 'pending'
+                """,
+                (
+                    document_id, content, version, priority, now,
+                    now + self.debounce_seconds, self.max_delay_seconds,
+                ),
+            )
+            return existing
+
+        existing = await self.db.run(write)
+        if existing is not None and existing["status"] == "pending":
+            SUMMARY_REQUESTS_COALESCED.inc()
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def get_job(self, document_id: str) -> Optional[Dict]:
+        """Get the queued job for a document, if any"""
+        row = await self.db.run(lambda conn: conn.execute(
+            """
+            SELECT document_id, version, priority, status, attempts, run_after, last_error
+            FROM summary_jobs WHERE document_id = ?
+            """,
+            (document_id,),
+        ).fetchone())
+        return dict(row) if row else None
+
+    async def _claim_due(self, limit: int) -> List[Dict]:
+        now = time.time()
+
+        def claim(conn):
+            rows = conn.execute(
+                """
+                SELECT document_id, content, version, priority, revision, attempts
+                FROM summary_jobs
+                WHERE status = 'pending' AND run_after <= ?
+                ORDER BY priority DESC, run_after
+                LIMIT ?
+                """,
+                (now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE summary_jobs SET status = 'running' WHERE document_id = ? AND revision = ?",
+                [(row["document_id"], row["revision"]) for row in rows],
+            )
+            return [dict(row) for row in rows]
+
+        return await self.db.run(claim)
+
+    async def _next_due(self) -> Optional[float]:
+        row = await self.db.run(lambda conn: conn.execute(
+            "SELECT MIN(run_after) FROM summary_jobs WHERE status = 'pending'"
+        ).fetchone())
+        return row[0] if row else None
+
+    async def _dispatch_loop(self):
+        while True:
+            timeout = self.debounce_seconds or 1.0
+            try:
+                capacity = self.workers * 2 - self._queue.qsize()
+                if capacity > 0:
+                    for job in await self._claim_due(capacity):
+                        self._queue.put_nowait((-job["priority"], next(self._sequence), job))
+
+                next_due = await self._next_due()
+                if next_due is not None:
+                    timeout = min(timeout, max(0.05, next_due - time.time()))
+            except Exception:
+                # Jobs stay in SQLite; try again after the usual wait
+                logger.exception("Error dispatching summary jobs")
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker_loop(self):
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                await self._run(job)
+            except Exception:
+                # Bookkeeping failed; the job stays 'running' until the next start requeues it
+                logger.exception("Error finishing summary job", extra={"document_id": job["document_id"]})
+            finally:
+                self._queue.task_done()
+                self._wakeup.set()
+
+    async def _run(self, job: Dict):
+        document_id = job["document_id"]
+        try:
+            summary = await self.ai.update_document_summary(job["content"], document_id, job["version"])
+            persisted = await self.firebase.update_document("documents", document_id, {
+                "ai_summary": summary,
+                "ai_last_updated": datetime.utcnow().isoformat(),
+                "ai_summary_version": job["version"],
+            })
+            if not persisted:
+                raise RuntimeError("Failed to persist summary")
+        except Exception as e:
+            await self._record_failure(job, e)
+            return
+
+        try:
+            await self._reindex(document_id)
+        except Exception:
+            # The summary is saved; the index catches up on the next save
+            logger.exception("Error re-indexing summarized document", extra={"document_id": document_id})
+
+        # A save that arrived mid-run bumped the revision; leave that job queued
+        await self.db.run(lambda conn: conn.execute(
+            "DELETE FROM summary_jobs WHERE document_id = ? AND revision = ?",
+            (document_id, job["revision"]),
+        ))
+        SUMMARY_JOBS_COMPLETED.inc()
+
+    async def _reindex(self, document_id: str):
+        """Swap the document's search snippet over to the summary just persisted"""
+        data = await self.firebase.get_document("documents", document_id)
+        if not data:
+            return
+        document = Document.from_firestore(document_id, data)
+        await self.index.upsert(
+            partition_for(team_id=document.team_id, user_id=document.owner_id),
+            ContextSnippet.from_document(document),
+        )
+
+    async def _record_failure(self, job: Dict, error: Exception):
+        SUMMARY_JOBS_FAILED.inc()
+        attempts = job["attempts"] + 1
+        status = "failed" if attempts >= self.max_attempts else "pending"
+        retry_at = time.time() + self.debounce_seconds * (2 ** attempts)
+        logger.error(
+            "Error summarizing document", exc_info=error,
+            extra={"document_id": job["document_id"], "attempt": attempts},
+        )
+
+        await self.db.run(lambda conn: conn.execute(
+            """
+            UPDATE summary_jobs SET status = ?, attempts = ?, run_after = ?, last_error = ?
+            WHERE document_id = ? AND revision = ?
+            """,
+            (status, attempts, retry_at, str(error), job["document_id"], job["revision"]),
+        ))
+
+    async def start(self):
+        """Requeue jobs interrupted by a restart and start the pool"""
+        if self._tasks:
+            return
+
+        await self.db.run(lambda conn: conn.execute(
+            "UPDATE summary_jobs SET status = 'pending' WHERE status = 'running'"
+        ))
+        self._queue = asyncio.PriorityQueue()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._dispatch_loop())]
+        self._tasks.extend(asyncio.create_task(self._worker_loop()) for _ in range(self.workers))
+
+    async def stop(self):
+        """Stop the pool; unfinished jobs stay in SQLite for the next start"""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._queue = None
+        self._wakeup = None
+
+
+# Global summary worker instance
+summary_worker = SummaryWorker()
@@ -0,0 +1,666 @@
+"""
+Workspace embedding index for lifeOS AI retrieval
+Per-partition memory-mapped float32 matrices with brute-force or IVF cosine search
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.database import Database, database
+from app.core.logging import get_logger
+from app.core.metrics import metrics
+from app.services.context_builder import ContextSnippet
+
+logger = get_logger(__name__)
+
+VECTOR_SEARCH_SECONDS = metrics.histogram("vector_search_seconds", "Embedding index query latency")
+VECTOR_UPSERTS = metrics.counter("vector_upserts_total", "Vectors written to the embedding index")
+VECTOR_IVF_TRAIN_SECONDS = metrics.histogram(
+    "vector_ivf_train_seconds", "Background IVF (re)training time per partition",
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+BRUTE_FORCE_CHUNK = 65_536  # Rows scored per matmul in brute-force mode
+RERANK_FACTOR = 4  # IVF candidates re-scored exactly per requested result
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def partition_for(team_id: Optional[str] = None, room_id: Optional[str] = None, user_id: Optional[str] = None) -> str:
+    """Partition name for content scoped to a team, else a chat room, else a user"""
+    if team_id:
+        return f"team:{team_id}"
+    if room_id:
+        return f"room:{room_id}"
+    return f"user:{user_id}"
+
+
+class HashingEmbedder:
+    """
+    Dependency-free embedder: signed feature hashing of word unigrams and bigrams.
+    Swap in a model-backed embedder with the same embed() signature for semantic recall.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            words = _WORD.findall(text.lower())
+            features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            for feature in features:
+                h = zlib.crc32(feature.encode("utf-8"))
+                vectors[i, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        return _normalize(vectors)
+
+
+class _InvertedList:
+    """Contiguous, growable block of one IVF cell's vectors (row -1 marks a stale slot)"""
+    __slots__ = ("rows", "vectors", "scales", "size")
+
+    def __init__(self, dim: int, dtype):
+        self.rows = np.empty(16, dtype=np.int64)
+        self.vectors = np.empty((16, dim), dtype=dtype)
+        self.scales = np.empty(16, dtype=np.float32)
+        self.size = 0
+
+    def append(self, rows: np.ndarray, vectors: np.ndarray, scales: np.ndarray) -> np.ndarray:
+        end = self.size + len(rows)
+        if end > len(self.rows):
+            capacity = max(end, len(self.rows) * 2)
+            for name in self.__slots__[:3]:
+                old = getattr(self, name)
+                new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+                new[:self.size] = old[:self.size]
+                setattr(self, name, new)
+        self.rows[self.size:end] = rows
+        self.vectors[self.size:end] = vectors
+        self.scales[self.size:end] = scales
+        positions = np.arange(self.size, end)
+        self.size = end
+        return positions
+
+
+class IVFIndex:
+    """
+    Inverted-file index: vectors are bucketed under their nearest k-means centroid,
+    a query scans only the nprobe closest buckets, and the best candidates are
+    re-scored exactly against the float32 matrix. With quantize, buckets hold
+    int8 codes with a per-vector scale (4x smaller than float32).
+    """
+
+    def __init__(self, centroids: np.ndarray, quantize: bool = True):
+        self.centroids = _normalize(centroids)
+        self.quantize = quantize
+        dim = centroids.shape[1]
+        dtype = np.int8 if quantize else np.float32
+        self.lists = [_InvertedList(dim, dtype) for _ in range(len(centroids))]
+        self.list_of = np.full(0, -1, dtype=np.int32)
+        self.pos_of = np.zeros(0, dtype=np.int64)
+        self.trained_size = 0
+
+    @classmethod
+    def train(
+        cls,
+        vectors: np.ndarray,
+        nlist: int,
+        iterations: int = 8,
+        sample_per_list: int = 32,
+        quantize: bool = True,
+        seed: int = 0,
+    ) -> 'IVFIndex':
+        """Spherical k-means over a sample of the vectors"""
+        rng = np.random.default_rng(seed)
+        nlist = max(1, min(nlist, len(vectors)))
+        sample_size = min(len(vectors), nlist * sample_per_list)
+        sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = np.bincount(assign, minlength=nlist) == 0
+            # Re-seed empty cells from random sample points
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = _normalize(sums)
+
+        index = cls(centroids, quantize)
+        index.trained_size = len(vectors)
+        return index
+
+    def _ensure_capacity(self, rows: int):
+        if rows <= len(self.list_of):
+            return
+        capacity = max(rows, len(self.list_of) * 2)
+        list_of = np.full(capacity, -1, dtype=np.int32)
+        list_of[:len(self.list_of)] = self.list_of
+        pos_of = np.zeros(capacity, dtype=np.int64)
+        pos_of[:len(self.pos_of)] = self.pos_of
+        self.list_of, self.pos_of = list_of, pos_of
+
+    def remove(self, rows: np.ndarray):
+        for row in rows:
+            cell = self.list_of[row] if row < len(self.list_of) else -1
+            if cell >= 0:
+                self.lists[cell].rows[self.pos_of[row]] = -1
+                self.list_of[row] = -1
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray):
+        """Assign (re)written rows to their nearest cells"""
+        rows = np.asarray(rows, dtype=np.int64)
+        self._ensure_capacity(int(rows.max()) + 1)
+        self.remove(rows)
+
+        assign = np.empty(len(rows), dtype=np.int32)
+        for start in range(0, len(rows), BRUTE_FORCE_CHUNK):
+            block = vectors[start:start + BRUTE_FORCE_CHUNK]
+            assign[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+
+        if self.quantize:
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            stored = np.rint(vectors / scales[:, None]).astype(np.int8)
+        else:
+            scales = np.ones(len(rows), dtype=np.float32)
+            stored = vectors
+
+        order = np.argsort(assign, kind="stable")
+        cells, starts = np.unique(assign[order], return_index=True)
+        bounds = list(starts[1:]) + [len(order)]
+        for cell, start, end in zip(cells, starts, bounds):
+            picked = order[start:end]
+            positions = self.lists[cell].append(rows[picked], stored[picked], scales[picked])
+            self.pos_of[rows[picked]] = positions
+        self.list_of[rows] = assign
+
+    def search(self, query: np.ndarray, k: int, matrix: np.ndarray, nprobe: int) -> Tuple[np.ndarray, np.ndarray]:
+        nprobe = min(nprobe, len(self.lists))
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+
+        rows, scores = [], []
+        for cell in probe:
+            cell_list = self.lists[cell]
+            if cell_list.size:
+                rows.append(cell_list.rows[:cell_list.size])
+                scores.append((cell_list.vectors[:cell_list.size] @ query) * cell_list.scales[:cell_list.size])
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+        live = rows >= 0
+        rows, scores = rows[live], scores[live]
+        shortlist = min(len(rows), k * RERANK_FACTOR)
+        if not shortlist:
+            return rows, scores
+        candidates = np.sort(rows[np.argpartition(-scores, shortlist - 1)[:shortlist]])
+
+        exact = np.asarray(matrix[candidates]) @ query
+        top = np.argsort(-exact)[:k]
+        return candidates[top], exact[top]
+
+
+class VectorPartition:
+    """One team's vectors in a memory-mapped float32 file, rows reused after deletes"""
+
+    def __init__(self, path: str, dim: int, initial_capacity: int = 1024):
+        self.path = path
+        self.dim = dim
+        self.keys: List[Optional[str]] = []  # row -> entry key, None for free rows
+        self.rows: Dict[str, int] = {}
+        self.ivf: Optional[IVFIndex] = None
+        self.lock = threading.Lock()
+        # Rows written or removed while an IVF index trains off-lock; None when not training
+        self._ivf_changes: Optional[List[int]] = None
+        self._free: List[int] = []
+        self._matrix: Optional[np.memmap] = None
+        self.alive = np.zeros(0, dtype=bool)
+        self.capacity = 0
+        self._open(initial_capacity)
+
+    @property
+    def size(self) -> int:
+        """High-water row count (including free rows)"""
+        return len(self.keys)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _open(self, capacity: int):
+        row_bytes = self.dim * 4
+        existing = os.path.getsize(self.path) // row_bytes if os.path.exists(self.path) else 0
+        capacity = max(capacity, existing)
+        if existing < capacity:
+            with open(self.path, "ab") as f:
+                f.truncate(capacity * row_bytes)
+        self._matrix = np.memmap(self.path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self.alive)] = self.alive
+        self.alive = alive
+        self.capacity = capacity
+
+    def _reserve(self, rows: int):
+        if rows <= self.capacity:
+            return
+        self._matrix.flush()
+        self._matrix = None
+        self._open(max(rows, self.capacity * 2))
+
+    def load(self, entries: Iterable[Tuple[str, int]]):
+        """Restore row assignments from persisted metadata"""
+        for key, row in entries:
+            if row >= len(self.keys):
+                self.keys.extend([None] * (row + 1 - len(self.keys)))
+            self.keys[row] = key
+            self.rows[key] = row
+        self._reserve(len(self.keys))
+        self._free = [row for row, key in enumerate(self.keys) if key is None]
+        self.alive[:len(self.keys)] = [key is not None for key in self.keys]
+
+    def missing_rows(self) -> List[int]:
+        """Live rows whose vectors never reached disk (e.g. after a crash)"""
+        missing = []
+        for start in range(0, self.size, BRUTE_FORCE_CHUNK):
+            block = self._matrix[start:start + BRUTE_FORCE_CHUNK]
+            empty = ~np.any(block, axis=1) & self.alive[start:start + len(block)]
+            missing.extend((np.nonzero(empty)[0] + start).tolist())
+        return missing
+
+    def put(self, keys: Sequence[str], vectors: np.ndarray) -> List[int]:
+        """Insert or overwrite vectors (assumed unit-length) for keys"""
+        rows = []
+        for key in keys:
+            row = self.rows.get(key)
+            if row is None:
+                if self._free:
+                    row = self._free.pop()
+                    self.keys[row] = key
+                else:
+                    row = len(self.keys)
+                    self.keys.append(key)
+                self.rows[key] = row
+            rows.append(row)
+
+        self._reserve(len(self.keys))
+        rows_array = np.asarray(rows, dtype=np.int64)
+        self._matrix[rows_array] = vectors
+        self.alive[rows_array] = True
+        if self.ivf is not None:
+            self.ivf.add(rows_array, vectors)
+        if self._ivf_changes is not None:
+            self._ivf_changes.extend(rows)
+        return rows
+
+    def remove(self, key: str) -> Optional[int]:
+        row = self.rows.pop(key, None)
+        if row is None:
+            return None
+        self.keys[row] = None
+        self.alive[row] = False
+        self._matrix[row] = 0.0
+        self._free.append(row)
+        if self.ivf is not None:
+            self.ivf.remove(np.asarray([row]))
+        if self._ivf_changes is not None:
+            self._ivf_changes.append(row)
+        return row
+
+    def build_ivf(self, nlist: Optional[int] = None, quantize: bool = True):
+        """Train an IVF index over the live rows in the calling thread (nlist defaults to sqrt(n))"""
+        live = self.begin_ivf_training()
+        self.finish_ivf_training(self.train_ivf(live, nlist, quantize))
+
+    def begin_ivf_training(self) -> np.ndarray:
+        """
+        Snapshot the live rows and start recording writes; call with `lock` held.
+        Training (train_ivf) then runs without the lock while searches and writes
+        continue, and finish_ivf_training replays whatever changed meanwhile.
+        """
+        self._ivf_changes = []
+        return np.nonzero(self.alive[:self.size])[0]
+
+    def train_ivf(self, live: np.ndarray, nlist: Optional[int] = None, quantize: bool = True) -> Optional[IVFIndex]:
+        """k-means over a sample of the snapshot rows, then assign every snapshot row to a cell"""
+        if not len(live):
+            return None
+        matrix = self._matrix
+        nlist = nlist or int(np.clip(np.sqrt(len(live)), 16, 4096))
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(live, min(len(live), nlist * 32), replace=False))
+        ivf = IVFIndex.train(np.asarray(matrix[sample_rows]), nlist, quantize=quantize)
+        ivf.trained_size = len(live)
+        for start in range(0, len(live), BRUTE_FORCE_CHUNK):
+            rows = live[start:start + BRUTE_FORCE_CHUNK]
+            ivf.add(rows, np.asarray(matrix[rows]))
+        return ivf
+
+    def finish_ivf_training(self, ivf: Optional[IVFIndex]):
+        """Apply rows changed since begin_ivf_training and swap the index in; call with `lock` held"""
+        changed = np.unique(np.asarray(self._ivf_changes or [], dtype=np.int64))
+        self._ivf_changes = None
+        if ivf is not None and len(changed):
+            live = self.alive[changed]
+            ivf.remove(changed[~live])
+            if live.any():
+                ivf.add(changed[live], np.asarray(self._matrix[changed[live]]))
+        self.ivf = ivf
+
+    def abort_ivf_training(self):
+        """Stop recording writes for a training run that failed; call with `lock` held"""
+        self._ivf_changes = None
+
+    def search(self, queries: np.ndarray, k: int, nprobe: int = 8) -> List[List[Tuple[str, float]]]:
+        """Top-k (key, cosine) per query row"""
+        if not self.rows or k <= 0:
+            return [[] for _ in range(len(queries))]
+        if self.ivf is not None:
+            results = [self.ivf.search(query, k, self._matrix, nprobe) for query in queries]
+        else:
+            results = self._brute_force(queries, k)
+        return [
+            [(self.keys[row], float(score)) for row, score in zip(rows, scores)]
+            for rows, scores in results
+        ]
+
+    def _brute_force(self, queries: np.ndarray, k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for start in range(0, self.size, BRUTE_FORCE_CHUNK):
+            block = self._matrix[start:min(start + BRUTE_FORCE_CHUNK, self.size)]
+            scores = queries @ block.T
+            scores[:, ~self.alive[start:start + len(block)]] = -np.inf
+            take = min(k, len(block))
+            index = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            best_rows = np.concatenate([best_rows, index + start], axis=1)
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, index, axis=1)], axis=1)
+            if best_rows.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+
+        results = []
+        for rows, scores in zip(best_rows, best_scores):
+            order = np.argsort(-scores)
+            order = order[np.isfinite(scores[order])]
+            results.append((rows[order], scores[order]))
+        return results
+
+    def flush(self):
+        if self._matrix is not None:
+            self._matrix.flush()
+
+
+class VectorMatch(BaseModel):
+    """A retrieved snippet and its cosine similarity to the query"""
+    snippet: ContextSnippet
+    score: float
+
+
+class VectorIndex:
+    """Embedding index over documents, tasks and chat messages, partitioned by team"""
+
+    def __init__(
+        self,
+        db: Database = database,
+        directory: Optional[str] = None,
+        dim: Optional[int] = None,
+        embedder=None,
+        ivf_threshold: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        quantize: Optional[bool] = None,
+    ):
+        self.db = db
+        self.directory = directory or settings.VECTOR_INDEX_DIR
+        self.dim = dim or settings.VECTOR_DIM
+        self.embedder = embedder or HashingEmbedder(self.dim)
+        self.ivf_threshold = ivf_threshold or settings.VECTOR_IVF_THRESHOLD
+        self.nprobe = nprobe or settings.VECTOR_IVF_NPROBE
+        self.quantize = settings.VECTOR_IVF_QUANTIZE if quantize is None else quantize
+        self._partitions: Dict[str, VectorPartition] = {}
+        self._training: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def entry_key(source_type: str, source_id: str) -> str:
+        return f"{source_type}:{source_id}"
+
+    def has_partition(self, name: str) -> bool:
+        """Whether anything was ever indexed under name (never creates the partition)"""
+        if name in self._partitions:
+            return True
+        return self.db.execute(lambda conn: conn.execute(
+            "SELECT 1 FROM vector_entries WHERE partition = ? LIMIT 1", (name,)
+        ).fetchone()) is not None
+
+    def partition(self, name: str) -> VectorPartition:
+        """Open (and on first use, load) a partition; blocking"""
+        with self._lock:
+            partition = self._partitions.get(name)
+            if partition is not None:
+                return partition
+
+            os.makedirs(self.directory, exist_ok=True)
+            filename = hashlib.sha1(name.encode("utf-8")).hexdigest()[:20] + ".f32"
+            partition = VectorPartition(os.path.join(self.directory, filename), self.dim)
+            entries = self.db.execute(lambda conn: conn.execute(
+                "SELECT entry_key, row FROM vector_entries WHERE partition = ?", (name,)
+            ).fetchall())
+            partition.load((entry["entry_key"], entry["row"]) for entry in entries)
+
+            # Vectors are derived from stored text, so rebuild any that were lost
+            missing = partition.missing_rows()
+            if missing:
+                texts = dict(self.db.execute(lambda conn: conn.execute(
+                    "SELECT entry_key, text FROM vector_entries WHERE partition = ?", (name,)
+                ).fetchall()))
+                keys = [partition.keys[row] for row in missing]
+                partition.put(keys, self.embedder.embed([texts[key] for key in keys]))
+
+            self._partitions[name] = partition
+            return partition
+
+    async def upsert(self, partition: str, snippet: ContextSnippet):
+        """Index or re-index one snippet (call on write)"""
+        await self.upsert_many(partition, [snippet])
+
+    async def upsert_many(self, partition: str, snippets: List[ContextSnippet]):
+        if not snippets:
+            return
+
+        def write():
+            part = self.partition(partition)
+            keys = [self.entry_key(s.source_type, s.source_id) for s in snippets]
+            vectors = self.embedder.embed([s.text for s in snippets])
+            with part.lock:
+                rows = part.put(keys, vectors)
+            self.db.execute(lambda conn: conn.executemany(
+                """
+                INSERT OR REPLACE INTO vector_entries (
+                    partition, entry_key, row, source_type, source_id, version, text, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        partition, key, row, s.source_type, s.source_id, s.version, s.text,
+                        s.updated_at.isoformat() if s.updated_at else None,
+                    )
+                    for key, row, s in zip(keys, rows, snippets)
+                ],
+            ))
+
+        await asyncio.to_thread(write)
+        VECTOR_UPSERTS.inc(len(snippets))
+
+    async def delete(self, partition: str, source_type: str, source_id: str):
+        key = self.entry_key(source_type, source_id)
+
+        def remove():
+            part = self.partition(partition)
+            with part.lock:
+                part.remove(key)
+            self.db.execute(lambda conn: conn.execute(
+                "DELETE FROM vector_entries WHERE partition = ? AND entry_key = ?", (partition, key)
+            ))
+
+        await asyncio.to_thread(remove)
+
+    async def search(
+        self,
+        partition: str,
+        query: str,
+        k: int = 10,
+        source_types: Optional[List[str]] = None,
+    ) -> List[VectorMatch]:
+        """Snippets most similar to the query text"""
+        return (await self.search_many(partition, [query], k, source_types))[0]
+
+    async def search_many(
+        self,
+        partition: str,
+        queries: List[str],
+        k: int = 10,
+        source_types: Optional[List[str]] = None,
+    ) -> List[List[VectorMatch]]:
+        """Batched search; one matrix pass serves every query in brute-force mode"""
+        if not queries:
+            return []
+        # Over-fetch when filtering so k results usually survive the filter
+        fetch = k * 4 if source_types else k
+
+        def run() -> List[List[VectorMatch]]:
+            # Reads never create a partition (and its backing file)
+            if not self.has_partition(partition):
+                return [[] for _ in queries]
+            part = self.partition(partition)
+            vectors = self.embedder.embed(queries)
+            started = time.perf_counter()
+            with part.lock:
+                self._maybe_build_ivf(partition, part)
+                hits = part.search(vectors, fetch, self.nprobe)
+                mode = "ivf" if part.ivf is not None else "brute_force"
+            VECTOR_SEARCH_SECONDS.observe(time.perf_counter() - started, mode=mode)
+            return self._resolve(partition, hits, k, source_types)
+
+        return await asyncio.to_thread(run)
+
+    def _maybe_build_ivf(self, name: str, part: VectorPartition):
+        """
+        Start a background IVF (re)train when a partition crosses the threshold or
+        has doubled since the last train; call with part.lock held. Searches keep
+        using brute force (or the previous IVF index) until the new index is ready.
+        """
+        if len(part) < self.ivf_threshold:
+            part.ivf = None
+            return
+        if part.ivf is not None and len(part) <= 2 * part.ivf.trained_size:
+            return
+        with self._lock:
+            if name in self._training:
+                return
+            live = part.begin_ivf_training()
+            thread = threading.Thread(
+                target=self._train_ivf, args=(name, part, live), name=f"ivf-train:{name}", daemon=True
+            )
+            self._training[name] = thread
+        thread.start()
+
+    def _train_ivf(self, name: str, part: VectorPartition, live: np.ndarray):
+        started = time.perf_counter()
+        try:
+            ivf = part.train_ivf(live, quantize=self.quantize)
+            with part.lock:
+                part.finish_ivf_training(ivf)
+            VECTOR_IVF_TRAIN_SECONDS.observe(time.perf_counter() - started)
+        except Exception:
+            with part.lock:
+                part.abort_ivf_training()
+            logger.exception("IVF training failed", extra={"partition": name})
+        finally:
+            with self._lock:
+                self._training.pop(name, None)
+
+    def wait_for_training(self, timeout: Optional[float] = None) -> bool:
+        """Block until background IVF training finishes; False if still running after timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                threads = list(self._training.values())
+            if not threads:
+                return True
+            for thread in threads:
+                thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+            if deadline is not None and time.monotonic() >= deadline:
+                with self._lock:
+                    return not self._training
+
+    def _resolve(
+        self,
+        partition: str,
+        hits: List[List[Tuple[str, float]]],
+        k: int,
+        source_types: Optional[List[str]],
+    ) -> List[List[VectorMatch]]:
+        keys = list({key for query_hits in hits for key, _ in query_hits})
+        if not keys:
+            return [[] for _ in hits]
+
+        placeholders = ",".join("?" * len(keys))
+        rows = self.db.execute(lambda conn: conn.execute(
+            f"""
+            SELECT entry_key, source_type, source_id, version, text, updated_at
+            FROM vector_entries WHERE partition = ? AND entry_key IN ({placeholders})
+            """,
+            (partition, *keys),
+        ).fetchall())
+        snippets = {
+            row["entry_key"]: ContextSnippet(
+                source_type=row["source_type"],
+                source_id=row["source_id"],
+                version=row["version"],
+                text=row["text"],
+                updated_at=row["updated_at"],
+            )
+            for row in rows
+        }
+
+        results = []
+        for query_hits in hits:
+            matches = []
+            for key, score in query_hits:
+                snippet = snippets.get(key)
+                if snippet is None or (source_types and snippet.source_type not in source_types):
+                    continue
+                matches.append(VectorMatch(snippet=snippet, score=score))
+                if len(matches) == k:
+                    break
+            results.append(matches)
+        return results
+
+    def close(self):
+        """Flush memory-mapped partitions to disk"""
+        self.wait_for_training()
+        with self._lock:
+            for partition in self._partitions.values():
+                partition.flush()
+            self._partitions.clear()
+
+
+# Global vector index instance
+vector_index = VectorIndex()
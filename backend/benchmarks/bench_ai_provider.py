@@ -0,0 +1,79 @@
+"""
+Load test of AIService against the fake provider
+Run from the backend directory:
+    python -m benchmarks.bench_ai_provider
+
+Streams many concurrent chat responses through a slow, flaky fake provider and
+reports time to first token, failures and event-loop lag (how late a 10 ms
+timer fires while the streams are running).
+"""
+
+import asyncio
+import sys
+import time
+
+from app.core.concurrency import ProviderLimiter
+from app.services.ai_providers import FakeProvider, ProviderError
+from app.services.ai_service import AIService
+
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+async def monitor_loop_lag(lags, stop: asyncio.Event, interval: float = 0.01):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+
+
+async def run(streams: int = 500, max_concurrency: int = 100):
+    provider = FakeProvider(
+        latency="lognormal:0.3,0.6",
+        tokens_per_second=200,
+        response_tokens=100,
+        error_rate=0.02,
+        stream_error_rate=0.02,
+        rate_limit_rate=0.02,
+        seed=7,
+    )
+    ai = AIService(provider=provider)
+    ai.limiter = ProviderLimiter("bench", max_concurrency=max_concurrency, rate=1000, burst=streams)
+
+    first_token, outcomes = [], {"ok": 0, "error": 0, "rate_limited": 0}
+
+    async def one(i: int):
+        started = time.perf_counter()
+        first = True
+        try:
+            async for _ in ai.stream_response(f"question {i}"):
+                if first:
+                    first_token.append(time.perf_counter() - started)
+                    first = False
+            outcomes["ok"] += 1
+        except ProviderError as e:
+            outcomes["rate_limited" if e.status_code == 429 else "error"] += 1
+
+    lags, stop = [], asyncio.Event()
+    monitor = asyncio.create_task(monitor_loop_lag(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(streams)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+    return elapsed, first_token, outcomes, lags
+
+
+def main() -> int:
+    elapsed, first_token, outcomes, lags = asyncio.run(run())
+    print(f"ai_provider: {sum(outcomes.values())} streams in {elapsed:.2f}s ({outcomes})")
+    print(f"ai_provider: time to first token p50 {percentile(first_token, 0.5):.2f}s p99 {percentile(first_token, 0.99):.2f}s")
+    lag_p99 = percentile(lags, 0.99)
+    print(f"ai_provider: event-loop lag p99 {lag_p99:.1f} ms")
+    return 0 if lag_p99 < 50 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
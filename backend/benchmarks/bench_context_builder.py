@@ -0,0 +1,64 @@
+"""
+Benchmark for token-budgeted context assembly over a large project
+
+Run from the backend directory:
+    python -m benchmarks.bench_context_builder
+"""
+
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app.services.context_builder import ContextBuilder, ContextSnippet
+
+TARGET_BUILD_MS = 100.0  # About 2x above the slowest runner seen so far (35-55 ms)
+
+WORDS = [
+    "api", "design", "database", "migration", "frontend", "release", "review", "sprint",
+    "customer", "onboarding", "billing", "latency", "cache", "deploy", "incident", "roadmap",
+    "analytics", "mobile", "search", "notifications", "security", "testing", "backlog",
+]
+
+
+def build_snippets(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    kinds = ["task", "document", "chat"]
+    snippets = []
+    for i in range(count):
+        words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 120)))
+        snippets.append(ContextSnippet(
+            source_type=kinds[i % 3],
+            source_id=str(i),
+            version="1",
+            text=words,
+            updated_at=now - timedelta(hours=rng.randint(0, 24 * 90)),
+        ))
+    return snippets
+
+
+def run(snippet_count: int = 10_000, budget: int = 8000, rounds: int = 15) -> float:
+    """Return the median warm build time in milliseconds (robust to scheduler noise)"""
+    builder = ContextBuilder()
+    snippets = build_snippets(snippet_count)
+    query = "latency regression in billing api after cache deploy"
+    builder.build(snippets, budget, query)  # Warm token, term and score caches
+
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        builder.build(snippets, budget, query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> int:
+    elapsed_ms = run()
+    print(f"context_builder: {elapsed_ms:.1f} ms median build over 10k snippets (target {TARGET_BUILD_MS:.0f} ms)")
+    return 0 if elapsed_ms <= TARGET_BUILD_MS else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Benchmark for the pooled provider HTTP client against a local stub server
+
+Run from the backend directory:
+    python -m benchmarks.bench_http_client
+
+Measures pooled keep-alive vs a client per call, retries against a flaky
+endpoint, and p99 latency with and without hedging against a slow tail.
+"""
+
+import asyncio
+import random
+import socket
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from app.services.http_client import HTTPClientPool, ProviderConfig
+
+
+async def stub_app(scope, receive, send):
+    """Minimal ASGI provider stub: /fast, /flaky (1 in 3 fails) and /slow-tail (5% take 300 ms)"""
+    if scope["type"] != "http":
+        return
+    status = 200
+    if scope["path"] == "/flaky" and random.random() < 1 / 3:
+        status = 503
+    elif scope["path"] == "/slow-tail" and random.random() < 0.05:
+        await asyncio.sleep(0.3)
+    await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b'{"ok": true}'})
+
+
+def start_stub_server() -> str:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    server = uvicorn.Server(uvicorn.Config(stub_app, host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+def percentile(values, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run(requests: int = 500):
+    base_url = start_stub_server()
+    pool = HTTPClientPool(
+        providers={"stub": ProviderConfig(name="stub", base_url=base_url)},
+        backoff_base=0.005,
+    )
+    pool.budgets["stub"].ratio = 1.0
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            await client.get("/fast")
+    per_call = requests / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await pool.request("stub", "GET", "/fast")
+    pooled = requests / (time.perf_counter() - start)
+
+    statuses = [(await pool.request("stub", "GET", "/flaky")).status_code for _ in range(requests)]
+    flaky_success = statuses.count(200) / requests
+
+    async def latencies(hedge_after):
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            await pool.request("stub", "GET", "/slow-tail", hedge_after=hedge_after)
+            timings.append((time.perf_counter() - started) * 1000)
+        return percentile(timings, 0.99)
+
+    plain_p99 = await latencies(None)
+    hedged_p99 = await latencies(0.02)
+    await pool.close()
+    return per_call, pooled, flaky_success, plain_p99, hedged_p99
+
+
+def main() -> int:
+    per_call, pooled, flaky_success, plain_p99, hedged_p99 = asyncio.run(run())
+    print(f"http_client: {pooled:.0f} req/s pooled vs {per_call:.0f} req/s with a client per call")
+    print(f"http_client: {flaky_success:.1%} success against a 1-in-3 failing endpoint with retries")
+    print(f"http_client: p99 {plain_p99:.1f} ms plain vs {hedged_p99:.1f} ms hedged at 20 ms")
+    return 0 if pooled > per_call and hedged_p99 < plain_p99 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Microbenchmark for the chat message preprocessing pipeline
+
+Run from the backend directory:
+    python -m benchmarks.bench_message_processor
+"""
+
+import random
+import sys
+import time
+
+from app.services.message_processor import MessageProcessor
+
+TARGET_MESSAGES_PER_SECOND = 10_000
+
+WORDS = [
+    "the", "sprint", "review", "is", "moved", "to", "tomorrow", "please", "check",
+    "design", "doc", "before", "standup", "thanks", "deploy", "build", "failed",
+    "again", "can", "someone", "look", "at", "this", "ticket", "ok", "sounds", "good",
+]
+EXTRAS = ["@ai", "hey ai", "https://example.com/spec", "www.lifeos.app/docs", "@Alice", "@Bob Smith"]
+
+
+def build_corpus(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(4, 24))]
+        if rng.random() < 0.3:
+            words.insert(rng.randint(0, len(words)), rng.choice(EXTRAS))
+        text = " ".join(words)
+        if rng.random() < 0.05:
+            text = "/remind " + text
+        messages.append(text)
+    return messages
+
+
+def build_participants(count: int):
+    names = ["Alice", "Bob Smith"] + [f"Member {i}" for i in range(count - 2)]
+    return [(f"user-{i}", name) for i, name in enumerate(names)]
+
+
+def run(message_count: int = 50_000, participant_count: int = 50) -> float:
+    """Return processed messages per second"""
+    processor = MessageProcessor()
+    messages = build_corpus(message_count)
+    participants = build_participants(participant_count)
+    processor.process("warm up", "room-1", participants)
+
+    start = time.perf_counter()
+    for text in messages:
+        processor.process(text, "room-1", participants)
+    elapsed = time.perf_counter() - start
+    return message_count / elapsed
+
+
+def main() -> int:
+    rate = run()
+    print(f"message_processor: {rate:,.0f} messages/s (target {TARGET_MESSAGES_PER_SECOND:,})")
+    return 0 if rate >= TARGET_MESSAGES_PER_SECOND else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Per-request overhead of the metrics middleware
+Run from the backend directory:
+    python -m benchmarks.bench_metrics_middleware
+
+Drives a trivial routed ASGI app directly (no server, no client) with and
+without MetricsMiddleware and reports the difference per request.
+"""
+
+import asyncio
+import sys
+import time
+
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route, Router
+
+from app.core.metrics import MetricsRegistry
+from app.core.middleware import MetricsMiddleware
+
+TARGET_MICROSECONDS = 5.0
+
+
+async def endpoint(request):
+    return PlainTextResponse("ok")
+
+
+def build_app():
+    return Router(routes=[Route("/items/{item_id}", endpoint)])
+
+
+async def drive(app, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for i in range(requests):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": f"/items/{i % 100}",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [],
+        }
+        await app(scope, receive, send)
+    return time.perf_counter() - started
+
+
+async def run(requests: int = 50_000, rounds: int = 9):
+    registry = MetricsRegistry()
+    bare = build_app()
+    instrumented = MetricsMiddleware(build_app(), registry=registry)
+    await drive(bare, 1000)
+    await drive(instrumented, 1000)
+
+    # Interleaved rounds, best of each, to damp scheduler and frequency noise
+    bare_times, instrumented_times = [], []
+    for _ in range(rounds):
+        bare_times.append(await drive(bare, requests))
+        instrumented_times.append(await drive(instrumented, requests))
+    bare_seconds, instrumented_seconds = min(bare_times), min(instrumented_times)
+    overhead = (instrumented_seconds - bare_seconds) / requests * 1e6
+    rendered = registry.render()
+    return bare_seconds / requests * 1e6, overhead, rendered
+
+
+def main() -> int:
+    bare, overhead, rendered = asyncio.run(run())
+    print(f"metrics_middleware: {bare:.1f} us/request bare, +{overhead:.2f} us/request instrumented")
+    assert 'route="/items/{item_id}"' in rendered
+    return 0 if overhead < TARGET_MICROSECONDS else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Serialization CPU and wire bytes for typical large responses
+
+Run from the backend directory:
+    python -m benchmarks.bench_payloads
+
+For a task list, a long document and a message page (after FastAPI's
+jsonable_encoder, i.e. what reaches the response class), compares
+JSONResponse with ORJSONResponse rendering, then the bytes and CPU of the
+gzip/brotli encodings CompressionMiddleware negotiates.
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.core.config import settings
+from app.core.middleware import BROTLI_AVAILABLE, _BrotliStream, _GzipStream
+from app.models.chat import ChatMessage
+from app.models.document import Document, DocumentVersion
+from app.models.task import Task, TaskAssignment, TaskPriority, TaskStatus, TeamRole
+
+WORDS = (
+    "sprint review design doc deploy build failed ticket launch milestone owner blocked "
+    "follow up estimate scope customer feedback metrics dashboard release notes"
+).split()
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def task_list(rng: random.Random, count: int = 500):
+    now = datetime.utcnow()
+    return {"tasks": [
+        Task(
+            id=f"task-{i}",
+            title=sentence(rng, 6),
+            description=sentence(rng, 25),
+            project_id="project-0",
+            created_by=f"user-{i % 12}",
+            status=rng.choice(list(TaskStatus)),
+            priority=rng.choice(list(TaskPriority)),
+            due_date=now + timedelta(days=rng.randint(-10, 30)),
+            last_activity=now - timedelta(hours=rng.randint(0, 200)),
+            quest_team=[
+                TaskAssignment(user_id=f"user-{(i + k) % 12}", role=rng.choice(list(TeamRole)), assigned_by="user-0")
+                for k in range(2)
+            ],
+        ).dict()
+        for i in range(count)
+    ]}
+
+
+def document(rng: random.Random, paragraphs: int = 120):
+    content = "\n\n".join(sentence(rng, rng.randint(20, 60)) for _ in range(paragraphs))
+    return Document(
+        id="doc-0",
+        title="Launch plan",
+        content=content,
+        owner_id="user-0",
+        word_count=len(content.split()),
+        character_count=len(content),
+        versions=[
+            DocumentVersion(version_number=v, content=content[: 400 * v], created_by="user-0", summary=sentence(rng, 12))
+            for v in range(1, 6)
+        ],
+        collaborator_ids=[f"user-{i}" for i in range(8)],
+    ).dict()
+
+
+def message_page(rng: random.Random, count: int = 200):
+    now = datetime.utcnow()
+    return {"messages": [
+        ChatMessage(
+            id=f"msg-{i}",
+            room_id="room-0",
+            content=sentence(rng, rng.randint(4, 30)),
+            sender_id=f"user-{i % 8}",
+            sender_name=f"Member {i % 8}",
+            created_at=now - timedelta(seconds=30 * i),
+            mentions=[f"user-{rng.randrange(8)}"] if rng.random() < 0.2 else [],
+        ).dict()
+        for i in range(count)
+    ], "next_cursor": "msg-199"}
+
+
+def best_of(fn, repeat: int = 15, number: int = 20) -> float:
+    """Best mean seconds per call over `repeat` batches of `number` calls"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+
+def compress(encoding: str, body: bytes) -> bytes:
+    if encoding == "br":
+        stream = _BrotliStream(settings.COMPRESSION_BROTLI_QUALITY)
+    else:
+        stream = _GzipStream(settings.COMPRESSION_GZIP_LEVEL)
+    return stream.compress(body) + stream.finish()
+
+
+def run():
+    rng = random.Random(3)
+    payloads = {
+        "task_list[500]": task_list(rng),
+        "document[120 paragraphs]": document(rng),
+        "message_page[200]": message_page(rng),
+    }
+    encodings = ["gzip"] + (["br"] if BROTLI_AVAILABLE else [])
+    results = []
+    for name, payload in payloads.items():
+        content = jsonable_encoder(payload)
+        stdlib_body = JSONResponse(content).body
+        orjson_body = ORJSONResponse(content).body
+        row = {
+            "name": name,
+            "json_us": best_of(lambda: JSONResponse(content)) * 1e6,
+            "orjson_us": best_of(lambda: ORJSONResponse(content)) * 1e6,
+            "stdlib_bytes": len(stdlib_body),
+            "raw_bytes": len(orjson_body),
+            "encoded": {},
+        }
+        for encoding in encodings:
+            encoded = compress(encoding, orjson_body)
+            row["encoded"][encoding] = (len(encoded), best_of(lambda: compress(encoding, orjson_body), number=5) * 1e6)
+        results.append(row)
+    return results
+
+
+def main() -> int:
+    results = run()
+    if not BROTLI_AVAILABLE:
+        print("brotli not installed: gzip only")
+    ok = True
+    for row in results:
+        saved_cpu = 1 - row["orjson_us"] / row["json_us"]
+        print(
+            f"{row['name']}: render {row['json_us']:.0f} us json -> {row['orjson_us']:.0f} us orjson "
+            f"({saved_cpu:.0%} CPU saved); {row['stdlib_bytes']:,} -> {row['raw_bytes']:,} bytes"
+        )
+        for encoding, (size, micros) in row["encoded"].items():
+            print(
+                f"    {encoding:>4}: {size:,} bytes ({1 - size / row['raw_bytes']:.0%} saved), "
+                f"{micros:.0f} us to compress"
+            )
+        gzip_size = row["encoded"]["gzip"][0]
+        ok = ok and row["orjson_us"] < row["json_us"] and gzip_size < row["raw_bytes"] / 2
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,522 @@
+"""
+End-to-end load generator for REST and WebSocket traffic
+
+Run from the backend directory:
+    python -m benchmarks.loadgen                              # in-process, default mix
+    python -m benchmarks.loadgen --rate 300 --duration 60 --ws-clients 2000
+    python -m benchmarks.loadgen --target http://127.0.0.1:8000 --mix chat_send=5,message_page=5
+    python -m benchmarks.loadgen --json report.json
+
+Targets:
+    inprocess   drives main.app through its own lifespan on a temporary SQLite
+                database and vector index: REST via httpx.ASGITransport,
+                WebSockets via a minimal ASGI driver. No sockets, so it
+                measures the app, not the network.
+    <url>       a running server (e.g. `uvicorn main:app --workers 4`), over real
+                HTTP and WebSocket connections. Use this to size workers.
+
+Load is open-loop: scenarios start on a Poisson (or uniform) arrival schedule
+regardless of how fast earlier ones finish, and scenario latency is measured from
+the scheduled start, so queueing under overload shows up instead of being hidden
+(coordinated omission). Arrivals past --max-in-flight are dropped and counted.
+
+Simulated WebSocket clients join chat threads, heartbeat, and time the delivery
+of messages sent by the chat_send scenario.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import AsyncExitStack
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlencode
+
+import httpx
+import websockets
+
+API = "/api/v1"
+INPROCESS = "inprocess"
+MESSAGE_MARKER = "loadgen:"
+
+# task_read is left out while GET /tasks/ is a 501 stub; add it with --mix once listing is implemented
+DEFAULT_MIX = "login=1,thread_list=2,message_page=3,chat_send=3,agora_token=1"
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Stats:
+    """Latencies and status codes per key (an endpoint, scenario or WebSocket event)"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[str, int]] = {}
+
+    def record(self, key: str, seconds: float, status: Any = "ok"):
+        self.latencies.setdefault(key, []).append(seconds)
+        counts = self.statuses.setdefault(key, {})
+        counts[str(status)] = counts.get(str(status), 0) + 1
+
+    def summary(self, duration: float) -> Dict[str, Dict[str, Any]]:
+        report = {}
+        for key in sorted(self.latencies):
+            values = self.latencies[key]
+            statuses = self.statuses[key]
+            failures = sum(n for status, n in statuses.items() if not _is_success(status))
+            report[key] = {
+                "count": len(values),
+                "throughput": len(values) / duration if duration else 0.0,
+                "failures": failures,
+                "statuses": dict(sorted(statuses.items())),
+                "p50_ms": percentile(values, 0.50) * 1000,
+                "p90_ms": percentile(values, 0.90) * 1000,
+                "p99_ms": percentile(values, 0.99) * 1000,
+                "max_ms": max(values) * 1000,
+            }
+        return report
+
+
+def _is_success(status: str) -> bool:
+    return status == "ok" or (status.isdigit() and int(status) < 400)
+
+
+# WebSocket transports
+
+class InProcessWebSocket:
+    """
+    Client side of an ASGI websocket connection, run against the app directly.
+    Cheap enough to hold thousands open in one process.
+    """
+
+    def __init__(self, app, path: str, query: Dict[str, str]):
+        self.app = app
+        self.scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": urlencode(query).encode(),
+            "headers": [(b"host", b"loadgen")],
+            "client": ("127.0.0.1", random.randint(1024, 65535)),
+            "server": ("loadgen", 80),
+            "subprotocols": [],
+        }
+        self._to_app: asyncio.Queue = asyncio.Queue()
+        self._from_app: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        self._task = asyncio.create_task(self.app(self.scope, self._to_app.get, self._from_app.put))
+        await self._to_app.put({"type": "websocket.connect"})
+        message = await self._from_app.get()
+        if message["type"] != "websocket.accept":
+            raise ConnectionRefusedError(f"websocket rejected: {message}")
+        return self
+
+    async def send(self, text: str):
+        await self._to_app.put({"type": "websocket.receive", "text": text})
+
+    async def recv(self) -> str:
+        message = await self._from_app.get()
+        if message["type"] == "websocket.close":
+            raise ConnectionError("websocket closed by server")
+        return message.get("text") or message.get("bytes", b"").decode()
+
+    async def close(self):
+        await self._to_app.put({"type": "websocket.disconnect", "code": 1000})
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+class NetworkWebSocket:
+    """Same interface over a real connection to a running server"""
+
+    def __init__(self, base_url: str, path: str, query: Dict[str, str]):
+        self.url = base_url.replace("http", "ws", 1) + path + "?" + urlencode(query)
+        self._connection = None
+
+    async def connect(self):
+        self._connection = await websockets.connect(self.url, max_queue=None)
+        return self
+
+    async def send(self, text: str):
+        await self._connection.send(text)
+
+    async def recv(self) -> str:
+        return await self._connection.recv()
+
+    async def close(self):
+        await self._connection.close()
+
+
+# Simulated users and scenarios
+
+class VirtualUser:
+    def __init__(self, index: int, run_id: str):
+        self.index = index
+        self.email = f"loadgen-{run_id}-{index}@example.com"
+        self.display_name = f"Load {index}"
+        self.credential_id = f"loadgen-{run_id}-{index}"
+        self.user_id: Optional[str] = None
+        self.token: Optional[str] = None
+        self.thread_id: Optional[str] = None
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+class LoadGenerator:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        open_websocket: Callable[[str, Dict[str, str]], Any],
+        users: int = 100,
+        room_size: int = 10,
+        seed: Optional[int] = None,
+    ):
+        self.client = client
+        self.open_websocket = open_websocket
+        self.rng = random.Random(seed)
+        self.run_id = uuid.uuid4().hex[:8]
+        self.users = [VirtualUser(i, self.run_id) for i in range(users)]
+        self.room_size = room_size
+        self.stats = Stats()
+        self.dropped = 0
+        self.scenarios: Dict[str, Callable[[VirtualUser], Awaitable[None]]] = {
+            "login": self.login,
+            "task_read": self.task_read,
+            "thread_list": self.thread_list,
+            "message_page": self.message_page,
+            "chat_send": self.chat_send,
+            "agora_token": self.agora_token,
+        }
+
+    async def request(self, label: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """One HTTP call, recorded under `label` (method and route template)"""
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.stats.record(label, time.perf_counter() - started, type(e).__name__)
+            raise
+        self.stats.record(label, time.perf_counter() - started, response.status_code)
+        return response
+
+    # Setup: register, enrol a credential, log in, and group users into chat threads
+
+    async def setup(self, concurrency: int = 20):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def prepare(user: VirtualUser):
+            async with semaphore:
+                response = await self.request(
+                    "POST /auth/register", "POST", f"{API}/auth/register",
+                    json={"email": user.email, "display_name": user.display_name},
+                )
+                response.raise_for_status()
+                user.user_id = response.json()["user_id"]
+                response = await self.request(
+                    "POST /auth/webauthn/registration/complete", "POST", f"{API}/auth/webauthn/registration/complete",
+                    json={"user_id": user.user_id, "credential": {"id": user.credential_id}},
+                )
+                response.raise_for_status()
+                await self.login(user)
+
+        await asyncio.gather(*(prepare(user) for user in self.users))
+
+        async def create_room(members: List[VirtualUser]):
+            async with semaphore:
+                response = await self.request(
+                    "POST /chat/threads", "POST", f"{API}/chat/threads",
+                    headers=members[0].headers,
+                    json={"name": f"loadgen {members[0].index}", "participant_ids": [m.user_id for m in members[1:]]},
+                )
+                response.raise_for_status()
+                for member in members:
+                    member.thread_id = response.json()["id"]
+
+        groups = [self.users[i:i + self.room_size] for i in range(0, len(self.users), self.room_size)]
+        await asyncio.gather(*(create_room(group) for group in groups))
+
+    # Scenarios (each is one simulated user action; some make several calls)
+
+    async def login(self, user: VirtualUser):
+        response = await self.request(
+            "POST /auth/webauthn/authentication/start", "POST", f"{API}/auth/webauthn/authentication/start",
+            json={"email": user.email},
+        )
+        response.raise_for_status()
+        response = await self.request(
+            "POST /auth/webauthn/authentication/complete", "POST", f"{API}/auth/webauthn/authentication/complete",
+            json={"email": user.email, "credential": {"id": user.credential_id}},
+        )
+        response.raise_for_status()
+        user.token = response.json()["access_token"]
+
+    async def task_read(self, user: VirtualUser):
+        response = await self.request("GET /tasks/", "GET", f"{API}/tasks/", headers=user.headers)
+        response.raise_for_status()
+
+    async def thread_list(self, user: VirtualUser):
+        response = await self.request("GET /chat/threads", "GET", f"{API}/chat/threads", headers=user.headers)
+        response.raise_for_status()
+
+    async def message_page(self, user: VirtualUser):
+        response = await self.request(
+            "GET /chat/threads/{thread_id}/messages", "GET", f"{API}/chat/threads/{user.thread_id}/messages",
+            headers=user.headers, params={"limit": 50},
+        )
+        response.raise_for_status()
+
+    async def chat_send(self, user: VirtualUser):
+        response = await self.request(
+            "POST /chat/threads/{thread_id}/messages", "POST", f"{API}/chat/threads/{user.thread_id}/messages",
+            headers=user.headers, json={"content": f"{MESSAGE_MARKER}{time.time()!r} standup notes"},
+        )
+        response.raise_for_status()
+
+    async def agora_token(self, user: VirtualUser):
+        response = await self.request(
+            "POST /agora/generate-token", "POST", f"{API}/agora/generate-token",
+            headers=user.headers, json={"channel_name": f"room-{user.thread_id}", "uid": user.index + 1},
+        )
+        response.raise_for_status()
+
+    # Open-loop arrivals
+
+    async def run_scenario(self, name: str, scheduled: float):
+        user = self.rng.choice(self.users)
+        status = "ok"
+        try:
+            await self.scenarios[name](user)
+        except httpx.HTTPStatusError as e:
+            # Record the failing status (e.g. 501) rather than the exception name
+            status = e.response.status_code
+        except Exception as e:
+            status = type(e).__name__
+        self.stats.record(f"scenario {name}", time.perf_counter() - scheduled, status)
+
+    async def drive(
+        self,
+        mix: Dict[str, float],
+        rate: float,
+        duration: float,
+        arrival: str = "poisson",
+        max_in_flight: int = 1000,
+        grace: float = 30.0,
+    ):
+        unknown = set(mix) - set(self.scenarios)
+        if unknown:
+            raise ValueError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        names, weights = list(mix), list(mix.values())
+        in_flight: set = set()
+        started = time.perf_counter()
+        scheduled = started
+        while True:
+            scheduled += self.rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+            if scheduled - started >= duration:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(in_flight) >= max_in_flight:
+                self.dropped += 1
+                continue
+            name = self.rng.choices(names, weights)[0]
+            task = asyncio.create_task(self.run_scenario(name, scheduled))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        if in_flight:
+            await asyncio.wait(in_flight, timeout=grace)
+        return time.perf_counter() - started
+
+    # WebSocket clients
+
+    async def websocket_client(self, user: VirtualUser, heartbeat: float, stop: asyncio.Event):
+        started = time.perf_counter()
+        try:
+            socket = await self.open_websocket(f"{API}/chat/ws/{user.thread_id}", {"token": user.token}).connect()
+        except Exception as e:
+            self.stats.record("ws connect", time.perf_counter() - started, type(e).__name__)
+            return
+        self.stats.record("ws connect", time.perf_counter() - started)
+
+        async def heartbeats():
+            while True:
+                await asyncio.sleep(heartbeat * random.random() + heartbeat / 2)
+                await socket.send('{"type": "heartbeat"}')
+
+        async def receive():
+            while True:
+                event = json.loads(await socket.recv())
+                content = (event.get("message") or {}).get("content", "")
+                if event.get("type") == "message" and content.startswith(MESSAGE_MARKER):
+                    sent_at = float(content[len(MESSAGE_MARKER):].split(" ", 1)[0])
+                    self.stats.record("ws message delivery", max(0.0, time.time() - sent_at))
+                else:
+                    self.stats.record(f"ws event {event.get('type')}", 0.0)
+
+        tasks = [asyncio.create_task(heartbeats()), asyncio.create_task(receive())]
+        await stop.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            await socket.close()
+        except Exception:
+            pass
+
+    async def open_websockets(self, count: int, heartbeat: float, connect_rate: float, stop: asyncio.Event) -> List[asyncio.Task]:
+        """Ramp up `count` clients at `connect_rate` per second, spread over every user's thread"""
+        tasks = []
+        for i in range(count):
+            user = self.users[i % len(self.users)]
+            tasks.append(asyncio.create_task(self.websocket_client(user, heartbeat, stop)))
+            if connect_rate:
+                await asyncio.sleep(1.0 / connect_rate)
+        return tasks
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.strip().partition("=")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def run(
+    target: str = INPROCESS,
+    mix: str = DEFAULT_MIX,
+    rate: float = 100.0,
+    duration: float = 10.0,
+    arrival: str = "poisson",
+    users: int = 100,
+    room_size: int = 10,
+    ws_clients: int = 500,
+    ws_connect_rate: float = 500.0,
+    ws_heartbeat: float = 5.0,
+    max_in_flight: int = 1000,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    async with AsyncExitStack() as stack:
+        if target == INPROCESS:
+            from app.core.database import database
+            from app.services.vector_index import vector_index
+            from main import app
+
+            # Keep the run's data out of the working tree
+            scratch = stack.enter_context(tempfile.TemporaryDirectory())
+            database.path = os.path.join(scratch, "loadgen.db")
+            vector_index.directory = os.path.join(scratch, "vector_index")
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            transport = httpx.ASGITransport(app=app)
+            base_url = "http://loadgen"
+            open_websocket = lambda path, query: InProcessWebSocket(app, path, query)
+        else:
+            transport = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+            )
+            base_url = target.rstrip("/")
+            open_websocket = lambda path, query: NetworkWebSocket(base_url, path, query)
+
+        client = await stack.enter_async_context(
+            httpx.AsyncClient(transport=transport, base_url=base_url, timeout=30.0)
+        )
+        generator = LoadGenerator(client, open_websocket, users=users, room_size=room_size, seed=seed)
+
+        setup_started = time.perf_counter()
+        await generator.setup()
+        setup_seconds = time.perf_counter() - setup_started
+        generator.stats = Stats()  # report the load phase only
+
+        stop = asyncio.Event()
+        ws_tasks = await generator.open_websockets(ws_clients, ws_heartbeat, ws_connect_rate, stop)
+        duration = await generator.drive(parse_mix(mix), rate, duration, arrival, max_in_flight)
+        await asyncio.sleep(0.2)  # let the last broadcasts land
+        stop.set()
+        await asyncio.gather(*ws_tasks, return_exceptions=True)
+
+    return {
+        "target": target,
+        "rate": rate,
+        "arrival": arrival,
+        "duration_s": duration,
+        "setup_s": setup_seconds,
+        "dropped": generator.dropped,
+        "websocket_clients": ws_clients,
+        "results": generator.stats.summary(duration),
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(
+        f"\n{report['target']}: {report['rate']:g}/s {report['arrival']} arrivals for {report['duration_s']:.1f}s, "
+        f"{report['websocket_clients']} websocket clients, {report['dropped']} dropped "
+        f"(setup {report['setup_s']:.1f}s)"
+    )
+    results = report["results"]
+    width = max([len(key) for key in results] + [8])
+    print(f"{'endpoint':<{width}}  {'count':>7}  {'req/s':>8}  {'fail':>5}  {'p50 ms':>8}  {'p90 ms':>8}  {'p99 ms':>8}  {'max ms':>8}  statuses")
+    for key, row in results.items():
+        statuses = " ".join(f"{status}:{n}" for status, n in row["statuses"].items())
+        print(
+            f"{key:<{width}}  {row['count']:>7}  {row['throughput']:>8.1f}  {row['failures']:>5}  "
+            f"{row['p50_ms']:>8.2f}  {row['p90_ms']:>8.2f}  {row['p99_ms']:>8.2f}  {row['max_ms']:>8.2f}  {statuses}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Open-loop REST and WebSocket load generator")
+    parser.add_argument("--target", default=INPROCESS, help="'inprocess' or a server base URL")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario weights, e.g. chat_send=3,message_page=1")
+    parser.add_argument("--rate", type=float, default=100.0, help="scenario arrivals per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load")
+    parser.add_argument("--arrival", choices=["poisson", "uniform"], default="poisson")
+    parser.add_argument("--users", type=int, default=100, help="simulated accounts")
+    parser.add_argument("--room-size", type=int, default=10, help="users per chat thread")
+    parser.add_argument("--ws-clients", type=int, default=500, help="concurrent WebSocket clients")
+    parser.add_argument("--ws-connect-rate", type=float, default=500.0, help="WebSocket connects per second during ramp-up")
+    parser.add_argument("--ws-heartbeat", type=float, default=5.0, help="mean seconds between client heartbeats")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="drop arrivals beyond this many open scenarios")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(
+        target=args.target,
+        mix=args.mix,
+        rate=args.rate,
+        duration=args.duration,
+        arrival=args.arrival,
+        users=args.users,
+        room_size=args.room_size,
+        ws_clients=args.ws_clients,
+        ws_connect_rate=args.ws_connect_rate,
+        ws_heartbeat=args.ws_heartbeat,
+        max_in_flight=args.max_in_flight,
+        seed=args.seed,
+    ))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    failures = sum(row["failures"] for key, row in report["results"].items() if key.startswith("scenario "))
+    return 1 if failures or report["dropped"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
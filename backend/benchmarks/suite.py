@@ -0,0 +1,466 @@
+"""
+Hot-path microbenchmark suite with stored baselines
+
+Run from the backend directory:
+    python -m benchmarks.suite                 # compare against baselines.json
+    python -m benchmarks.suite --update        # re-record baselines on this machine
+    python -m benchmarks.suite -k firestore    # only cases whose name contains "firestore"
+
+Each case reports the best-of-N time per operation. Every repeat is bracketed by
+a fixed reference loop timed just before and after it, and comparisons use the
+median over repeats of the case's time relative to its own bracket, so host
+speed drift (including hosts that flip between speed states) largely cancels
+out. A case regresses when its relative time exceeds the baseline by more than
+its threshold (default 1.5x); any regression makes the run exit non-zero.
+--update measures with UPDATE_REPEAT_FACTOR times the repeats. Baselines are
+still best recorded on the machine (or CI runner class) that compares against them.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.models.chat import ChatRoom, ChatRoomType
+from app.models.document import Document, DocumentVersion
+from app.models.goal import Goal, KeyResult, KeyResultType
+from app.models.project import Project, ProjectMember
+from app.models.task import Task, TaskAssignment, TaskStatus, TeamRole
+from app.models.team import Team, TeamMember, TeamMemberRole
+from app.models.user import FocusMode, User, UserProfile
+from app.services.agora_service import AgoraService
+from app.services.ai_service import ai_service
+from app.services.auth_service import AuthService
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+DEFAULT_THRESHOLD = 1.5
+DEFAULT_REPEAT = 9
+UPDATE_REPEAT_FACTOR = 3  # Recorded baselines take the median over this many times the repeats
+
+
+class Case:
+    """
+    One benchmark. setup() runs untimed before every repeat and returns the
+    callable to time; that callable performs `ops` operations.
+    """
+
+    def __init__(self, name: str, setup: Callable[[], Callable[[], None]], ops: int, threshold: Optional[float] = None):
+        self.name = name
+        self.setup = setup
+        self.ops = ops
+        self.threshold = threshold
+
+    def measure(self, repeat: int) -> Tuple[float, float, float]:
+        """
+        Best-of-repeat nanoseconds per operation, the median reference loop time,
+        and the median over repeats of ns per operation relative to the reference
+        loops timed right around that repeat
+        """
+        self.setup()()  # warm-up: imports, caches, allocator
+        best = float("inf")
+        references: List[float] = []
+        relative: List[float] = []
+        for _ in range(repeat):
+            fn = self.setup()
+            # Like timeit: collect setup garbage up front and keep the collector out of the timed region
+            gc.collect()
+            gc.disable()
+            try:
+                before = _time_reference()
+                started = time.perf_counter_ns()
+                fn()
+                elapsed = time.perf_counter_ns() - started
+                after = _time_reference()
+            finally:
+                gc.enable()
+            reference = (before + after) / 2
+            best = min(best, elapsed)
+            references.append(reference)
+            relative.append(elapsed / self.ops / reference)
+        return best / self.ops, statistics.median(references), statistics.median(relative)
+
+
+def _time_reference() -> int:
+    """
+    A fixed slice of plain interpreter work (dict, str and arithmetic ops).
+    Timing it next to every case lets comparisons cancel out host speed drift
+    (CPU frequency scaling, noisy neighbours) between and within runs.
+    """
+    started = time.perf_counter_ns()
+    table: Dict[str, int] = {}
+    for i in range(20_000):
+        key = "k" + str(i & 255)
+        table[key] = table.get(key, 0) + i * 3
+    return time.perf_counter_ns() - started
+
+
+CASES: List[Case] = []
+
+
+def case(name: str, ops: int, threshold: Optional[float] = None):
+    def register(setup):
+        CASES.append(Case(name, setup, ops, threshold))
+        return setup
+    return register
+
+
+def run_sync(coro):
+    """Drive a coroutine that never actually suspends (the mock services) without an event loop"""
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("coroutine suspended; benchmark it under an event loop instead")
+
+
+# Auth
+
+@case("auth.jwt_issue", ops=2_000)
+def jwt_issue():
+    auth = AuthService()
+
+    def fn():
+        for i in range(2_000):
+            auth.create_access_token(f"user-{i}")
+    return fn
+
+
+@case("auth.jwt_verify", ops=2_000)
+def jwt_verify():
+    auth = AuthService()
+    tokens = [auth.create_access_token(f"user-{i}") for i in range(2_000)]
+
+    def fn():
+        for token in tokens:
+            auth.decode_access_token(token)
+    return fn
+
+
+def _auth_with_users(count: int) -> AuthService:
+    auth = AuthService()
+    now = datetime.utcnow().isoformat()
+    for i in range(count):
+        email = f"user{i}@example.com"
+        auth._users[email] = {
+            "id": str(uuid.UUID(int=i)),
+            "email": email,
+            "profile": UserProfile(display_name=f"User {i}").dict(),
+            "created_at": now,
+            "updated_at": now,
+        }
+    return auth
+
+
+def _get_user_by_id(count: int, lookups: int):
+    # Cache the populated service across repeats; lookups don't mutate it
+    auth = _auth_with_users(count)
+    rng = random.Random(count)
+    ids = [str(uuid.UUID(int=rng.randrange(count))) for _ in range(lookups)]
+
+    def setup():
+        def fn():
+            for user_id in ids:
+                run_sync(auth.get_user_by_id(user_id))
+        return fn
+    return setup
+
+
+for _count, _lookups in ((10, 2_000), (1_000, 200), (10_000, 20)):
+    CASES.append(Case(f"auth.get_user_by_id[{_count}]", _get_user_by_id(_count, _lookups), _lookups))
+
+
+# Firestore (de)serialisation, one representative document per model
+
+def _now(offset_days: int = 0) -> datetime:
+    return datetime.utcnow() - timedelta(days=offset_days)
+
+
+def sample_models() -> Dict[str, object]:
+    members = [f"user-{i}" for i in range(8)]
+    return {
+        "User": User(
+            id="user-0",
+            email="user0@example.com",
+            profile=UserProfile(display_name="User 0", bio="Ships things"),
+            last_active=_now(),
+            team_memberships=["team-0", "team-1"],
+            project_memberships=["project-0"],
+        ),
+        "Team": Team(
+            id="team-0",
+            name="Platform",
+            created_by="user-0",
+            members=[TeamMember(user_id=uid, role=TeamMemberRole.MEMBER, invited_by="user-0") for uid in members],
+        ),
+        "Project": Project(
+            id="project-0",
+            name="Launch",
+            team_id="team-0",
+            created_by="user-0",
+            start_date=_now(30),
+            due_date=_now(-30),
+            members=[ProjectMember(user_id=uid, role=TeamMemberRole.MEMBER, added_by="user-0") for uid in members],
+            task_ids=[f"task-{i}" for i in range(40)],
+        ),
+        "Task": Task(
+            id="task-0",
+            title="Write the launch post",
+            project_id="project-0",
+            created_by="user-0",
+            description="Draft, review and publish",
+            quest_document="# Quest\n\n" + "Do the thing. " * 50,
+            due_date=_now(-3),
+            start_date=_now(5),
+            last_activity=_now(1),
+            quest_team=[TaskAssignment(user_id=uid, role=TeamRole.BUILDER, assigned_by="user-0") for uid in members[:3]],
+        ),
+        "ChatRoom": ChatRoom(
+            id="room-0",
+            name="launch",
+            room_type=ChatRoomType.PROJECT,
+            created_by="user-0",
+            participant_ids=members,
+            admin_ids=members[:1],
+            last_message_at=_now(),
+            message_count=1200,
+        ),
+        "Document": Document(
+            id="doc-0",
+            title="Launch plan",
+            content="# Plan\n\n" + "Milestone details. " * 200,
+            owner_id="user-0",
+            versions=[
+                DocumentVersion(version_number=v, content=f"version {v}", created_by="user-0")
+                for v in range(1, 6)
+            ],
+            collaborator_ids=members,
+        ),
+        "Goal": Goal(
+            id="goal-0",
+            title="Ship v1",
+            focus_mode=FocusMode.WORK,
+            owner_id="user-0",
+            target_date=_now(-60),
+            start_date=_now(30),
+            key_results=_key_results(5),
+        ),
+    }
+
+
+def _key_results(count: int) -> List[KeyResult]:
+    return [
+        KeyResult(id=f"kr-{i}", title=f"KR {i}", type=KeyResultType.METRIC, target_value=100.0, current_value=i * 10.0)
+        if i % 2 else
+        KeyResult(id=f"kr-{i}", title=f"KR {i}", type=KeyResultType.COMPLETION, is_completed=i % 4 == 0)
+        for i in range(count)
+    ]
+
+
+def _to_firestore(model, ops: int):
+    def setup():
+        def fn():
+            for _ in range(ops):
+                model.to_firestore()
+        return fn
+    return setup
+
+
+def _from_firestore(model, ops: int):
+    cls = type(model)
+    encoded = json.dumps(model.to_firestore())
+
+    def setup():
+        # from_firestore mutates its input, so every call gets a fresh document
+        documents = [json.loads(encoded) for _ in range(ops)]
+
+        def fn():
+            for data in documents:
+                cls.from_firestore(model.id, data)
+        return fn
+    return setup
+
+
+for _name, _model in sample_models().items():
+    CASES.append(Case(f"firestore.{_name}.to_firestore", _to_firestore(_model, 1_000), 1_000))
+    CASES.append(Case(f"firestore.{_name}.from_firestore", _from_firestore(_model, 1_000), 1_000))
+
+
+# Model logic
+
+@case("task.calculate_drift_status[10000]", ops=10_000)
+def task_drift():
+    rng = random.Random(7)
+    statuses = list(TaskStatus)
+    tasks = [
+        Task(
+            id=f"task-{i}",
+            title=f"Task {i}",
+            project_id="project-0",
+            created_by="user-0",
+            status=rng.choice(statuses),
+            last_activity=_now(rng.randint(0, 30)) if rng.random() < 0.8 else None,
+        )
+        for i in range(10_000)
+    ]
+
+    def fn():
+        for task in tasks:
+            task.calculate_drift_status()
+    return fn
+
+
+@case("goal.calculate_progress", ops=10_000)
+def goal_progress():
+    goal = Goal(id="goal-0", title="Ship v1", focus_mode=FocusMode.WORK, owner_id="user-0", key_results=_key_results(8))
+
+    def fn():
+        for _ in range(10_000):
+            goal.calculate_progress()
+    return fn
+
+
+# AI mention detection
+
+@case("ai.is_ai_mention", ops=10_000)
+def ai_mention():
+    rng = random.Random(11)
+    samples = [
+        "can someone review the sprint doc before standup",
+        "@ai summarize this thread please",
+        "hey ai what is blocking the release",
+        "the build failed again https://ci.example.com/run/42",
+        "@Alice can you take this one",
+    ]
+    messages = [f"{rng.choice(samples)} {i}" for i in range(10_000)]
+
+    def fn():
+        for message in messages:
+            ai_service._is_ai_mention(message)
+    return fn
+
+
+# Agora
+
+@case("agora.build_token", ops=1_000)
+def agora_build_token():
+    agora = AgoraService(app_id="0" * 32, app_certificate="1" * 32)
+    expires_at = int(time.time()) + 3600
+
+    def fn():
+        for uid in range(1_000):
+            agora.build_token(f"channel-{uid % 50}", uid, "publisher", expires_at)
+    return fn
+
+
+# Runner
+
+def load_baselines(path: str = BASELINES_PATH) -> Dict:
+    if not os.path.exists(path):
+        return {"cases": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baselines(results: Dict[str, Tuple[float, float, float]], path: str = BASELINES_PATH):
+    existing = load_baselines(path).get("cases", {})
+    cases = dict(existing)
+    for name, (ns_per_op, reference_ns, relative) in results.items():
+        entry = dict(existing.get(name, {}))
+        entry["ns_per_op"] = round(ns_per_op, 1)
+        entry["reference_ns"] = round(reference_ns)
+        entry["relative"] = float(f"{relative:.6g}")
+        cases[name] = entry
+    data = {
+        "machine": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "processor": platform.machine(),
+        },
+        "recorded_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "default_threshold": DEFAULT_THRESHOLD,
+        "cases": dict(sorted(cases.items())),
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def run(
+    selected: Optional[str] = None,
+    repeat: int = DEFAULT_REPEAT,
+    update: bool = False,
+    threshold: Optional[float] = None,
+    path: str = BASELINES_PATH,
+) -> int:
+    baselines = load_baselines(path)
+    default_threshold = threshold or baselines.get("default_threshold", DEFAULT_THRESHOLD)
+    results: Dict[str, Tuple[float, float, float]] = {}
+    regressions = []
+
+    cases = [c for c in CASES if not selected or selected in c.name]
+    if not cases:
+        print(f"no benchmark matches {selected!r}")
+        return 2
+
+    width = max(len(c.name) for c in cases)
+    for bench in cases:
+        ns_per_op, _, relative = results[bench.name] = bench.measure(
+            repeat * UPDATE_REPEAT_FACTOR if update else repeat
+        )
+        baseline = baselines.get("cases", {}).get(bench.name)
+        if update or not baseline or "relative" not in baseline:
+            verdict = "recorded" if update else "no baseline"
+            print(f"{bench.name:<{width}}  {_format_ns(ns_per_op):>10}/op  {verdict}")
+            continue
+        limit = threshold or baseline.get("threshold") or bench.threshold or default_threshold
+        # Compare in units of the reference loop so a slower or faster host doesn't read as a change
+        ratio = relative / baseline["relative"]
+        verdict = "ok"
+        if ratio > limit:
+            verdict = f"REGRESSION (> {limit:.2f}x)"
+            regressions.append(bench.name)
+        print(
+            f"{bench.name:<{width}}  {_format_ns(ns_per_op):>10}/op  "
+            f"baseline {_format_ns(baseline['ns_per_op']):>10}  {ratio:5.2f}x  {verdict}"
+        )
+
+    if update:
+        save_baselines(results, path)
+        print(f"baselines written to {path}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+def _format_ns(ns: float) -> str:
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} us"
+    return f"{ns:.0f} ns"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Hot-path microbenchmarks with baseline comparison")
+    parser.add_argument("-k", dest="selected", help="only run cases whose name contains this string")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed repeats per case (medians are compared)")
+    parser.add_argument("--update", action="store_true", help="record the measured times as the new baselines")
+    parser.add_argument("--threshold", type=float, help="override every case's allowed slowdown ratio")
+    parser.add_argument("--baselines", default=BASELINES_PATH, help="baseline file to compare against")
+    args = parser.parse_args(argv)
+    return run(args.selected, args.repeat, args.update, args.threshold, args.baselines)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,12 +3,18 @@ lifeOS FastAPI Backend
 Main application entry point
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
 
 from app.core.config import settings
+from app.core.logging import get_logger, setup_logging
+
+# Configure logging before importing services, some of which log at import time
+setup_logging()
+
 from app.api.auth import router as auth_router
 from app.api.users import router as users_router
 from app.api.teams import router as teams_router
@@ -18,21 +24,47 @@ from app.api.chat import router as chat_router
 from app.api.documents import router as documents_router
 from app.api.ai import router as ai_router
 from app.api.agora import router as agora_router
+from app.core.database import database
+from app.core.metrics import metrics
+from app.core.middleware import CompressionMiddleware, MetricsMiddleware, RequestIdMiddleware
+from app.services.agora_service import agora_service
+from app.services.briefing_service import briefing_service
+from app.services.call_registry import call_registry
+from app.services.http_client import http_client_pool
+from app.services.presence_service import presence_service
+from app.services.propagation_service import propagation_service
+from app.services.summary_worker import summary_worker
+from app.services.vector_index import vector_index
+
+logger = get_logger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     # Startup
-    print("🚀 Starting lifeOS backend...")
+    logger.info("Starting lifeOS backend")
     
-    # Database initialization removed (Turso service removed)
-    pass
+    # Local SQLite database (chat, presence write-back)
+    database.initialize()
+    await presence_service.start()
+    await propagation_service.start()
+    await summary_worker.start()
+    await briefing_service.start()
+    await call_registry.start()
     
     yield
     # Shutdown
-    print("🛑 Shutting down lifeOS backend...")
-    # Database cleanup removed (Turso service removed)
+    logger.info("Shutting down lifeOS backend")
+    await call_registry.stop()
+    await briefing_service.stop()
+    await summary_worker.stop()
+    await propagation_service.stop()
+    await presence_service.stop()
+    vector_index.close()
+    agora_service.close()
+    await http_client_pool.close()
+    database.close()
 
 
 # Create FastAPI application
@@ -41,6 +73,7 @@ app = FastAPI(
     description="A comprehensive team and personal productivity collaboration platform with integrated AI assistant",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
@@ -52,6 +85,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for large and streamed text responses, negotiated per request
+app.add_middleware(CompressionMiddleware)
+
+# Request IDs for logs and the X-Request-ID response header
+app.add_middleware(RequestIdMiddleware)
+
+# Per-route latency and in-flight metrics (outermost, so it times the whole stack)
+app.add_middleware(MetricsMiddleware)
+
 # Include API routers
 app.include_router(auth_router, prefix="/api/v1/auth", tags=["authentication"])
 app.include_router(users_router, prefix="/api/v1/users", tags=["users"])
@@ -80,6 +122,12 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """All in-process metrics in Prometheus text format"""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -0,0 +1,91 @@
+"""
+Test stand-in for Agora's channel event notifications
+Sends signed join/leave/destroy events to the app's /agora/webhook endpoint so
+occupancy can be exercised without a live Agora project
+"""
+
+import itertools
+import json
+import time
+import uuid
+from typing import Optional
+
+import httpx
+
+from app.core.config import settings
+from app.services.agora_service import sign_webhook
+
+# Event types as sent by Agora's notification service
+CHANNEL_DESTROY = 102
+BROADCASTER_JOIN = 103
+BROADCASTER_LEAVE = 104
+AUDIENCE_JOIN = 105
+AUDIENCE_LEAVE = 106
+
+
+class AgoraWebhookSimulator:
+    """
+    Posts Agora-shaped notifications to the webhook.
+    Pass a client on httpx.ASGITransport(app=app) to drive the app in-process.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        secret: Optional[str] = None,
+        path: str = "/api/v1/agora/webhook",
+    ):
+        self.client = client
+        self.secret = secret or settings.AGORA_WEBHOOK_SECRET
+        if not self.secret:
+            raise ValueError("AgoraWebhookSimulator needs a webhook secret")
+        self.path = path
+        self._seq = itertools.count(1)
+
+    async def send(
+        self,
+        event_type: int,
+        channel_name: str,
+        uid: int = 0,
+        seq: Optional[int] = None,
+        signature: Optional[str] = None,
+        **payload
+    ) -> httpx.Response:
+        """Post one event; seq overrides the running clientSeq and signature the computed one"""
+        ts = int(time.time())
+        body = json.dumps({
+            "noticeId": str(uuid.uuid4()),
+            "productId": 1,
+            "eventType": event_type,
+            "notifyMs": ts * 1000,
+            "payload": {
+                "channelName": channel_name,
+                "uid": uid,
+                "clientSeq": next(self._seq) if seq is None else seq,
+                "ts": ts,
+                **payload,
+            },
+        }).encode()
+        return await self.client.post(
+            self.path,
+            content=body,
+            headers={
+                "Content-Type": "application/json",
+                "Agora-Signature-V2": signature or sign_webhook(body, self.secret),
+            },
+        )
+
+    async def join(
+        self, channel_name: str, uid: int, role: str = "publisher", seq: Optional[int] = None
+    ) -> httpx.Response:
+        event_type = BROADCASTER_JOIN if role == "publisher" else AUDIENCE_JOIN
+        return await self.send(event_type, channel_name, uid, seq, platform=1)
+
+    async def leave(
+        self, channel_name: str, uid: int, role: str = "publisher", seq: Optional[int] = None
+    ) -> httpx.Response:
+        event_type = BROADCASTER_LEAVE if role == "publisher" else AUDIENCE_LEAVE
+        return await self.send(event_type, channel_name, uid, seq, platform=1, reason=1, duration=0)
+
+    async def destroy(self, channel_name: str) -> httpx.Response:
+        return await self.send(CHANNEL_DESTROY, channel_name)
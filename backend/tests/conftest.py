@@ -0,0 +1,44 @@
+"""
+Shared fixtures for the backend test suite
+
+Run from the backend directory:
+    python -m pytest -q
+
+The app's stores (SQLite database, vector index, AI cache) are pointed at a
+temporary directory before anything under app/ is imported. Async code is
+driven with asyncio.run, so no event-loop plugin is needed.
+"""
+
+import os
+import shutil
+import tempfile
+
+_STATE_DIR = tempfile.mkdtemp(prefix="lifeos-tests-")
+os.environ["LOCAL_DB_PATH"] = os.path.join(_STATE_DIR, "local.db")
+os.environ["VECTOR_INDEX_DIR"] = os.path.join(_STATE_DIR, "vector_index")
+os.environ.pop("AI_CACHE_DB_PATH", None)
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import pytest  # noqa: E402
+
+from app.models.user import User, UserProfile  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_STATE_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def user() -> User:
+    return User(id="user-test", email="test@example.com", profile=UserProfile(display_name="Test User"))
+
+
+@pytest.fixture
+def app(user):
+    """main.app with authentication replaced by the `user` fixture"""
+    from app.core.dependencies import get_current_user
+    from main import app
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield app
+    app.dependency_overrides.clear()
@@ -0,0 +1,128 @@
+"""
+Action-item extraction: strict de-duplication and the streamed SSE endpoint
+"""
+
+import asyncio
+
+import httpx
+
+from app.core.config import settings
+from app.services.action_items import ActionItemMerger
+
+from tests.test_ai_streaming import parse_sse
+
+
+def item(text: str, **fields):
+    return {"text": text, "assignee": None, "due_date": None, "priority": "medium", **fields}
+
+
+def test_merger_keeps_items_that_differ_only_in_numbers():
+    merger = ActionItemMerger()
+
+    merger.add([item(f"Alex will follow up on item {n}") for n in range(1200)])
+
+    assert len(merger.items) == 1200
+
+
+def test_merger_folds_repeats_from_overlapping_chunks():
+    merger = ActionItemMerger()
+
+    merger.add([item("Sam will send the launch checklist to the design team by Friday.")])
+    added = merger.add([
+        item("sam will send the launch checklist to the design team by friday", assignee="Sam", priority="high"),
+        item("Sam will send the updated launch checklist to the whole design team by Friday morning"),
+    ])
+
+    assert len(merger.items) == 2
+    assert added[0]["text"].startswith("Sam will send the updated")
+    assert merger.items[0]["assignee"] == "Sam"
+    assert merger.items[0]["priority"] == "high"
+
+
+def test_merger_never_merges_different_assignees_or_dates():
+    merger = ActionItemMerger()
+
+    merger.add([
+        item("Review the pull request", assignee="Sam"),
+        item("Review the pull request", assignee="Alex"),
+        item("Ship the release", due_date="2026-03-01"),
+        item("Ship the release", due_date="2026-03-08"),
+        item("Review the pull request", assignee="alex"),
+    ])
+
+    assert [(i["assignee"], i["due_date"]) for i in merger.items] == [
+        ("Sam", None), ("Alex", None), (None, "2026-03-01"), (None, "2026-03-08"),
+    ]
+
+
+def action_items_scope(headers=()):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/v1/ai/action-items",
+        "raw_path": b"/api/v1/ai/action-items",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"test"), (b"content-type", b"text/plain"), *headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("test", 80),
+    }
+
+
+def test_items_stream_while_the_transcript_is_still_uploading(app, monkeypatch):
+    monkeypatch.setattr(settings, "ACTION_ITEM_CHUNK_TOKENS", 64)
+    monkeypatch.setattr(settings, "ACTION_ITEM_OVERLAP_TOKENS", 8)
+    first = "".join(f"Alex will follow up on ticket {n}. " for n in range(40)).encode()
+    rest = "".join(f"Sam will review design {n}. " for n in range(40)).encode()
+
+    async def upload_in_two_parts():
+        incoming = asyncio.Queue()
+        await incoming.put({"type": "http.request", "body": first, "more_body": True})
+        chunks = []
+        first_items = asyncio.Event()
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                chunks.append(message["body"])
+                first_items.set()
+
+        async def receive():
+            return await incoming.get()
+
+        handler = asyncio.ensure_future(app(action_items_scope(), receive, send))
+        # Items from the first part arrive before the rest of the body is sent
+        await asyncio.wait_for(first_items.wait(), timeout=5)
+        await incoming.put({"type": "http.request", "body": rest, "more_body": False})
+        await asyncio.wait_for(handler, timeout=5)
+        return b"".join(chunks).decode()
+
+    events = parse_sse(asyncio.run(upload_in_two_parts()))
+
+    event, data = events[-1]
+    assert event == "done"
+    assert len(data["items"]) == 80
+
+
+def test_oversized_transcripts_are_rejected(app, monkeypatch):
+    monkeypatch.setattr(settings, "ACTION_ITEM_MAX_BODY_BYTES", 1000)
+    body = b"Alex will follow up. " * 100
+
+    async def post(content):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/v1/ai/action-items", content=content)
+
+    async def chunked():
+        for start in range(0, len(body), 200):
+            yield body[start:start + 200]
+
+    declared = asyncio.run(post(body))
+    streamed = asyncio.run(post(chunked()))
+
+    assert declared.status_code == 413
+    event, data = parse_sse(streamed.text)[-1]
+    assert event == "error"
+    assert data["status_code"] == 413
@@ -0,0 +1,21 @@
+"""
+Agora batch token requests are validated before any token is signed
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+
+async def post_batch(app, payload):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post("/api/v1/agora/batch-tokens", json=payload)
+
+
+@pytest.mark.parametrize("expiry_time", [None, 0, -60, "soon"])
+def test_batch_tokens_reject_invalid_expiry(app, expiry_time):
+    response = asyncio.run(post_batch(app, {"chat_room_id": "room-1", "expiry_time": expiry_time}))
+
+    assert response.status_code == 422
@@ -0,0 +1,101 @@
+"""
+Agora channel event webhook: signature checks and out-of-order delivery
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+
+import httpx
+import pytest
+
+from app.services.agora_service import agora_service
+from app.services.call_registry import call_registry
+
+from tests.agora_simulator import BROADCASTER_JOIN, AgoraWebhookSimulator
+
+SECRET = "webhook-test-secret"
+
+
+@pytest.fixture
+def secret(monkeypatch):
+    monkeypatch.setattr(agora_service, "webhook_secret", SECRET)
+    return SECRET
+
+
+def run_with_simulator(app, scenario, secret=SECRET):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await scenario(AgoraWebhookSimulator(client, secret=secret), client)
+
+    return asyncio.run(run())
+
+
+def test_signed_events_update_channel_occupancy(app, secret):
+    async def scenario(simulator, client):
+        joined = [await simulator.join("webhook-signed", uid) for uid in (11, 12)]
+        await simulator.join("webhook-signed", 13, role="audience")
+        left = await simulator.leave("webhook-signed", 12)
+        return joined + [left]
+
+    responses = run_with_simulator(app, scenario)
+
+    assert [r.json()["applied"] for r in responses] == [True, True, True]
+    assert call_registry.occupancy("webhook-signed") == {
+        "channel_name": "webhook-signed", "participant_count": 2, "publishers": 1, "audience": 1, "is_active": True,
+    }
+
+
+def test_events_with_a_bad_signature_are_rejected(app, secret):
+    async def scenario(simulator, client):
+        forged = await simulator.send(BROADCASTER_JOIN, "webhook-forged", 21, signature="0" * 64)
+        wrong_secret = await AgoraWebhookSimulator(client, secret="not-the-secret").join("webhook-forged", 22)
+        unsigned = await client.post("/api/v1/agora/webhook", content=b"{}")
+        return forged, wrong_secret, unsigned
+
+    responses = run_with_simulator(app, scenario)
+
+    assert [r.status_code for r in responses] == [401, 401, 401]
+    assert call_registry.occupancy("webhook-forged")["participant_count"] == 0
+
+
+def test_legacy_sha1_signature_is_accepted(app, secret):
+    body = json.dumps({"eventType": BROADCASTER_JOIN, "payload": {"channelName": "webhook-legacy", "uid": 31}}).encode()
+
+    async def scenario(simulator, client):
+        return await client.post(
+            "/api/v1/agora/webhook",
+            content=body,
+            headers={"Agora-Signature": hmac.new(SECRET.encode(), body, hashlib.sha1).hexdigest()},
+        )
+
+    response = run_with_simulator(app, scenario)
+
+    assert response.status_code == 200
+    assert call_registry.occupancy("webhook-legacy")["participant_count"] == 1
+
+
+def test_webhook_is_disabled_without_a_secret(app, monkeypatch):
+    monkeypatch.setattr(agora_service, "webhook_secret", None)
+
+    async def scenario(simulator, client):
+        return await simulator.join("webhook-disabled", 41)
+
+    assert run_with_simulator(app, scenario).status_code == 503
+
+
+def test_out_of_order_events_are_dropped_by_client_seq(app, secret):
+    async def scenario(simulator, client):
+        # The leave (seq 5) overtakes the join (seq 4) it followed
+        left = await simulator.leave("webhook-reordered", 51, seq=5)
+        late_join = await simulator.join("webhook-reordered", 51, seq=4)
+        replayed = await simulator.leave("webhook-reordered", 51, seq=5)
+        rejoined = await simulator.join("webhook-reordered", 51, seq=6)
+        return left, late_join, replayed, rejoined
+
+    responses = run_with_simulator(app, scenario)
+
+    assert [r.json()["applied"] for r in responses] == [True, False, False, True]
+    assert call_registry.occupancy("webhook-reordered")["participant_count"] == 1
@@ -0,0 +1,56 @@
+"""
+AI response cache: callers own the values they get back
+"""
+
+import asyncio
+
+from app.services.ai_cache import AIResponseCache
+from app.services.ai_providers import MockProvider
+from app.services.ai_service import AIService
+
+
+def test_mutating_a_cached_result_does_not_change_the_cache():
+    cache = AIResponseCache(db_path="")
+    stored = {"category": "work", "tags": ["launch"]}
+
+    async def scenario():
+        await cache.set("key", stored, ttl=60)
+        stored["tags"].append("set-after")
+        first = await cache.get("key")
+        first["tags"].append("got")
+        return await cache.get("key")
+
+    assert asyncio.run(scenario()) == {"category": "work", "tags": ["launch"]}
+
+
+def test_concurrent_callers_of_one_flight_get_separate_objects():
+    service = AIService(provider=MockProvider())
+    service.cache = AIResponseCache(db_path="")
+
+    async def scenario():
+        return await asyncio.gather(*(
+            service.classify_content("Quarterly planning notes") for _ in range(3)
+        ))
+
+    results = asyncio.run(scenario())
+
+    assert results[0] == results[1] == results[2]
+    assert results[0] is not results[1] and results[1] is not results[2]
+    results[0].clear()
+    assert results[1]
+
+
+def test_tracked_source_versions_are_bounded():
+    cache = AIResponseCache(max_entries=3, db_path="")
+
+    async def scenario():
+        for i in range(10):
+            await cache.observe_version(f"doc-{i}", 1)
+        await cache.set("doc-9:v1", "summary", ttl=60, source_id="doc-9", source_version=1)
+        await cache.observe_version("doc-9", 2)
+
+    asyncio.run(scenario())
+
+    assert list(cache._source_versions) == ["doc-7", "doc-8", "doc-9"]
+    assert cache._source_versions["doc-9"] == 2
+    assert cache._source_keys == {}
@@ -0,0 +1,70 @@
+"""
+Retrieval-augmented prompts: indexed workspace snippets reach the AI context
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.ai_providers import MockProvider
+from app.services.ai_service import AIService
+from app.services.context_builder import ContextSnippet
+from app.services.vector_index import partition_for, vector_index
+
+
+@pytest.fixture
+def indexed():
+    async def index():
+        await vector_index.upsert(partition_for(team_id="team-r"), ContextSnippet(
+            source_type="task", source_id="task-r", version="1", text="Task: fix invoice export timeout",
+        ))
+        await vector_index.upsert(partition_for(user_id="user-r"), ContextSnippet(
+            source_type="document", source_id="doc-r", version="1", text="Document: invoice export runbook",
+        ))
+        await vector_index.upsert(partition_for(team_id="other-team"), ContextSnippet(
+            source_type="task", source_id="task-x", version="1", text="Task: invoice export for another team",
+        ))
+
+    asyncio.run(index())
+
+
+@pytest.fixture
+def service():
+    service = AIService(provider=MockProvider())
+    service.built = []
+    build = service._build_context
+
+    def recording_build(*args, **kwargs):
+        service.built.append([snippet.text for snippet in kwargs.get("snippets") or []])
+        return build(*args, **kwargs)
+
+    service._build_context = recording_build
+    return service
+
+
+def test_task_suggestions_draw_on_team_and_user_partitions(indexed, service):
+    asyncio.run(service.generate_task_suggestions(
+        {"name": "Invoice export", "description": "timeout", "team_id": "team-r"}, {"id": "user-r"}
+    ))
+
+    assert sorted(service.built[0]) == ["Document: invoice export runbook", "Task: fix invoice export timeout"]
+
+
+def test_chat_replies_include_retrieved_snippets(indexed, service):
+    reply = asyncio.run(service.process_chat_message(
+        "@ai why does invoice export time out?", {"room_id": "room-r", "team_id": "team-r"}, {"id": "user-r"}
+    ))
+
+    assert reply is not None
+    assert "Task: fix invoice export timeout" in service.built[0]
+    assert "Task: invoice export for another team" not in service.built[0]
+
+
+def test_briefings_retrieve_per_user(indexed, service):
+    asyncio.run(service.generate_daily_briefings([
+        {"user_id": "user-r", "name": "R", "goals": ["invoice export"], "tasks": [], "team_ids": ["team-r"]},
+        {"user_id": "user-empty", "name": "E", "goals": [], "tasks": [], "team_ids": []},
+    ]))
+
+    assert sorted(len(snippets) for snippets in service.built) == [0, 2]
+    assert not vector_index.has_partition(partition_for(user_id="user-empty"))
@@ -0,0 +1,183 @@
+"""
+AI chat streaming (SSE) against the fake provider: token delivery, time to
+first token, error events and cancellation when the client goes away
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services import ai_service as ai_service_module
+from app.services.ai_providers import FakeProvider, ProviderError
+from app.services.ai_service import (
+    AI_STREAM_CANCELLED,
+    AI_STREAM_TOKENS,
+    AI_TIME_TO_FIRST_TOKEN,
+    AIService,
+)
+
+
+def fake_provider(**overrides) -> FakeProvider:
+    options = {"latency": "fixed:0.05", "tokens_per_second": 0, "response_tokens": 12, "seed": 7}
+    options.update(overrides)
+    return FakeProvider(**options)
+
+
+def parse_sse(body: str):
+    """(event, data) pairs from a Server-Sent Events body"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = "message", None
+        for line in block.splitlines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+        events.append((event, data))
+    return events
+
+
+async def post_chat(app, payload):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post("/api/v1/ai/chat", json=payload)
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    provider = fake_provider()
+    monkeypatch.setattr(ai_service_module.ai_service, "provider", provider)
+    return provider
+
+
+def test_stream_response_yields_every_token_and_records_ttft():
+    service = AIService(provider=fake_provider())
+    ttft_count = AI_TIME_TO_FIRST_TOKEN.count(model="gpt-4")
+    ttft_sum = AI_TIME_TO_FIRST_TOKEN.sum(model="gpt-4")
+    streamed = AI_STREAM_TOKENS.value(model="gpt-4")
+
+    async def collect():
+        return [token async for token in service.stream_response("plan the launch", model="gpt-4")]
+
+    tokens = asyncio.run(collect())
+
+    assert len(tokens) == 12
+    assert tokens[0].startswith("AI")
+    assert AI_TIME_TO_FIRST_TOKEN.count(model="gpt-4") == ttft_count + 1
+    assert AI_TIME_TO_FIRST_TOKEN.sum(model="gpt-4") - ttft_sum >= 0.05
+    assert AI_STREAM_TOKENS.value(model="gpt-4") == streamed + 12
+
+
+def test_single_token_streams_can_still_fail():
+    provider = fake_provider(latency="fixed:0", response_tokens=1, stream_error_rate=1.0)
+
+    async def consume():
+        received = []
+        with pytest.raises(ProviderError):
+            async for token in provider.stream("hi", None, "fake"):
+                received.append(token)
+        return received
+
+    assert len(asyncio.run(consume())) == 1
+
+
+def test_closing_the_stream_cancels_the_provider_call():
+    provider = fake_provider(tokens_per_second=100)
+    service = AIService(provider=provider)
+    cancelled = AI_STREAM_CANCELLED.value(model="gpt-3.5-turbo")
+
+    async def read_three_then_close():
+        stream = service.stream_response("summarize")
+        tokens = [await stream.__anext__() for _ in range(3)]
+        assert provider.in_flight == 1
+        await stream.aclose()
+        return tokens
+
+    assert len(asyncio.run(read_three_then_close())) == 3
+    assert provider.in_flight == 0
+    assert AI_STREAM_CANCELLED.value(model="gpt-3.5-turbo") == cancelled + 1
+
+
+def test_unknown_models_share_one_metric_label():
+    service = AIService(provider=fake_provider(latency="fixed:0"))
+    before = AI_STREAM_TOKENS.value(model="other")
+
+    async def collect():
+        return [token async for token in service.stream_response("hi", model="client-chosen-name-123")]
+
+    asyncio.run(collect())
+
+    assert AI_STREAM_TOKENS.value(model="other") == before + 12
+    assert AI_STREAM_TOKENS.value(model="client-chosen-name-123") == 0
+
+
+def test_chat_endpoint_streams_tokens_then_done(app, provider):
+    response = asyncio.run(post_chat(app, {"message": "what is due today?"}))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert [event for event, _ in events] == ["message"] * 12 + ["done"]
+    assert "".join(data["token"] for _, data in events[:-1]).startswith("AI Response to: what is due today?")
+
+
+def test_chat_endpoint_reports_provider_failure_as_error_event(app, provider):
+    provider.stream_error_rate = 1.0
+
+    response = asyncio.run(post_chat(app, {"message": "hello"}))
+
+    assert response.status_code == 200
+    event, data = parse_sse(response.text)[-1]
+    assert event == "error"
+    assert data["status_code"] == 500
+
+
+def test_chat_endpoint_rejects_models_outside_the_allow_list(app, provider):
+    response = asyncio.run(post_chat(app, {"message": "hello", "model": "x" * 40}))
+
+    assert response.status_code == 422
+
+
+def test_client_disconnect_cancels_the_stream_mid_response(app, provider):
+    provider.tokens_per_second = 50
+    provider.response_tokens = 200
+    cancelled = AI_STREAM_CANCELLED.value(model="gpt-3.5-turbo")
+
+    async def disconnect_after_first_tokens():
+        body = json.dumps({"message": "long answer please"}).encode()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/api/v1/ai/chat",
+            "raw_path": b"/api/v1/ai/chat",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"test"), (b"content-type", b"application/json")],
+            "client": ("127.0.0.1", 50000),
+            "server": ("test", 80),
+        }
+        incoming = asyncio.Queue()
+        await incoming.put({"type": "http.request", "body": body, "more_body": False})
+        chunks = []
+        disconnected = asyncio.Event()
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                chunks.append(message["body"])
+                if len(chunks) == 3 and not disconnected.is_set():
+                    disconnected.set()
+                    await incoming.put({"type": "http.disconnect"})
+
+        await asyncio.wait_for(app(scope, incoming.get, send), timeout=5)
+        return chunks
+
+    chunks = asyncio.run(disconnect_after_first_tokens())
+
+    assert 3 <= len(chunks) < 200
+    assert provider.in_flight == 0
+    assert AI_STREAM_CANCELLED.value(model="gpt-3.5-turbo") == cancelled + 1
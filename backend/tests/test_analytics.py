@@ -0,0 +1,70 @@
+"""
+Team health and productivity analytics over task history
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from app.models.task import Task, TaskAssignment, TaskStatus, TeamRole
+from app.services.ai_providers import MockProvider
+from app.services.ai_service import AIService
+from app.services.analytics_engine import TaskColumns, analytics_engine
+
+
+def task(task_id: str, status: TaskStatus, **fields) -> Task:
+    return Task(
+        id=task_id, title=task_id, project_id="project-a", created_by="user-a", status=status,
+        quest_team=[TaskAssignment(user_id="user-a", role=TeamRole.LEADER, assigned_by="user-a")],
+        **fields,
+    )
+
+
+def test_cancelled_and_done_tasks_are_never_overdue():
+    past = datetime.utcnow() - timedelta(days=3)
+    team, users = analytics_engine.snapshot(TaskColumns.from_tasks([
+        task("open", TaskStatus.IN_PROGRESS, due_date=past),
+        task("cancelled", TaskStatus.CANCELLED, due_date=past),
+        task("done", TaskStatus.DONE, due_date=past, completed_date=past),
+    ]))
+
+    assert team.overdue == 1
+    assert users[0].overdue == 1
+
+
+def test_team_without_tasks_reports_no_health_score():
+    service = AIService(provider=MockProvider())
+
+    empty = asyncio.run(service.analyze_team_health({"tasks": []}))
+    cancelled_only = asyncio.run(service.analyze_team_health({"tasks": [task("c", TaskStatus.CANCELLED)]}))
+
+    for result in (empty, cancelled_only):
+        assert result["overall_health"] is None
+        assert result["collaboration_score"] is None
+        assert "performing well" not in " ".join(result["recommendations"])
+
+
+def test_user_productivity_reports_focus_time_average():
+    service = AIService(provider=MockProvider())
+    done = datetime.utcnow() - timedelta(days=1)
+    tasks = [
+        task("a", TaskStatus.DONE, completed_date=done, estimated_hours=2, actual_hours=3),
+        task("b", TaskStatus.DONE, completed_date=done, estimated_hours=1, actual_hours=1),
+        task("c", TaskStatus.IN_PROGRESS, actual_hours=8),
+    ]
+
+    result = asyncio.run(service.analyze_user_productivity({"tasks": tasks, "user_id": "user-a"}))
+
+    assert result["focus_time_average"] == 2.0
+    assert result["completion_rate"] == 67
+
+
+def test_cancelled_tasks_are_never_drifting():
+    stale = datetime.utcnow() - timedelta(days=30)
+    team, users = analytics_engine.snapshot(TaskColumns.from_tasks([
+        task("open", TaskStatus.IN_PROGRESS, created_at=stale, last_activity=stale),
+        task("cancelled", TaskStatus.CANCELLED, created_at=stale, last_activity=stale),
+        task("done", TaskStatus.DONE, created_at=stale, last_activity=stale, completed_date=stale),
+    ]))
+
+    assert team.drifting == 1
+    assert users[0].drifting == 1
@@ -0,0 +1,123 @@
+"""
+Per-user chat inbox: ordering, unread counts, cursor paging and the
+backfill for rooms created before the inbox existed
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from app.core.database import Database
+from app.models.user import User, UserProfile
+from app.services.chat_service import ChatService
+
+
+def member(user_id: str) -> User:
+    return User(id=user_id, email=f"{user_id}@example.com", profile=UserProfile(display_name=user_id.title()))
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(os.path.join(tmp_path, "chat.db"))
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def chat(db):
+    return ChatService(db)
+
+
+def test_inbox_lists_most_recent_activity_first(chat):
+    alice, bob = member("alice"), member("bob")
+
+    async def scenario():
+        rooms = [await chat.create_room(alice, [bob], name=f"room {i}") for i in range(3)]
+        await chat.send_message(rooms[0]["id"], bob, "bump the oldest room")
+        return rooms, (await chat.get_inbox("alice"))[0]
+
+    rooms, entries = asyncio.run(scenario())
+
+    assert [entry.room_id for entry in entries] == [rooms[0]["id"], rooms[2]["id"], rooms[1]["id"]]
+    assert entries[0].last_message_preview == "bump the oldest room"
+    assert entries[0].last_sender_name == "Bob"
+
+
+def test_unread_counts_skip_the_sender_and_reset_on_read(chat):
+    alice, bob = member("alice"), member("bob")
+
+    async def scenario():
+        room = await chat.create_room(alice, [bob])
+        for text in ("one", "two", "three"):
+            await chat.send_message(room["id"], alice, text)
+        before = {user: (await chat.get_inbox(user))[0][0].unread_count for user in ("alice", "bob")}
+        await chat.mark_read(room["id"], "bob")
+        return before, (await chat.get_inbox("bob"))[0][0].unread_count
+
+    before, after_read = asyncio.run(scenario())
+
+    assert before == {"alice": 0, "bob": 3}
+    assert after_read == 0
+
+
+def test_cursor_pages_cover_every_room_once(chat):
+    alice = member("alice")
+
+    async def scenario():
+        created = {(await chat.create_room(alice, []))["id"] for _ in range(7)}
+        seen, cursor = [], None
+        while True:
+            entries, cursor = await chat.get_inbox("alice", limit=3, cursor=cursor)
+            seen.extend(entry.room_id for entry in entries)
+            if cursor is None:
+                return created, seen
+
+    created, seen = asyncio.run(scenario())
+
+    assert len(seen) == len(created)
+    assert set(seen) == created
+
+
+def test_rooms_without_inbox_rows_are_backfilled_on_startup(tmp_path):
+    path = os.path.join(tmp_path, "legacy.db")
+    legacy = Database(path)
+
+    def seed(conn):
+        conn.execute(
+            """
+            INSERT INTO chats (id, name, type, created_by, created_at, updated_at, last_message_id, last_message_at)
+            VALUES ('room-1', 'Legacy', 'group', 'alice', '2024-01-01T00:00:00', '2024-01-01T00:00:00',
+                    'message-1', '2024-01-02T00:00:00')
+            """
+        )
+        conn.executemany(
+            "INSERT INTO chat_participants (id, chat_id, user_id, user_name, joined_at) VALUES (?, 'room-1', ?, ?, ?)",
+            [("p-1", "alice", "Alice", "2024-01-01T00:00:00"), ("p-2", "bob", "Bob", "2024-01-01T00:00:00")],
+        )
+        conn.execute(
+            """
+            INSERT INTO chat_messages (id, room_id, content, sender_id, sender_name, created_at)
+            VALUES ('message-1', 'room-1', 'hello from before', 'alice', 'Alice', '2024-01-02T00:00:00')
+            """
+        )
+        conn.execute("DELETE FROM chat_inbox")
+
+    legacy.execute(seed)
+    legacy.close()
+
+    restarted = Database(path)
+    try:
+        entries = {user: asyncio.run(ChatService(restarted).get_inbox(user))[0] for user in ("alice", "bob")}
+        asyncio.run(ChatService(restarted).send_message("room-1", member("alice"), "and after"))
+        restarted.close()
+        # Backfilling again on the next start leaves live rows alone
+        again = asyncio.run(ChatService(restarted).get_inbox("bob"))[0]
+    finally:
+        restarted.close()
+
+    for rows in entries.values():
+        assert [(row.room_id, row.room_name, row.last_message_preview) for row in rows] == [
+            ("room-1", "Legacy", "hello from before")
+        ]
+    assert [(row.last_message_preview, row.unread_count) for row in again] == [("and after", 1)]
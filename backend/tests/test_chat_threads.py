@@ -0,0 +1,76 @@
+"""
+Message threads: reply counts on the root and keyset paging of replies
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from app.core.database import Database
+from app.services.chat_service import ChatService
+
+from tests.test_chat_inbox import member
+
+
+@pytest.fixture
+def chat(tmp_path):
+    database = Database(os.path.join(tmp_path, "threads.db"))
+    yield ChatService(database)
+    database.close()
+
+
+def start_thread(chat, replies: int):
+    alice, bob = member("alice"), member("bob")
+
+    async def scenario():
+        room = await chat.create_room(alice, [bob])
+        root = await chat.send_message(room["id"], alice, "root")
+        sent = [await chat.send_message(room["id"], bob, f"reply {i}", reply_to_id=root.id) for i in range(replies)]
+        return room["id"], root.id, sent
+
+    return asyncio.run(scenario())
+
+
+def read_all_replies(chat, room_id, root_id, limit):
+    replies, cursor = [], None
+    while True:
+        page = asyncio.run(chat.get_thread(room_id, root_id, limit=limit, cursor=cursor))
+        replies.extend(reply["id"] for reply in page["replies"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return page["root"], replies
+
+
+def test_replies_bump_the_root_thread_count(chat):
+    room_id, root_id, sent = start_thread(chat, 3)
+
+    root, replies = read_all_replies(chat, room_id, root_id, limit=50)
+
+    assert root["thread_count"] == 3
+    assert root["thread_last_reply_at"] == sent[-1].created_at.isoformat(timespec="microseconds")
+    assert replies == [message.id for message in sent]
+
+
+def test_paging_keeps_replies_that_share_a_timestamp(chat):
+    room_id, root_id, sent = start_thread(chat, 5)
+    chat.db.execute(lambda conn: conn.execute(
+        "UPDATE chat_messages SET created_at = '2024-01-01T00:00:00.000000' WHERE reply_to_id = ?", (root_id,)
+    ))
+
+    _, replies = read_all_replies(chat, room_id, root_id, limit=2)
+
+    assert sorted(replies) == sorted(message.id for message in sent)
+    assert len(replies) == len(set(replies))
+
+
+def test_replies_must_target_a_message_in_the_same_room(chat):
+    room_id, root_id, _ = start_thread(chat, 0)
+    other = asyncio.run(chat.create_room(member("alice"), []))
+
+    with pytest.raises(ValueError):
+        asyncio.run(chat.send_message(other["id"], member("alice"), "wrong room", reply_to_id=root_id))
+
+    root = asyncio.run(chat.get_thread(room_id, root_id))["root"]
+    assert root["thread_count"] == 0
+    assert asyncio.run(chat.get_thread(other["id"], root_id)) is None
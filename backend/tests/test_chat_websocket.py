@@ -0,0 +1,37 @@
+"""
+Chat WebSocket: malformed frames are skipped without dropping the connection
+"""
+
+import asyncio
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.services.auth_service import auth_service
+from app.services.chat_service import chat_service
+from app.services.presence_service import presence_service
+
+
+def wait_until_typing(room_id, user_id, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while user_id not in presence_service.get_room_presence(room_id)["typing"]:
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_malformed_frames_are_skipped(app):
+    user = asyncio.run(auth_service.create_user(f"{uuid.uuid4().hex}@example.com", "Socket User"))
+    room = asyncio.run(chat_service.create_room(user, []))
+    url = f"/api/v1/chat/ws/{room['id']}?token={auth_service.create_access_token(user.id)}"
+
+    with TestClient(app).websocket_connect(url) as websocket:
+        websocket.send_text("{broken")
+        websocket.send_text("[1, 2]")
+        websocket.send_text('"typing"')
+        websocket.send_bytes(b"\xff")
+        websocket.send_json({"type": "typing", "is_typing": True})
+
+        assert wait_until_typing(room["id"], user.id)
@@ -0,0 +1,128 @@
+"""
+Negotiated gzip/brotli compression: per-chunk flushing for streams,
+minimum_size and passthrough of responses that are already encoded
+"""
+
+import asyncio
+import gzip
+import zlib
+
+import pytest
+
+from app.core.middleware import BROTLI_AVAILABLE, CompressionMiddleware, negotiate_encoding
+
+EVENT = b"data: " + b"token " * 40 + b"\n\n"
+
+
+def asgi_app(chunks, content_type=b"text/event-stream", headers=()):
+    """An ASGI app that sends chunks as separate body messages"""
+    async def app(scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", content_type), *headers],
+        })
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+
+    return app
+
+
+def run(app, accept_encoding="gzip", **options):
+    """Drive the middleware directly and return (start message, body messages)"""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "method": "GET", "path": "/", "query_string": b"",
+        "headers": [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else [],
+    }
+    asyncio.run(CompressionMiddleware(app, **options)(scope, receive, send))
+    return sent[0], sent[1:]
+
+
+def header(message, name):
+    for key, value in message["headers"]:
+        if key.decode().lower() == name:
+            return value.decode()
+    return None
+
+
+def test_each_streamed_chunk_decodes_on_arrival():
+    chunks = [EVENT.replace(b"token", f"t{i}".encode()) for i in range(3)]
+
+    start, bodies = run(asgi_app(chunks), minimum_size=10_000)
+
+    assert header(start, "content-encoding") == "gzip"
+    assert header(start, "content-length") is None
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Without a flush per chunk the first events would sit in the compressor's buffer
+    assert [decoder.decompress(body["body"]) for body in bodies] == chunks
+    assert [body["more_body"] for body in bodies] == [True, True, False]
+    assert decoder.eof
+
+
+def test_streams_pass_through_when_stream_compression_is_off():
+    start, bodies = run(asgi_app([EVENT, EVENT]), compress_streams=False)
+
+    assert header(start, "content-encoding") is None
+    assert b"".join(body["body"] for body in bodies) == EVENT * 2
+
+
+@pytest.mark.parametrize("size, compressed", [(100, False), (5000, True)])
+def test_single_bodies_below_minimum_size_are_sent_as_is(size, compressed):
+    body = b"x" * size
+
+    start, bodies = run(asgi_app([body], b"application/json"), minimum_size=1024)
+
+    assert (header(start, "content-encoding") == "gzip") is compressed
+    assert header(start, "vary") == "Accept-Encoding"
+    payload = bodies[0]["body"]
+    if compressed:
+        assert header(start, "content-length") == str(len(payload))
+        payload = gzip.decompress(payload)
+    assert payload == body
+
+
+@pytest.mark.parametrize("content_type, headers", [
+    (b"application/json", [(b"content-encoding", b"br")]),
+    (b"image/png", []),
+])
+def test_encoded_and_binary_responses_pass_through(content_type, headers):
+    body = b"\x00" * 5000
+
+    start, bodies = run(asgi_app([body], content_type, headers), minimum_size=0)
+
+    assert header(start, "content-encoding") == (headers[0][1].decode() if headers else None)
+    assert bodies[0]["body"] == body
+
+
+def test_clients_without_accept_encoding_get_identity():
+    start, bodies = run(asgi_app([EVENT * 50], b"text/plain"), accept_encoding=None, minimum_size=0)
+
+    assert header(start, "content-encoding") is None
+    assert bodies[0]["body"] == EVENT * 50
+
+
+def test_negotiation_honours_quality_values():
+    preferred = "br" if BROTLI_AVAILABLE else "gzip"
+
+    assert negotiate_encoding("gzip, deflate, br") == preferred
+    assert negotiate_encoding("br;q=0.5, gzip;q=0.9") == "gzip"
+    assert negotiate_encoding("gzip;q=0, identity") is None
+    assert negotiate_encoding("*") == preferred
+
+
+def test_brotli_streams_flush_each_chunk():
+    brotli = pytest.importorskip("brotli")
+
+    start, bodies = run(asgi_app([EVENT, EVENT]), accept_encoding="br", minimum_size=0)
+
+    assert header(start, "content-encoding") == "br"
+    decoder = brotli.Decompressor()
+    assert [decoder.process(body["body"]) for body in bodies] == [EVENT, EVENT]
@@ -0,0 +1,159 @@
+"""
+Single-flight coalescing, token-bucket rate limiting and provider limiters
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.concurrency import SINGLE_FLIGHT_SHARED, ProviderLimiter, SingleFlight, TokenBucket
+
+
+def test_concurrent_calls_with_one_key_share_a_single_run():
+    flight = SingleFlight("test-share")
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return {"answer": 42}
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do("key", compute) for _ in range(5)))
+        other = await flight.do("other", compute)
+        return results, other
+
+    shared_before = SINGLE_FLIGHT_SHARED.value(name="test-share")
+    results, other = asyncio.run(scenario())
+
+    assert len(calls) == 2
+    assert all(result is results[0] for result in results)
+    assert other == {"answer": 42}
+    assert SINGLE_FLIGHT_SHARED.value(name="test-share") - shared_before == 4
+    assert flight.in_flight == 0
+
+
+def test_a_failed_flight_fails_every_caller_and_is_not_reused():
+    flight = SingleFlight("test-fail")
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise RuntimeError("upstream down")
+        return "ok"
+
+    async def scenario():
+        failed = await asyncio.gather(*(flight.do("key", flaky) for _ in range(3)), return_exceptions=True)
+        return failed, await flight.do("key", flaky)
+
+    failed, retried = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in failed)
+    assert retried == "ok"
+    assert len(attempts) == 2
+
+
+def test_cancelling_one_caller_leaves_the_shared_call_running():
+    flight = SingleFlight("test-cancel")
+    finished = []
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+        return "done"
+
+    async def scenario():
+        first = asyncio.create_task(flight.do("key", slow))
+        second = asyncio.create_task(flight.do("key", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
+    assert finished == [1]
+
+
+def test_token_bucket_allows_a_burst_then_waits_for_refill():
+    bucket = TokenBucket(rate=50, capacity=2)
+
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    started = time.monotonic()
+    asyncio.run(bucket.acquire())
+    # One token at 50/s takes ~20 ms to refill
+    assert time.monotonic() - started >= 0.015
+
+
+def test_provider_limiter_caps_concurrency():
+    limiter = ProviderLimiter("test-cap", max_concurrency=2, rate=1000, burst=1000)
+    peak = []
+
+    async def call():
+        async with limiter.slot():
+            peak.append(limiter.active)
+            await asyncio.sleep(0.01)
+
+    async def scenario():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(scenario())
+
+    assert max(peak) == 2
+    assert (limiter.active, limiter.waiting) == (0, 0)
+
+
+def test_cancelled_waiter_releases_its_place():
+    limiter = ProviderLimiter("test-waiter", max_concurrency=1, rate=1000, burst=1000)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def holder():
+            async with limiter.slot():
+                await release.wait()
+
+        held = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(holder())
+        await asyncio.sleep(0.01)
+        assert limiter.waiting == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        release.set()
+        await held
+
+        # The slot is free again for a fresh caller
+        async with limiter.slot():
+            return limiter.active, limiter.waiting
+
+    assert asyncio.run(scenario()) == (1, 0)
+    assert (limiter.active, limiter.waiting) == (0, 0)
+
+
+def test_cancelling_a_rate_limited_waiter_returns_its_concurrency_slot():
+    limiter = ProviderLimiter("test-rate", max_concurrency=2, rate=1, burst=1)
+
+    async def call():
+        async with limiter.slot():
+            pass
+
+    async def scenario():
+        await call()
+        # The bucket is empty, so this caller holds a slot while it waits ~1s for a token
+        waiter = asyncio.create_task(call())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return limiter._semaphore._value
+
+    assert asyncio.run(scenario()) == 2
+    assert limiter.waiting == 0
@@ -0,0 +1,79 @@
+"""
+Context assembly: cached per-snippet scores must track source versions and time
+"""
+
+from datetime import datetime, timedelta
+
+from app.services.context_builder import ContextBuilder, ContextSnippet
+
+
+def snippet(source_id: str, text: str, version: str = "1", age_hours: float = 1.0, now=None) -> ContextSnippet:
+    now = now or datetime.utcnow()
+    return ContextSnippet(
+        source_type="task",
+        source_id=source_id,
+        version=version,
+        text=text,
+        updated_at=now - timedelta(hours=age_hours),
+    )
+
+
+def test_repeated_builds_match_a_fresh_builder():
+    now = datetime.utcnow()
+    snippets = [snippet(str(i), f"billing latency item {i} " * (i % 7 + 1), age_hours=i * 5, now=now) for i in range(200)]
+    warm = ContextBuilder()
+    warm.pack(snippets, 300, "billing latency", now)
+
+    later = now + timedelta(days=2)
+    assert [s.source_id for s in warm.pack(snippets, 300, "billing latency", later)] == [
+        s.source_id for s in ContextBuilder().pack(snippets, 300, "billing latency", later)
+    ]
+
+
+def test_new_version_is_rescored():
+    now = datetime.utcnow()
+    builder = ContextBuilder()
+    old = [snippet("a", "unrelated notes", now=now), snippet("b", "weekly planning notes", now=now)]
+    assert builder.pack(old, 100, "billing", now)[0].source_id == "a"
+
+    edited = [snippet("a", "unrelated notes", now=now), snippet("b", "billing outage", version="2", now=now)]
+    assert builder.pack(edited, 100, "billing", now)[0].source_id == "b"
+
+
+def test_recency_follows_updated_at_within_a_version():
+    now = datetime.utcnow()
+    builder = ContextBuilder()
+    stale = snippet("a", "same words", age_hours=500, now=now)
+    fresh = snippet("b", "same words", age_hours=1, now=now)
+    assert builder.pack([stale, fresh], 100, "", now)[0].source_id == "b"
+
+    touched = snippet("a", "same words", age_hours=0, now=now)
+    assert builder.pack([touched, fresh], 100, "", now)[0].source_id == "a"
+
+
+def test_long_lived_builder_rebases_recency():
+    now = datetime.utcnow()
+    builder = ContextBuilder()
+    snippets = [snippet("a", "notes", age_hours=1, now=now)]
+    builder.pack(snippets, 100, "", now)
+
+    far = now + timedelta(days=400)
+    score = builder.score(snippet("a", "notes", age_hours=1, now=far), frozenset(), far)
+    assert 0.49 < score <= 0.5
+
+
+def test_document_snippet_ignores_a_summary_of_an_older_version():
+    from app.models.document import Document
+
+    document = Document(
+        id="doc-1", title="Plan", content="new body", owner_id="user-1", current_version=3,
+        ai_summary="old summary", ai_summary_version=2, ai_last_updated=datetime(2024, 1, 1),
+    )
+    assert ContextSnippet.from_document(document).text.endswith("new body")
+
+    document.ai_summary_version = 3
+    summarized = ContextSnippet.from_document(document)
+    assert summarized.text.endswith("old summary")
+
+    renamed = document.copy(update={"title": "Roadmap", "updated_at": document.updated_at + timedelta(seconds=1)})
+    assert ContextSnippet.from_document(renamed).version != summarized.version
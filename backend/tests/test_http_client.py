@@ -0,0 +1,135 @@
+"""
+Pooled provider HTTP client: retry budget, Retry-After and hedged requests
+"""
+
+import asyncio
+import time
+
+import httpx
+
+from app.services.http_client import (
+    HTTP_CLIENT_BUDGET_EXHAUSTED,
+    HTTP_CLIENT_HEDGES,
+    HTTPClientPool,
+    ProviderConfig,
+    RetryBudget,
+)
+
+
+def make_pool(handler, budget: RetryBudget = None, **options):
+    """A pool whose 'test' provider is answered in-process by handler(request, attempt), and its request log"""
+    pool = HTTPClientPool(
+        providers={"test": ProviderConfig(name="test", base_url="http://provider.test")},
+        backoff_base=0.001,
+        **options,
+    )
+    attempts = []
+
+    async def respond(request: httpx.Request) -> httpx.Response:
+        attempts.append(request)
+        return await handler(request, len(attempts))
+
+    pool._clients["test"] = httpx.AsyncClient(
+        base_url="http://provider.test", transport=httpx.MockTransport(respond)
+    )
+    if budget is not None:
+        pool.budgets["test"] = budget
+    return pool, attempts
+
+
+async def unavailable(request, attempt):
+    return httpx.Response(503)
+
+
+def test_retries_stop_when_the_budget_is_spent():
+    pool, attempts = make_pool(unavailable, RetryBudget(ratio=0.0, min_per_second=0.2, window=10.0), max_retries=5)
+    exhausted = HTTP_CLIENT_BUDGET_EXHAUSTED.value(provider="test")
+
+    async def two_requests():
+        first = await pool.request("test", "POST", "/v1/chat")
+        second = await pool.request("test", "POST", "/v1/chat")
+        await pool.close()
+        return first, second
+
+    first, second = asyncio.run(two_requests())
+
+    # Two retries fit in the budget: the first request spends both, the second gets none
+    assert (first.status_code, second.status_code) == (503, 503)
+    assert len(attempts) == 4
+    assert HTTP_CLIENT_BUDGET_EXHAUSTED.value(provider="test") == exhausted + 2
+
+
+def test_budget_grows_with_recent_traffic():
+    budget = RetryBudget(ratio=0.5, min_per_second=0.0, window=10.0)
+
+    assert not budget.try_spend()
+    for _ in range(4):
+        budget.record_request()
+    assert [budget.try_spend() for _ in range(3)] == [True, True, False]
+
+
+def test_retry_after_is_honoured_before_retrying():
+    async def rate_limited_once(request, attempt):
+        if attempt == 1:
+            return httpx.Response(429, headers={"Retry-After": "0.2"})
+        return httpx.Response(200, json={"ok": True})
+
+    pool, attempts = make_pool(rate_limited_once)
+
+    async def timed():
+        started = time.perf_counter()
+        response = await pool.request("test", "POST", "/v1/chat")
+        await pool.close()
+        return response, time.perf_counter() - started
+
+    response, elapsed = asyncio.run(timed())
+
+    assert response.status_code == 200
+    assert len(attempts) == 2
+    assert elapsed >= 0.2
+
+
+def test_retry_after_is_capped_and_bad_values_fall_back_to_jitter():
+    pool = HTTPClientPool(providers={}, backoff_base=0.1, backoff_max=2.0)
+
+    assert pool.backoff(0, httpx.Response(429, headers={"Retry-After": "3600"})) == 2.0
+    assert 0 <= pool.backoff(1, httpx.Response(503, headers={"Retry-After": "soon"})) <= 0.2
+
+
+def test_slow_first_attempt_is_hedged_and_the_fast_copy_wins():
+    async def slow_then_fast(request, attempt):
+        await asyncio.sleep(1.0 if attempt == 1 else 0.01)
+        return httpx.Response(200, json={"attempt": attempt})
+
+    pool, attempts = make_pool(slow_then_fast)
+    hedges = HTTP_CLIENT_HEDGES.value(provider="test")
+
+    async def timed():
+        started = time.perf_counter()
+        response = await pool.request("test", "POST", "/v1/embeddings", hedge_after=0.05)
+        await pool.close()
+        return response, time.perf_counter() - started
+
+    response, elapsed = asyncio.run(timed())
+
+    assert response.json() == {"attempt": 2}
+    assert elapsed < 0.5
+    assert HTTP_CLIENT_HEDGES.value(provider="test") == hedges + 1
+
+
+def test_no_hedge_is_sent_without_budget():
+    async def slow(request, attempt):
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json={"attempt": attempt})
+
+    pool, attempts = make_pool(slow, RetryBudget(ratio=0.0, min_per_second=0.0))
+    exhausted = HTTP_CLIENT_BUDGET_EXHAUSTED.value(provider="test")
+
+    async def hedged():
+        response = await pool.request("test", "POST", "/v1/embeddings", hedge_after=0.05)
+        await pool.close()
+        return response
+
+    assert asyncio.run(hedged()).json() == {"attempt": 1}
+    assert len(attempts) == 1
+    assert HTTP_CLIENT_BUDGET_EXHAUSTED.value(provider="test") == exhausted + 1
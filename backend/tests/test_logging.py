@@ -0,0 +1,121 @@
+"""
+Queued JSON logging, DEBUG sampling and request IDs
+"""
+
+import asyncio
+import io
+import json
+import logging
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core.logging import (
+    LOGS_DROPPED,
+    NonBlockingQueueHandler,
+    SamplingLogger,
+    get_logger,
+    request_id,
+    setup_logging,
+    shutdown_logging,
+)
+from app.core.middleware import RequestIdMiddleware
+
+
+@pytest.fixture
+def log_output():
+    """Root logging at DEBUG into a buffer; call the result to flush and parse it"""
+    stream = io.StringIO()
+    setup_logging(level="DEBUG", format="json", debug_sample_rate=1.0, stream=stream)
+
+    def records():
+        shutdown_logging()
+        return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    yield records
+    setup_logging()
+
+
+def test_records_are_written_as_json_with_request_id_and_extras(log_output):
+    logger = get_logger("tests.logging")
+    token = request_id.set("req-123")
+    try:
+        logger.info("Saved %s", "doc-1", extra={"document_id": "doc-1"})
+        try:
+            raise ValueError("bad input")
+        except ValueError:
+            logger.exception("Failed")
+    finally:
+        request_id.reset(token)
+    logger.warning("Outside a request")
+
+    saved, failed, outside = log_output()
+
+    assert (saved["level"], saved["logger"], saved["message"]) == ("info", "tests.logging", "Saved doc-1")
+    assert (saved["request_id"], saved["document_id"]) == ("req-123", "doc-1")
+    assert "ValueError: bad input" in failed["exception"]
+    assert "request_id" not in outside
+
+
+def test_debug_records_are_sampled_and_counted(log_output):
+    logger = get_logger("tests.sampling")
+    SamplingLogger.debug_sample_rate = 0.0
+    dropped_before = LOGS_DROPPED.value(reason="sampled")
+
+    for _ in range(5):
+        logger.debug("Mock call")
+    logger.debug("Always kept", extra={"sample_rate": 1.0})
+    logger.info("Info is never sampled")
+
+    messages = [record["message"] for record in log_output()]
+
+    assert messages == ["Always kept", "Info is never sampled"]
+    assert LOGS_DROPPED.value(reason="sampled") - dropped_before == 5
+
+
+def test_full_queue_drops_records_instead_of_blocking():
+    handler = NonBlockingQueueHandler(maxsize=2)
+    dropped_before = LOGS_DROPPED.value(reason="queue_full")
+
+    for i in range(5):
+        handler.handle(logging.LogRecord("tests", logging.INFO, __file__, 0, "record %d", (i,), None))
+
+    assert handler.queue.qsize() == 2
+    assert handler.queue.get_nowait().msg == "record 0"
+    assert LOGS_DROPPED.value(reason="queue_full") - dropped_before == 3
+
+
+def request_id_app():
+    app = FastAPI()
+
+    @app.get("/whoami")
+    async def whoami():
+        return {"request_id": request_id.get()}
+
+    app.add_middleware(RequestIdMiddleware)
+    return app
+
+
+def call(app, headers=None):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/whoami", headers=headers)
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("incoming, kept", [
+    ("trace-abc.123:7", True),
+    ("has spaces", False),
+    ("x" * 200, False),
+    (None, False),
+])
+def test_request_id_is_kept_when_well_formed_and_echoed(incoming, kept):
+    response = call(request_id_app(), {"X-Request-ID": incoming} if incoming else None)
+
+    echoed = response.headers["x-request-id"]
+    assert response.json()["request_id"] == echoed
+    assert (echoed == incoming) is kept
+    assert request_id.get() is None
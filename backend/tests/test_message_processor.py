@@ -0,0 +1,67 @@
+"""
+Single-pass extraction of AI triggers, @mentions, links and slash-commands
+"""
+
+import pytest
+
+from app.services.message_processor import MessageProcessor
+
+PARTICIPANTS = [("user-alice", "Alice"), ("user-al", "Al"), ("user-mary", "Mary Jane")]
+
+
+@pytest.fixture
+def processor():
+    return MessageProcessor()
+
+
+def process(processor, content):
+    return processor.process(content, room_id="room-1", participants=PARTICIPANTS)
+
+
+@pytest.mark.parametrize("content, expected", [
+    ("@alice can you look?", ["user-alice"]),
+    ("thanks @ALICE!", ["user-alice"]),
+    ("(@al) and @alice", ["user-al", "user-alice"]),
+    ("@alicex is someone else", []),
+    ("ping @mary jane and @maryjane", ["user-mary"]),
+    ("mail bob@alice.com", []),
+    ("snake_@alice", []),
+])
+def test_mentions_resolve_whole_names_only(processor, content, expected):
+    assert process(processor, content).mentions == expected
+
+
+def test_links_drop_trailing_punctuation_and_hide_mentions(processor):
+    result = process(processor, "see https://example.com/@alice, and (www.example.org).")
+
+    assert result.links == ["https://example.com/@alice", "www.example.org"]
+    assert result.mentions == []
+
+
+def test_bare_link_prefix_is_not_a_link(processor):
+    assert process(processor, "the https:// scheme").links == []
+
+
+@pytest.mark.parametrize("content, name, args", [
+    ("/summarize last week", "summarize", "last week"),
+    ("/Remind-Me  tomorrow\nat nine ", "remind-me", "tomorrow\nat nine"),
+    ("/call", "call", ""),
+])
+def test_slash_commands_are_parsed_from_the_start(processor, content, name, args):
+    command = process(processor, content).command
+
+    assert (command.name, command.args) == (name, args)
+
+
+@pytest.mark.parametrize("content", ["not /a command", "/ spaced", "/123"])
+def test_other_slashes_are_not_commands(processor, content):
+    assert process(processor, content).command is None
+
+
+def test_ai_triggers_are_matched_case_insensitively(processor):
+    result = process(processor, "Hey AI, can @Assistant help @alice?")
+
+    assert result.ai_triggers == ["hey ai", "@assistant"]
+    assert result.is_ai_mention
+    assert result.mentions == ["user-alice"]
+    assert not process(processor, "just chatting").is_ai_mention
@@ -0,0 +1,90 @@
+"""
+Per-route request metrics and the Prometheus text rendering behind /metrics
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core.metrics import MetricsRegistry
+from app.core.middleware import UNMATCHED_ROUTE, MetricsMiddleware
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+
+@pytest.fixture
+def client_app(registry):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    app.add_middleware(MetricsMiddleware, registry=registry)
+    return app
+
+
+def get(app, *paths):
+    async def scenario():
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.get(path) for path in paths]
+
+    return asyncio.run(scenario())
+
+
+def test_requests_are_labelled_by_route_template_and_status(client_app, registry):
+    get(client_app, "/items/1", "/items/2", "/missing")
+
+    latency = registry.histogram("http_request_duration_seconds")
+    assert latency.count(method="GET", route="/items/{item_id}", status=200) == 2
+    assert latency.count(method="GET", route=UNMATCHED_ROUTE, status=404) == 1
+    assert registry.gauge("http_requests_in_flight").value() == 0
+
+
+def test_unhandled_exceptions_are_counted_as_500s(client_app, registry):
+    responses = get(client_app, "/boom")
+
+    assert responses[0].status_code == 500
+    assert registry.counter("http_request_exceptions_total").value(route="/boom") == 1
+    assert registry.histogram("http_request_duration_seconds").count(method="GET", route="/boom", status=500) == 1
+
+
+def test_render_produces_prometheus_text(registry):
+    registry.counter("jobs_total", "Jobs run").inc(3, queue='say "hi"')
+    registry.gauge("depth").set(1.5)
+    registry.histogram("wait_seconds", "Wait time", buckets=(0.1, 1.0)).observe(0.5, provider="fake")
+
+    lines = registry.render().splitlines()
+
+    assert lines == [
+        "# TYPE depth gauge",
+        "depth 1.5",
+        "# HELP jobs_total Jobs run",
+        "# TYPE jobs_total counter",
+        'jobs_total{queue="say \\"hi\\""} 3',
+        "# HELP wait_seconds Wait time",
+        "# TYPE wait_seconds histogram",
+        'wait_seconds_bucket{provider="fake",le="0.1"} 0',
+        'wait_seconds_bucket{provider="fake",le="1"} 1',
+        'wait_seconds_bucket{provider="fake",le="+Inf"} 1',
+        'wait_seconds_sum{provider="fake"} 0.5',
+        'wait_seconds_count{provider="fake"} 1',
+    ]
+
+
+def test_metrics_endpoint_serves_the_global_registry(app):
+    response = get(app, "/health", "/metrics")[1]
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in response.text
@@ -0,0 +1,170 @@
+"""
+Debounced document summaries: bursts of saves coalesce, and the worker
+survives database errors
+"""
+
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from app.core.database import Database
+from app.services import summary_worker as summary_worker_module
+from app.services.summary_worker import SummaryWorker
+
+
+class RecordingAI:
+    def __init__(self):
+        self.calls = []
+
+    async def update_document_summary(self, content, document_id, version):
+        self.calls.append((document_id, content, version))
+        return f"summary of v{version}"
+
+
+class RecordingFirebase:
+    def __init__(self, documents=None):
+        self.documents = documents or {}
+        self.updates = []
+
+    async def get_document(self, collection, document_id):
+        data = self.documents.get(document_id)
+        return dict(data) if data else None
+
+    async def update_document(self, collection, document_id, data):
+        self.updates.append((collection, document_id, data))
+        return True
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = Database(os.path.join(tmp_path, "summaries.db"))
+    yield database
+    database.close()
+
+
+def make_worker(db, ai, firebase, **options):
+    options = {"workers": 2, "debounce_seconds": 0.05, "max_delay_seconds": 5.0, "max_attempts": 2, **options}
+    return SummaryWorker(db=db, ai=ai, firebase=firebase, **options)
+
+
+async def wait_for(condition, timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+def test_rapid_saves_produce_one_summary_of_the_latest_content(db):
+    ai, firebase = RecordingAI(), RecordingFirebase()
+    worker = make_worker(db, ai, firebase)
+
+    async def scenario():
+        await worker.start()
+        try:
+            for version in range(1, 21):
+                await worker.schedule("doc-1", f"draft {version}", version)
+            await wait_for(lambda: ai.calls)
+            await asyncio.sleep(0.2)
+        finally:
+            await worker.stop()
+        return await worker.get_job("doc-1")
+
+    assert asyncio.run(scenario()) is None
+    assert ai.calls == [("doc-1", "draft 20", 20)]
+    assert firebase.updates[0][2]["ai_summary"] == "summary of v20"
+
+
+def test_dispatcher_keeps_running_after_a_database_error(db, monkeypatch):
+    ai, firebase = RecordingAI(), RecordingFirebase()
+    worker = make_worker(db, ai, firebase)
+    claim = worker._claim_due
+    failures = []
+
+    async def flaky_claim(limit):
+        if not failures:
+            failures.append(limit)
+            raise RuntimeError("database is locked")
+        return await claim(limit)
+
+    monkeypatch.setattr(worker, "_claim_due", flaky_claim)
+
+    async def scenario():
+        await worker.start()
+        try:
+            await worker.schedule("doc-2", "text", 1)
+            await wait_for(lambda: ai.calls)
+        finally:
+            await worker.stop()
+
+    asyncio.run(scenario())
+    assert failures and ai.calls == [("doc-2", "text", 1)]
+
+
+def test_saving_a_document_schedules_a_debounced_summary(app, user, db, monkeypatch):
+    firebase = RecordingFirebase({"doc-3": {"title": "Plan", "content": "v1", "owner_id": user.id}})
+    worker = make_worker(db, RecordingAI(), firebase, debounce_seconds=60)
+    monkeypatch.setattr("app.api.documents.firebase_service", firebase)
+    monkeypatch.setattr("app.api.documents.summary_worker", worker)
+
+    async def save_twice():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = await client.put("/api/v1/documents/doc-3", json={"content": "v2"})
+            firebase.documents["doc-3"] = firebase.updates[-1][2]
+            second = await client.put("/api/v1/documents/doc-3", json={"content": "v3"})
+        return first, second, await worker.get_job("doc-3")
+
+    coalesced = summary_worker_module.SUMMARY_REQUESTS_COALESCED.value()
+    first, second, job = asyncio.run(save_twice())
+
+    assert first.status_code == 200 and second.status_code == 200
+    assert second.json()["current_version"] == 3
+    assert job["status"] == "pending" and job["version"] == 3
+    assert summary_worker_module.SUMMARY_REQUESTS_COALESCED.value() == coalesced + 1
+
+
+def test_summarize_priority_is_bounded(app):
+    async def post():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/v1/documents/doc-4/summarize", json={"priority": 10**9})
+
+    assert asyncio.run(post()).status_code == 422
+
+
+class RecordingIndex:
+    def __init__(self):
+        self.upserts = []
+
+    async def upsert(self, partition, snippet):
+        self.upserts.append((partition, snippet))
+
+
+def test_persisted_summary_is_reindexed(db):
+    ai, index = RecordingAI(), RecordingIndex()
+    firebase = RecordingFirebase({"doc-1": {
+        "title": "Plan", "content": "draft 2", "owner_id": "user-1", "team_id": "team-1", "current_version": 2,
+    }})
+
+    async def update_document(collection, document_id, data):
+        firebase.documents[document_id].update(data)
+        return True
+
+    firebase.update_document = update_document
+    worker = make_worker(db, ai, firebase, index=index)
+
+    async def scenario():
+        await worker.start()
+        try:
+            await worker.schedule("doc-1", "draft 2", 2)
+            await wait_for(lambda: index.upserts)
+        finally:
+            await worker.stop()
+
+    asyncio.run(scenario())
+    partition, snippet = index.upserts[0]
+    assert partition == "team:team-1"
+    assert snippet.text == "Document: Plan\nsummary of v2"
@@ -0,0 +1,62 @@
+"""
+Task updates are validated before they are persisted
+"""
+
+import asyncio
+
+import pytest
+
+from app.models.task import Task
+
+from tests.test_workspace_indexing import ProjectStore, request
+
+
+@pytest.fixture
+def store(monkeypatch, user):
+    store = ProjectStore()
+    # Own team, so these tasks stay out of other tests' index partition
+    store.collections["projects"]["project-t"] = {"name": "Finance", "team_id": "team-t", "created_by": "someone"}
+    monkeypatch.setattr("app.api.tasks.firebase_service", store)
+    user.team_memberships = ["team-t"]
+    return store
+
+
+def create_task(app, **fields):
+    response = asyncio.run(request(app, "POST", "/api/v1/tasks/", json={
+        "title": "Close the books", "project_id": "project-t", **fields,
+    }))
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+@pytest.mark.parametrize("field", ["title", "status", "priority"])
+def test_null_required_fields_are_rejected(app, store, field):
+    task_id = create_task(app)
+
+    response = asyncio.run(request(app, "PUT", f"/api/v1/tasks/{task_id}", json={field: None}))
+
+    assert response.status_code == 422
+    stored = Task.from_firestore(task_id, dict(store.collections["tasks"][task_id]))
+    assert stored.title == "Close the books"
+
+
+def test_completing_and_reopening_a_task_tracks_completed_date(app, store):
+    task_id = create_task(app)
+
+    done = asyncio.run(request(app, "PUT", f"/api/v1/tasks/{task_id}", json={"status": "done"}))
+    assert done.json()["completed_date"] is not None
+
+    reopened = asyncio.run(request(app, "PUT", f"/api/v1/tasks/{task_id}", json={"status": "in_progress"}))
+
+    assert reopened.status_code == 200
+    assert reopened.json()["completed_date"] is None
+    assert store.collections["tasks"][task_id]["completed_date"] is None
+
+
+def test_optional_fields_can_be_cleared(app, store):
+    task_id = create_task(app, description="Quarter end")
+
+    response = asyncio.run(request(app, "PUT", f"/api/v1/tasks/{task_id}", json={"description": None}))
+
+    assert response.status_code == 200
+    assert response.json()["description"] is None
@@ -0,0 +1,62 @@
+"""
+Profile updates through PUT /users/me
+"""
+
+import asyncio
+import uuid
+
+import httpx
+import pytest
+
+from app.services.auth_service import auth_service
+
+
+@pytest.fixture
+def registered(app):
+    """A user stored in the auth service, authenticated for the app"""
+    from app.core.dependencies import get_current_user
+
+    user = asyncio.run(auth_service.create_user(f"{uuid.uuid4().hex}@example.com", "Profile Owner"))
+    app.dependency_overrides[get_current_user] = lambda: user
+    return user
+
+
+async def put_me(app, payload):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.put("/api/v1/users/me", json=payload)
+
+
+def test_profile_fields_are_updated(app, registered):
+    response = asyncio.run(put_me(app, {"bio": "Ships things", "timezone": "Europe/Berlin"}))
+
+    assert response.status_code == 200
+    stored = asyncio.run(auth_service.get_user_by_id(registered.id))
+    assert (stored.profile.bio, stored.profile.timezone) == ("Ships things", "Europe/Berlin")
+    assert stored.profile.display_name == "Profile Owner"
+
+
+@pytest.mark.parametrize("field", ["display_name", "timezone", "focus_mode"])
+def test_null_required_fields_are_rejected_without_touching_the_profile(app, registered, field):
+    response = asyncio.run(put_me(app, {field: None, "bio": "changed"}))
+
+    assert response.status_code == 422
+    stored = asyncio.run(auth_service.get_user_by_id(registered.id))
+    assert stored.profile.display_name == "Profile Owner"
+    assert stored.profile.bio is None
+
+
+def test_optional_fields_can_be_cleared(app, registered):
+    asyncio.run(put_me(app, {"bio": "Ships things"}))
+
+    response = asyncio.run(put_me(app, {"bio": None}))
+
+    assert response.status_code == 200
+    assert asyncio.run(auth_service.get_user_by_id(registered.id)).profile.bio is None
+
+
+def test_invalid_merged_profile_leaves_the_stored_one_intact(registered):
+    with pytest.raises(ValueError):
+        asyncio.run(auth_service.update_user_profile(registered.id, {"personal_health": 500}))
+
+    assert asyncio.run(auth_service.get_user_by_id(registered.id)).profile.personal_health == 50
@@ -0,0 +1,54 @@
+"""
+Embedding index: IVF training runs off the search path and keeps writes made meanwhile
+"""
+
+import asyncio
+import tempfile
+import threading
+
+from app.services.context_builder import ContextSnippet
+from app.services.vector_index import VectorIndex, VectorPartition
+
+
+def snippets(start: int, count: int):
+    return [
+        ContextSnippet(source_type="task", source_id=f"task-{i}", version="1", text=f"Task {i}: ship widget {i % 7}")
+        for i in range(start, start + count)
+    ]
+
+
+def test_search_serves_brute_force_while_ivf_trains_in_background(monkeypatch):
+    index = VectorIndex(directory=tempfile.mkdtemp(), dim=64, ivf_threshold=100)
+    release = threading.Event()
+    train = VectorPartition.train_ivf
+
+    def slow_train(self, live, *args, **kwargs):
+        release.wait(timeout=5)
+        return train(self, live, *args, **kwargs)
+
+    monkeypatch.setattr(VectorPartition, "train_ivf", slow_train)
+
+    async def scenario():
+        await index.upsert_many("team:ivf", snippets(0, 120))
+        first = await index.search("team:ivf", "Task 5: ship widget 5", k=3)
+        part = index.partition("team:ivf")
+        assert part.ivf is None and "team:ivf" in index._training
+
+        # Written and deleted while training; the finished index must reflect both
+        await index.upsert_many("team:ivf", snippets(120, 5))
+        await index.delete("team:ivf", "task", "task-5")
+        release.set()
+        assert await asyncio.to_thread(index.wait_for_training, 5)
+        return first, part, await index.search("team:ivf", "Task 122: ship widget 3", k=1)
+
+    try:
+        first, part, latest = asyncio.run(scenario())
+    finally:
+        release.set()
+        index.close()
+
+    assert first[0].snippet.source_id == "task-5"
+    assert part.ivf is not None and part.ivf.trained_size == 120
+    assert latest[0].snippet.source_id == "task-122"
+    assert "task:task-5" not in part.rows
+    assert all(part.ivf.list_of[row] >= 0 for row in part.rows.values())
@@ -0,0 +1,86 @@
+"""
+Tasks and chat messages are indexed for AI retrieval in their team's partition
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.models.user import User, UserProfile
+from app.services.chat_service import chat_service
+from app.services.vector_index import partition_for, vector_index
+
+
+class ProjectStore:
+    """In-memory stand-in for the Firestore collections the task endpoints touch"""
+
+    def __init__(self):
+        self.collections = {"projects": {"project-i": {"name": "Billing", "team_id": "team-i", "created_by": "someone"}}}
+
+    async def get_document(self, collection, document_id):
+        data = self.collections.get(collection, {}).get(document_id)
+        return dict(data) if data else None
+
+    async def create_document(self, collection, document_id, data):
+        self.collections.setdefault(collection, {})[document_id] = data
+        return True
+
+    async def update_document(self, collection, document_id, data):
+        self.collections[collection][document_id].update(data)
+        return True
+
+
+async def request(app, method, url, **kwargs):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.request(method, url, **kwargs)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = ProjectStore()
+    monkeypatch.setattr("app.api.tasks.firebase_service", store)
+    return store
+
+
+def test_created_and_updated_tasks_are_searchable_by_the_team(app, user, store):
+    user.team_memberships = ["team-i"]
+
+    created = asyncio.run(request(app, "POST", "/api/v1/tasks/", json={
+        "title": "Reconcile ledger exports", "project_id": "project-i",
+    }))
+    assert created.status_code == 201
+    task_id = created.json()["id"]
+
+    updated = asyncio.run(request(app, "PUT", f"/api/v1/tasks/{task_id}", json={
+        "title": "Reconcile ledger exports nightly", "status": "in_progress",
+    }))
+    assert updated.status_code == 200
+
+    matches = asyncio.run(vector_index.search(partition_for(team_id="team-i"), "ledger exports nightly", k=5))
+    assert [(m.snippet.source_id, m.snippet.text.splitlines()[0]) for m in matches] == [
+        (task_id, "Task: Reconcile ledger exports nightly [in_progress, medium]")
+    ]
+
+
+def test_tasks_require_project_membership(app, user, store):
+    response = asyncio.run(request(app, "POST", "/api/v1/tasks/", json={
+        "title": "Sneak in", "project_id": "project-i",
+    }))
+
+    assert response.status_code == 403
+
+
+def test_team_room_messages_go_to_the_team_partition(app, user):
+    other = User(id="user-other", email="other@example.com", profile=UserProfile(display_name="Other"))
+    room = asyncio.run(chat_service.create_room(user, [other], name="Billing", team_id="team-chat"))
+
+    response = asyncio.run(request(app, "POST", f"/api/v1/chat/threads/{room['id']}/messages", json={
+        "content": "ledger reconciliation is failing again",
+    }))
+    assert response.status_code == 200
+
+    team_matches = asyncio.run(vector_index.search(partition_for(team_id="team-chat"), "ledger reconciliation", k=5))
+    assert [m.snippet.source_id for m in team_matches] == [response.json()["id"]]
+    assert not vector_index.has_partition(partition_for(room_id=room["id"]))